@@ -1,6 +1,13 @@
+import os
+import time
+# measure the cold start from the first import
+STARTUP_BEGIN = time.perf_counter()
+
 import dash
 from dash import html, dcc
 import dash_bootstrap_components as dbc
+from files.Metrics import metrics
+from files.BackgroundServices import background_services
 
 # set the css style sheet to cyborg from https://bootswatch.com/cyborg/
 external_css = [dbc.themes.CYBORG]
@@ -23,6 +30,17 @@ app.layout = html.Div([
     dash.page_container
 ])
 
+# time every callback and serve the timings and cache counters on /metrics
+metrics.instrument_dash(app)
+
+# the pages are imported while the app is created, so this covers their import too
+STARTUP_SECONDS = time.perf_counter() - STARTUP_BEGIN
+metrics.observe('startup_seconds', STARTUP_SECONDS)
+print(f"Dashboard ready in {STARTUP_SECONDS:.2f}s")
+
 if __name__ == '__main__':
+    # the debug reloader runs this file in a watcher process and a serving child, only the child runs the background work
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        background_services.start()
     app.run_server(debug=True)  
 
@@ -0,0 +1,49 @@
+"""
+Runs the autotrade signal daemon on its own, without the dashboard or a browser.
+
+The daemon evaluates the band rule on every closed BTC-USDC candle and starts or stops the
+3Commas bot, with the settings saved from the Market Watch page (data/autotrade_settings.json).
+Its signals are written to data/autotrade_signal.json, where the page shows them. Set
+AUTOTRADE_DAEMON=external for the dashboard while this runs, so only one daemon trades.
+
+Usage (from the DIVIDEND DASHBOARD folder):
+    python autotrade_daemon.py
+    python autotrade_daemon.py --once
+    python autotrade_daemon.py --api-url http://127.0.0.1:8765/trade_signal/trading_view
+"""
+import argparse
+import os
+from files.AutotradeSignalDaemon import AutotradeSignalDaemon
+from files.AutotradeState import AutotradeState
+from files.ChartPipeline import ChartPipeline
+from files.MergedDataStore import MergedDataStore
+from files.TradingBotController import TradingBotController
+
+CRYPTO_TICKERS = ['BTC-USDC', 'ETH-USDC']
+# 'prophet' or the NumPy 'band' engine, the same as the dashboard's
+FORECAST_ENGINE = os.environ.get('FORECAST_ENGINE', 'prophet')
+MERGED_STORE_MB = int(os.environ.get('MERGED_STORE_MB', 512))
+
+def main():
+    parser = argparse.ArgumentParser(description='Evaluate the autotrade rule on every closed candle.')
+    parser.add_argument('--api-url', default=TradingBotController.API_URL, help='the 3Commas signal endpoint, e.g. tools/fake_3commas_server.py')
+    parser.add_argument('--poll-interval', type=int, default=60, help='the most seconds between two checks of the settings')
+    parser.add_argument('--once', action='store_true', help='check the last closed candle once and exit')
+    args = parser.parse_args()
+
+    daemon = AutotradeSignalDaemon(ChartPipeline(CRYPTO_TICKERS, [], engine=FORECAST_ENGINE),
+                                   TradingBotController(api_url=args.api_url),
+                                   state=AutotradeState(),
+                                   store=MergedDataStore(max_bytes=MERGED_STORE_MB*1024*1024),
+                                   poll_interval=args.poll_interval)
+    if args.once:
+        print(f"Signal: {daemon.check()}")
+        return 0
+    try:
+        daemon.run()
+    except KeyboardInterrupt:
+        daemon.stop()
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
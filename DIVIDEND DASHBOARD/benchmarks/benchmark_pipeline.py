@@ -0,0 +1,277 @@
+"""
+Benchmarks the Market Watch chart pipeline on the offline fixtures.
+
+Every fixture series goes through the same stages as a chart in the dashboard:
+load, prepare_data_for_prophet, forecast, process_prophet_forecast,
+merge_dataframes_for_prophet, create_candlestick_chart and the figure's JSON
+serialization. No network or MT4 terminal is needed: the bars are read from
+benchmarks/fixtures (the MT4 fixture through MT4DataFetcher, so its parser is timed too)
+and the forecast caches are bypassed.
+
+For each fixture the script reports the median seconds of every stage over `--repeat`
+runs, the peak Python memory of one traced run and the size of the figure JSON, and
+compares them with benchmarks/baseline.json. A metric regresses when it exceeds the
+baseline by more than its threshold; the script then exits with status 1.
+
+Usage (from the DIVIDEND DASHBOARD folder):
+    python benchmarks/benchmark_pipeline.py                      # compare with the baseline
+    python benchmarks/benchmark_pipeline.py --update-baseline    # store the current results
+    python benchmarks/benchmark_pipeline.py --update-baseline --sizes-only --engine band
+    python benchmarks/benchmark_pipeline.py --engine band --repeat 5
+    python benchmarks/benchmark_pipeline.py --compare            # band engine against Prophet
+
+--compare fits both forecast engines on every fixture minus its last 90 points and
+reports their mean absolute error and band coverage on those points, their fit seconds
+and the band engine's speedup, through BandForecastEngine.compare_with_prophet.
+
+Prophet optimizes in a cmdstan subprocess, so its memory is not part of the peak memory.
+Timings depend on the machine, so keep the baseline of the machine the benchmark runs on.
+The committed baseline only holds the peak memory and the figure JSON size of every
+fixture, for both engines, which depend on the library versions recorded with them but
+not on the machine; --sizes-only refreshes just those, and a full --update-baseline adds
+this machine's timings to them.
+"""
+import argparse
+import json
+import os
+from importlib import metadata
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+import pandas as pd
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURES_DIR = os.path.join(BENCHMARKS_DIR, 'fixtures')
+BASELINE_PATH = os.path.join(BENCHMARKS_DIR, 'baseline.json')
+
+# make the files package importable when the script is run from anywhere
+sys.path.insert(0, os.path.dirname(BENCHMARKS_DIR))
+
+from files.MT4DataFetcher import MT4DataFetcher
+from files.DataProcessor import DataProcessor
+from files.ForecastProcessor import ForecastProcessor
+from files.DataVisualizer import DataVisualizer
+
+# fixture: (source, chart timeframe, forecast frequency)
+FIXTURES = {
+    'stock_daily': ('stock', 'Daily', 'D'),
+    'crypto_1day': ('crypto', '1day', 'D'),
+    'crypto_1hour': ('crypto', '1hour', 'H'),
+    'EURUSD_1440': ('mt4', 'Daily', 'D'),
+}
+# the default CHART_MAX_POINTS of the Market Watch page
+CHART_MAX_POINTS = 500
+STAGES = ['load', 'prepare', 'forecast', 'process', 'merge', 'chart', 'to_json']
+
+# a metric regresses when current > baseline * ratio
+THRESHOLDS = {
+    'seconds': 1.30,
+    'peak_memory_bytes': 1.20,
+    'figure_json_bytes': 1.05,
+}
+# the metrics that do not depend on the machine, see --sizes-only
+SIZE_METRICS = ['peak_memory_bytes', 'figure_json_bytes']
+# the libraries the size metrics depend on, recorded with them
+SIZE_LIBRARIES = ['numpy', 'orjson', 'pandas', 'plotly', 'prophet', 'scipy']
+# stage time differences below this are treated as noise
+MIN_SECONDS_DIFF = 0.005
+
+def load_fixture(name, source):
+    """
+    Loads a fixture the way its fetcher returns it: OHLC columns indexed by Date.
+    """
+    if source == 'mt4':
+        symbol, period = name.rsplit('_', 1)
+        mt4_data_fetcher = MT4DataFetcher(period=period, base_path=FIXTURES_DIR)
+        mt4_data_fetcher.set_symbol(symbol)
+        return mt4_data_fetcher.fetch_data()
+    return pd.read_csv(os.path.join(FIXTURES_DIR, f'{name}.csv'), index_col='Date', parse_dates=True)
+
+def chart_slice(merged_df, timeframe):
+    """
+    Slices the merged data like the Market Watch page does before charting.
+    """
+    if timeframe == '1hour':
+        return merged_df.iloc[-291:]
+    return merged_df.tail(100 + 90)
+
+def run_pipeline(name, engine):
+    """
+    Runs every stage once for a fixture.
+
+    Returns:
+        tuple: (dict of stage seconds, figure JSON size in bytes)
+    """
+    source, timeframe, freq = FIXTURES[name]
+    seconds = {}
+
+    def timed(stage, func, *args, **kwargs):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        seconds[stage] = time.perf_counter() - start
+        return result
+
+    data = timed('load', load_fixture, name, source)
+    prep_data = timed('prepare', DataProcessor.prepare_data_for_prophet, data)
+    forecast = timed('forecast', ForecastProcessor.forecast, prep_data, period=90, freq=freq, engine=engine)
+    processed_forecast = timed('process', DataProcessor.process_prophet_forecast, forecast)
+    merged_df = timed('merge', DataProcessor.merge_dataframes_for_prophet, data, processed_forecast)
+    fig = timed('chart', DataVisualizer.create_candlestick_chart, chart_slice(merged_df, timeframe), name, timeframe,
+                max_points=CHART_MAX_POINTS)
+    figure_json = timed('to_json', fig.to_json)
+    return seconds, len(figure_json.encode('utf-8'))
+
+def benchmark(name, engine, repeat):
+    """
+    Times a fixture over `repeat` runs and measures its peak memory in one extra traced run.
+    """
+    runs = []
+    for _ in range(repeat):
+        seconds, figure_json_bytes = run_pipeline(name, engine)
+        runs.append(seconds)
+    stage_seconds = {stage: statistics.median(run[stage] for run in runs) for stage in STAGES}
+
+    # tracing slows the code down, so memory is measured apart from the timings
+    tracemalloc.start()
+    try:
+        run_pipeline(name, engine)
+        _, peak_memory_bytes = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'stage_seconds': stage_seconds,
+        'total_seconds': sum(stage_seconds.values()),
+        'peak_memory_bytes': peak_memory_bytes,
+        'figure_json_bytes': figure_json_bytes,
+    }
+
+def compare(name, current, baseline, time_threshold):
+    """
+    Returns a list of regression messages for a fixture, empty if there are none.
+    """
+    regressions = []
+
+    def check(metric, current_value, baseline_value, ratio, min_diff=0):
+        if baseline_value is None:
+            return
+        if current_value > baseline_value * ratio and current_value - baseline_value > min_diff:
+            regressions.append(f'{name} {metric}: {current_value:,.4g} vs baseline {baseline_value:,.4g} '
+                               f'(+{(current_value / baseline_value - 1) * 100:.0f}%, limit +{(ratio - 1) * 100:.0f}%)')
+
+    for stage in STAGES:
+        check(f'{stage} seconds', current['stage_seconds'][stage], baseline.get('stage_seconds', {}).get(stage),
+              time_threshold, MIN_SECONDS_DIFF)
+    check('total seconds', current['total_seconds'], baseline.get('total_seconds'), time_threshold, MIN_SECONDS_DIFF)
+    check('peak memory bytes', current['peak_memory_bytes'], baseline.get('peak_memory_bytes'), THRESHOLDS['peak_memory_bytes'])
+    check('figure json bytes', current['figure_json_bytes'], baseline.get('figure_json_bytes'), THRESHOLDS['figure_json_bytes'])
+    return regressions
+
+def print_results(results):
+    header = f"{'fixture':<14}" + ''.join(f'{stage:>10}' for stage in STAGES) + f"{'total':>10}{'peak MB':>10}{'json KB':>10}"
+    print(header)
+    print('-' * len(header))
+    for name, result in results.items():
+        row = f'{name:<14}' + ''.join(f"{result['stage_seconds'][stage]:>10.4f}" for stage in STAGES)
+        row += f"{result['total_seconds']:>10.4f}{result['peak_memory_bytes'] / 1e6:>10.1f}{result['figure_json_bytes'] / 1e3:>10.1f}"
+        print(row)
+
+def compare_engines(names):
+    """
+    Scores the band engine against Prophet on each fixture's last 90 points.
+    """
+    comparisons = {}
+    for name in names:
+        source, _, freq = FIXTURES[name]
+        print(f'Comparing the band engine with Prophet on {name}...')
+        prep_data = DataProcessor.prepare_data_for_prophet(load_fixture(name, source))
+        comparisons[name] = ForecastProcessor.band_engine.compare_with_prophet(prep_data, period=90, freq=freq)
+
+    header = (f"{'fixture':<14}{'band MAE':>12}{'prophet MAE':>12}{'band cov':>10}{'prophet cov':>12}"
+              f"{'band s':>10}{'prophet s':>10}{'speedup':>10}")
+    print()
+    print(header)
+    print('-' * len(header))
+    for name, result in comparisons.items():
+        band, prophet = result['band'], result['prophet']
+        print(f"{name:<14}{band['mae']:>12.4g}{prophet['mae']:>12.4g}{band['coverage']:>10.0%}{prophet['coverage']:>12.0%}"
+              f"{band['fit_seconds']:>10.3f}{prophet['fit_seconds']:>10.3f}{result['speedup']:>9.0f}x")
+    return comparisons
+
+def library_versions():
+    versions = {'python': platform.python_version()}
+    for library in SIZE_LIBRARIES:
+        try:
+            versions[library] = metadata.version(library)
+        except metadata.PackageNotFoundError:
+            versions[library] = None
+    return versions
+
+def load_baseline():
+    try:
+        with open(BASELINE_PATH, 'r') as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {}
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the chart pipeline on the offline fixtures.')
+    parser.add_argument('--engine', default='prophet', choices=['prophet', 'band'], help='the forecast engine to benchmark')
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per fixture, the median is reported')
+    parser.add_argument('--fixture', action='append', choices=list(FIXTURES), help='only run these fixtures')
+    parser.add_argument('--time-threshold', type=float, default=THRESHOLDS['seconds'],
+                        help='allowed ratio of current to baseline seconds')
+    parser.add_argument('--update-baseline', action='store_true', help='store the results as the new baseline')
+    parser.add_argument('--sizes-only', action='store_true',
+                        help='with --update-baseline, only store the peak memory and figure JSON size, which do not depend on the machine')
+    parser.add_argument('--compare', action='store_true', help='compare the accuracy and speed of the band engine with Prophet')
+    args = parser.parse_args()
+
+    names = args.fixture or list(FIXTURES)
+    if args.compare:
+        compare_engines(names)
+        return 0
+    results = {}
+    for name in names:
+        print(f'Benchmarking {name} with the {args.engine} engine...')
+        results[name] = benchmark(name, args.engine, args.repeat)
+    print()
+    print_results(results)
+    print()
+
+    baseline = load_baseline()
+    if args.update_baseline:
+        engine_baseline = baseline.setdefault(args.engine, {})
+        if args.sizes_only:
+            # keep any timings stored on this machine, only the sizes are replaced
+            for name, result in results.items():
+                engine_baseline.setdefault(name, {}).update({metric: result[metric] for metric in SIZE_METRICS})
+        else:
+            engine_baseline.update(results)
+            baseline['machine'] = {'python': platform.python_version(), 'platform': platform.platform(), 'processor': platform.processor()}
+        baseline['libraries'] = library_versions()
+        with open(BASELINE_PATH, 'w') as file:
+            json.dump(baseline, file, indent=2, sort_keys=True)
+        print(f'Baseline for the {args.engine} engine written to {BASELINE_PATH}')
+        return 0
+
+    engine_baseline = baseline.get(args.engine, {})
+    missing = [name for name in names if name not in engine_baseline]
+    if missing:
+        print(f"No baseline for {', '.join(missing)} with the {args.engine} engine, run with --update-baseline to store one.")
+    regressions = []
+    for name in names:
+        if name in engine_baseline:
+            regressions.extend(compare(name, results[name], engine_baseline[name], args.time_threshold))
+    if regressions:
+        print('Regressions:')
+        for message in regressions:
+            print(f'  {message}')
+        return 1
+    print('No regressions against the baseline.')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
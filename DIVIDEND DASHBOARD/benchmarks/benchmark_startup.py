@@ -0,0 +1,84 @@
+"""
+Measures the cold start of the dashboard with the network switched off.
+
+Each run imports app.py in a fresh interpreter, the way `python app.py` and every spawned
+worker process do, with socket connections patched to fail. It reports the import time
+and every network connection the import tried to make. A page that downloads data while
+it is imported shows up as a connection and fails the run, and so does an import that
+starts the background services, which must wait for app.py or the WSGI server.
+
+Usage (from the DIVIDEND DASHBOARD folder):
+    python benchmarks/benchmark_startup.py
+    python benchmarks/benchmark_startup.py --repeat 5 --max-seconds 10
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+DASHBOARD_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# runs in the child interpreter, the result is the last line it prints
+CHILD_CODE = r'''
+import json, os, socket, sys, time
+attempts = []
+
+def blocked_connect(self, address):
+    attempts.append(repr(address))
+    raise OSError('network disabled by benchmark_startup.py')
+
+socket.socket.connect = blocked_connect
+socket.socket.connect_ex = lambda self, address: blocked_connect(self, address)
+
+sys.path.insert(0, os.getcwd())
+start = time.perf_counter()
+import app
+seconds = time.perf_counter() - start
+print(json.dumps({'seconds': seconds, 'connections': list(attempts), 'services_started': app.background_services.started}), flush=True)
+# importing must not start the background services, skip the interpreter shutdown in case a page did
+os._exit(0)
+'''
+
+def run_once(timeout):
+    """
+    Imports app.py in a fresh interpreter and returns its result dict.
+    """
+    completed = subprocess.run([sys.executable, '-c', CHILD_CODE], cwd=DASHBOARD_DIR, capture_output=True, text=True, timeout=timeout)
+    lines = completed.stdout.strip().splitlines()
+    if completed.returncode != 0 or not lines:
+        raise RuntimeError(f'Importing app.py failed:\n{completed.stderr[-2000:]}')
+    return json.loads(lines[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure the dashboard cold start without network.')
+    parser.add_argument('--repeat', type=int, default=3, help='fresh interpreters to time, the median is reported')
+    parser.add_argument('--max-seconds', type=float, default=None, help='fail if the median import time is above this')
+    parser.add_argument('--timeout', type=float, default=120, help='seconds before a run is abandoned')
+    args = parser.parse_args()
+
+    results = [run_once(args.timeout) for _ in range(args.repeat)]
+    seconds = [result['seconds'] for result in results]
+    connections = sorted({connection for result in results for connection in result['connections']})
+    median_seconds = statistics.median(seconds)
+    print(f"Cold start: median {median_seconds:.2f}s, min {min(seconds):.2f}s, max {max(seconds):.2f}s over {len(seconds)} runs")
+
+    failed = False
+    if connections:
+        failed = True
+        print('Network connections attempted while importing app.py:')
+        for connection in connections:
+            print(f'  {connection}')
+    else:
+        print('No network connections attempted while importing app.py.')
+    if any(result['services_started'] for result in results):
+        failed = True
+        print('Importing app.py started the background services.')
+    if args.max_seconds is not None and median_seconds > args.max_seconds:
+        failed = True
+        print(f'Median cold start is above the {args.max_seconds:.2f}s limit.')
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
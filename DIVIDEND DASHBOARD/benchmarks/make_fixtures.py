@@ -0,0 +1,58 @@
+"""
+Writes the offline fixture series the chart pipeline benchmark runs on.
+
+The series are seeded random walks shaped like what each fetcher returns: a daily stock
+from yfinance, hourly and daily crypto candles from KuCoin and a daily MT4 CSV file as
+written by UFX_FXRateCollector.mq4. Running the script again writes identical files, so
+the fixtures can be rebuilt instead of being edited by hand.
+
+Usage (from the DIVIDEND DASHBOARD folder):
+    python benchmarks/make_fixtures.py
+"""
+import os
+import numpy as np
+import pandas as pd
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+SEED = 20240628
+
+# name: (start price, daily volatility, dates)
+SERIES = {
+    'stock_daily': (45.0, 0.012, pd.bdate_range(end='2024-06-28', periods=504)),
+    'crypto_1day': (30000.0, 0.03, pd.date_range(end='2024-06-28', periods=730, freq='D')),
+    'crypto_1hour': (60000.0, 0.03 / np.sqrt(24), pd.date_range(end='2024-06-28 23:00', periods=1500, freq='h')),
+    'EURUSD_1440': (1.08, 0.004, pd.bdate_range(end='2024-06-28', periods=730)),
+}
+
+def random_walk_ohlc(rng, start_price, volatility, dates):
+    """
+    Builds OHLC bars from a geometric random walk with a slow cycle, so the forecast
+    has a trend and a band to fit.
+    """
+    n = len(dates)
+    cycle = 0.15 * volatility * np.sin(np.linspace(0, 6 * np.pi, n))
+    close = start_price * np.exp(np.cumsum(rng.normal(0, volatility, n) + cycle))
+    open_ = np.concatenate([[start_price], close[:-1]]) * np.exp(rng.normal(0, volatility / 4, n))
+    spread = np.abs(rng.normal(0, volatility / 2, n))
+    high = np.maximum(open_, close) * (1 + spread)
+    low = np.minimum(open_, close) * (1 - spread)
+    data = pd.DataFrame({'Open': open_, 'High': high, 'Low': low, 'Close': close}, index=dates)
+    data.index.name = 'Date'
+    return data
+
+def main():
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+    rng = np.random.default_rng(SEED)
+    for name, (start_price, volatility, dates) in SERIES.items():
+        data = random_walk_ohlc(rng, start_price, volatility, dates)
+        path = os.path.join(FIXTURES_DIR, f'{name}.csv')
+        if name == 'EURUSD_1440':
+            # the MT4 collector writes headerless ';' separated rows with MT4 style dates
+            data.index = data.index.strftime('%Y.%m.%d %H:%M')
+            data.round(5).to_csv(path, sep=';', header=False)
+        else:
+            data.round(6).to_csv(path)
+        print(f'Wrote {len(data)} bars to {path}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+import threading
+import time
+import pandas as pd
+from files.AutotradeState import AutotradeState
+from files.CryptoDataFetcher import CryptoDataFetcher
+
+def band_signal(bar):
+    """
+    Applies the autotrade rule to one bar of merged chart data.
+
+    Args:
+        bar (Series): A row with 'Close', 'lower_band' and 'upper_band'.
+
+    Returns:
+        str: 'buy' if the close is below the lower band, 'sell' if it is above the upper
+             band, None otherwise.
+    """
+    if bar['Close'] < bar['lower_band']:
+        return 'buy'
+    if bar['Close'] > bar['upper_band']:
+        return 'sell'
+    return None
+
+class AutotradeSignalDaemon:
+    """
+    Evaluates the autotrade rule on every closed candle and starts or stops the trading bot.
+
+    The daemon wakes up shortly after each candle of the chosen timeframe closes, fetches
+    the candles and forecast bands through a ChartPipeline (which only fits a new forecast
+    when a new bar has arrived) and applies band_signal to the candle that just closed. It
+    reads its settings from an AutotradeState written by the Market Watch page and writes
+    back every signal it evaluated along with a heartbeat, so the page shows what the
+    daemon did without doing any of it itself. It runs in a thread of the dashboard or on
+    its own through autotrade_daemon.py.
+    """
+    def __init__(self, chart_pipeline, bot_controller, state=None, store=None, poll_interval=60, close_delay=5):
+        """
+        Initializes the daemon without starting it.
+
+        Args:
+            chart_pipeline (ChartPipeline): Fetches and forecasts the candles.
+            bot_controller (TradingBotController): Starts and stops the bot.
+            state (AutotradeState): The shared settings and signals, the default files if None.
+            store (MergedDataStore): Optional store the fetched chart data is published to,
+                                     so the charts are up to date as soon as a candle closes.
+            poll_interval (int): The most seconds between two checks, so a change of the
+                                 settings is picked up without waiting for the next candle.
+            close_delay (int): Seconds to wait after a candle closes for KuCoin to publish it.
+        """
+        self.chart_pipeline = chart_pipeline
+        self.bot_controller = bot_controller
+        self.state = state if state is not None else AutotradeState()
+        self.store = store
+        self.poll_interval = poll_interval
+        self.close_delay = close_delay
+        # what the last evaluation looked at, to evaluate each candle once
+        self.last_checked = None
+        self.candle_seconds = CryptoDataFetcher.CANDLE_SECONDS['1day']
+        self.thread = None
+        self.stop_event = threading.Event()
+
+    def start(self):
+        """
+        Runs the daemon in a daemon thread.
+        """
+        self.thread = threading.Thread(target=self.run, name='autotrade-signal-daemon', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """
+        Stops the daemon after its current check.
+        """
+        self.stop_event.set()
+
+    def run(self):
+        """
+        Checks the signal until stopped, blocking the calling thread.
+        """
+        print("Autotrade signal daemon running")
+        while not self.stop_event.is_set():
+            try:
+                self.check()
+            except Exception as e:
+                print(f"Error checking the autotrade signal: {e}")
+            self.stop_event.wait(self.seconds_until_next_check())
+
+    def seconds_until_next_check(self, now=None):
+        """
+        Returns the seconds until the next candle close, but at most poll_interval.
+        """
+        now = time.time() if now is None else now
+        next_close = (int(now) // self.candle_seconds + 1) * self.candle_seconds + self.close_delay
+        return max(1, min(self.poll_interval, next_close - now))
+
+    def check(self, now=None):
+        """
+        Evaluates the rule on the last closed candle, unless that candle was already evaluated
+        with the same settings.
+
+        Args:
+            now (float): The current epoch time, the clock if None.
+
+        Returns:
+            dict: The signal with its 'status': 'sent', 'suppressed' if the bot was already
+                  in that state, or 'invalid' (with the 'reason') if its message could not
+                  be parsed. None if there was no signal.
+        """
+        now = time.time() if now is None else now
+        self.state.update_signal(heartbeat=now)
+        settings = self.state.settings()
+        if not settings['autotrade_on']:
+            # evaluate the current candle again once autotrade is switched back on
+            self.last_checked = None
+            return None
+
+        symbol, show_hourly_chart = settings['symbol'], settings['show_hourly_chart']
+        timeframe = self.chart_pipeline.timeframe_for(symbol, show_hourly_chart)
+        if timeframe not in CryptoDataFetcher.CANDLE_SECONDS:
+            print(f"Autotrade only follows KuCoin symbols, not {symbol}")
+            return None
+        self.candle_seconds = CryptoDataFetcher.CANDLE_SECONDS[timeframe]
+        # the open time of the last candle that has closed, which is how KuCoin stamps it
+        candle_open = (int(now) // self.candle_seconds - 1) * self.candle_seconds
+        checked = (symbol, timeframe, candle_open, settings['buy_message'], settings['sell_message'])
+        if checked == self.last_checked:
+            return None
+
+        timeframe, merged_df = self.chart_pipeline.merged_data(symbol, show_hourly_chart)
+        if self.store is not None:
+            self.store.put(symbol, timeframe, merged_df)
+        bars = merged_df[merged_df['Close'].notna()]
+        candle_time = pd.Timestamp(candle_open, unit='s')
+        if bars.empty or bars.index[bars.index <= candle_time].max() != candle_time:
+            # the closed candle is not published yet, try again on the next poll
+            print(f"Candle {candle_time} of {symbol} not available yet")
+            return None
+        self.last_checked = checked
+
+        bar = bars.loc[candle_time]
+        signal = band_signal(bar)
+        self.state.update_signal(last_candle=str(candle_time))
+        if signal is None:
+            return None
+        band = bar['lower_band'] if signal == 'buy' else bar['upper_band']
+        print(f"{symbol} {timeframe} candle {candle_time} closed at {bar['Close']}, {signal} signal against the band at {band}")
+        # the controller posts in the background and skips a signal the bot already followed
+        reason = None
+        try:
+            if signal == 'buy':
+                dispatched = self.bot_controller.start_bot(settings['buy_message'])
+            else:
+                dispatched = self.bot_controller.stop_bot(settings['sell_message'])
+        except ValueError as e:
+            # e.g. no message was saved for this signal
+            status, reason = 'invalid', str(e)
+            print(f"Not sending the {signal} signal: {reason}")
+        else:
+            status = 'sent' if dispatched is not None else 'suppressed'
+        last_signal = {'signal': signal, 'symbol': symbol, 'timeframe': timeframe, 'candle': str(candle_time),
+                       'close': float(bar['Close']), 'band': float(band), 'time': now, 'status': status, 'reason': reason}
+        self.state.update_signal(last_signal=last_signal)
+        return last_signal
@@ -0,0 +1,150 @@
+import json
+import os
+import pickle
+import threading
+from contextlib import contextmanager
+
+try:
+    # an advisory lock on a file next to the state, shared by every process on this machine
+    import fcntl
+except ImportError:
+    # Windows, where the updates are only serialized within a process
+    fcntl = None
+
+class AutotradeState:
+    """
+    The autotrade settings and signals shared by the dashboard and the signal daemon.
+
+    The state is kept in two JSON files, so the page and the daemon never overwrite what
+    the other just wrote: the Market Watch page writes the settings (whether autotrade is
+    on, the timeframe and the bot messages) and the signal daemon writes the signal it last
+    evaluated and its heartbeat. Every update reads, changes and writes its file under a
+    lock on a `.lock` file next to it, so two server workers, or the dashboard and a daemon
+    running on its own, never lose each other's update. Every write replaces its file
+    atomically, so a reader never sees half a file.
+
+    Attributes:
+    -----------
+    settings_path : str
+        The path of the settings file.
+    signal_path : str
+        The path of the signal file.
+    """
+    SETTINGS_DEFAULTS = {'autotrade_on': False, 'symbol': 'BTC-USDC', 'show_hourly_chart': False,
+                         'buy_message': '', 'sell_message': ''}
+    SIGNAL_DEFAULTS = {'last_signal': None, 'last_candle': None, 'heartbeat': None}
+    # the bot messages were pickled here before the settings file existed
+    LEGACY_MESSAGES_PATH = 'data/trade_messages.pickle'
+
+    def __init__(self, settings_path='data/autotrade_settings.json', signal_path='data/autotrade_signal.json'):
+        """
+        Initializes the state for two files, each created on its first update.
+
+        Parameters:
+        -----------
+        settings_path : str, optional
+            The path of the settings file (default is 'data/autotrade_settings.json').
+        signal_path : str, optional
+            The path of the signal file (default is 'data/autotrade_signal.json').
+        """
+        self.settings_path = settings_path
+        self.signal_path = signal_path
+        self.lock = threading.Lock()
+
+    def settings(self):
+        """
+        Returns the autotrade settings, with the defaults filled in for anything not written yet.
+        """
+        settings = dict(self.SETTINGS_DEFAULTS)
+        if not os.path.exists(self.settings_path):
+            settings.update(self._legacy_messages())
+        settings.update(self._read(self.settings_path))
+        return settings
+
+    def update_settings(self, **fields):
+        """
+        Updates some of the settings, e.g. update_settings(autotrade_on=True), and returns them.
+        """
+        with self._locked(self.settings_path):
+            settings = self.settings()
+            settings.update(fields)
+            self._write(self.settings_path, settings)
+        return settings
+
+    def toggle_setting(self, name, **fields):
+        """
+        Flips a boolean setting, e.g. toggle_setting('autotrade_on'), updating `fields` along
+        with it, and returns the settings.
+        """
+        with self._locked(self.settings_path):
+            settings = self.settings()
+            settings[name] = not settings[name]
+            settings.update(fields)
+            self._write(self.settings_path, settings)
+        return settings
+
+    def signal(self):
+        """
+        Returns the last signal the daemon evaluated, the candle it was evaluated on and the
+        daemon's heartbeat, with the defaults filled in for anything not written yet.
+        """
+        signal = dict(self.SIGNAL_DEFAULTS)
+        signal.update(self._read(self.signal_path))
+        return signal
+
+    def update_signal(self, **fields):
+        """
+        Updates some of the signal fields, e.g. update_signal(heartbeat=time.time()), and returns them.
+        """
+        with self._locked(self.signal_path):
+            signal = self.signal()
+            signal.update(fields)
+            self._write(self.signal_path, signal)
+        return signal
+
+    @contextmanager
+    def _locked(self, path):
+        # the thread lock alone serializes the updates where there is no fcntl
+        with self.lock:
+            if fcntl is None:
+                yield
+                return
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            with open(f'{path}.lock', 'w') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _read(path):
+        try:
+            with open(path, 'r') as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            print(f"Error reading the autotrade state {path}: {e}")
+            return {}
+
+    @staticmethod
+    def _write(path, data):
+        # write a temporary file and swap it in, so readers never see half a file
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w') as file:
+            json.dump(data, file, indent=2, default=str)
+        os.replace(tmp_path, path)
+
+    def _legacy_messages(self):
+        # carry the messages saved by older versions over to the settings file
+        if not os.path.exists(self.LEGACY_MESSAGES_PATH):
+            return {}
+        try:
+            with open(self.LEGACY_MESSAGES_PATH, 'rb') as file:
+                trade_messages = pickle.load(file)
+        except Exception as e:
+            print(f"Error reading {self.LEGACY_MESSAGES_PATH}: {e}")
+            return {}
+        return {'buy_message': trade_messages.get('buy_message', ''), 'sell_message': trade_messages.get('sell_message', '')}
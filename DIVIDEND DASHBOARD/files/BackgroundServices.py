@@ -0,0 +1,46 @@
+import threading
+
+class BackgroundServices:
+    """
+    The long running work of the dashboard, such as the forecast scheduler and the MT4 file
+    watcher, registered by the pages while they are imported and started separately.
+
+    Importing the app never starts anything, so a multi-worker server can import it once
+    before forking and start the services in a single worker, and the processes spawned
+    by the forecast scheduler can import the pages without starting them again.
+    """
+    def __init__(self):
+        self.services = {}
+        self.started = False
+        self.lock = threading.Lock()
+
+    def register(self, name, start):
+        """
+        Registers a service.
+
+        Args:
+            name (str): The service name, registering a name again replaces the service.
+            start (callable): Starts the service, called without arguments.
+        """
+        with self.lock:
+            self.services[name] = start
+
+    def start(self):
+        """
+        Starts every registered service once per process.
+
+        Returns:
+            bool: False if the services were already started.
+        """
+        with self.lock:
+            if self.started:
+                return False
+            self.started = True
+            services = list(self.services.items())
+        for name, start in services:
+            print(f"Starting background service: {name}")
+            start()
+        return True
+
+# the background services of this process, registered by the pages
+background_services = BackgroundServices()
@@ -0,0 +1,205 @@
+import time
+import numpy as np
+import pandas as pd
+
+class BandForecastEngine:
+    """
+    A fast NumPy alternative to Prophet for the band forecasts the dashboard draws.
+
+    Each series is modelled like Prophet does: a piecewise-linear trend with changepoints
+    spread over the first `changepoint_range` of the history, plus Fourier terms for the
+    yearly, weekly and daily seasonalities the history is long and dense enough to show.
+    Instead of a Stan optimization the model is a ridge regression, and every series that
+    shares the same dates is solved in one batched least squares call. The uncertainty
+    bands are the residual quantiles matching Prophet's default 80% interval.
+
+    The output has the 'ds', 'yhat', 'yhat_lower', 'yhat_upper' and 'trend' columns of a
+    Prophet forecast, so it feeds DataProcessor.process_prophet_forecast unchanged.
+    """
+    def __init__(self, n_changepoints=25, changepoint_range=0.8, changepoint_penalty=10.0,
+                 seasonality_penalty=0.1, yearly_order=10, weekly_order=3, daily_order=4, interval_width=0.8):
+        """
+        Args:
+            n_changepoints (int): The number of potential trend changepoints.
+            changepoint_range (float): The share of the history changepoints are placed in.
+            changepoint_penalty (float): Ridge penalty on the trend changes, higher is stiffer.
+            seasonality_penalty (float): Ridge penalty on the Fourier terms.
+            yearly_order (int): Fourier order of the yearly seasonality.
+            weekly_order (int): Fourier order of the weekly seasonality.
+            daily_order (int): Fourier order of the daily seasonality.
+            interval_width (float): The width of the uncertainty band.
+        """
+        self.n_changepoints = n_changepoints
+        self.changepoint_range = changepoint_range
+        self.changepoint_penalty = changepoint_penalty
+        self.seasonality_penalty = seasonality_penalty
+        self.yearly_order = yearly_order
+        self.weekly_order = weekly_order
+        self.daily_order = daily_order
+        self.interval_width = interval_width
+
+    def params(self):
+        """
+        Returns the engine settings, for use in forecast cache keys.
+        """
+        return dict(vars(self))
+
+    def forecast(self, data, period=90, freq='D'):
+        """
+        Forecasts one series.
+
+        Args:
+            data (DataFrame): A DataFrame with 'ds' and 'y' columns, as prepared for Prophet.
+            period (int): The number of periods to forecast forward.
+            freq (str): The frequency of the forecast dates.
+
+        Returns:
+            DataFrame: The history and future dates with 'yhat', 'yhat_lower', 'yhat_upper' and 'trend'.
+        """
+        return self.forecast_many({None: data}, period, freq)[None]
+
+    def forecast_many(self, series, period=90, freq='D'):
+        """
+        Forecasts many series, solving all series with the same dates in one batch.
+
+        Args:
+            series (dict): A dictionary mapping each name to a DataFrame with 'ds' and 'y' columns.
+            period (int): The number of periods to forecast forward.
+            freq (str): The frequency of the forecast dates.
+
+        Returns:
+            dict: A dictionary mapping each name to its forecast DataFrame.
+        """
+        # group the series by their dates so each group shares one design matrix
+        groups = {}
+        for name, data in series.items():
+            data = data.dropna(subset=['y'])
+            ds = pd.DatetimeIndex(data['ds'])
+            groups.setdefault(tuple(ds.asi8), (ds, []))[1].append((name, data['y'].to_numpy(dtype=float)))
+
+        forecasts = {}
+        for ds, members in groups.values():
+            names = [name for name, _ in members]
+            y = np.column_stack([values for _, values in members])
+            forecasts.update(zip(names, self._fit_group(ds, y, period, freq)))
+        return forecasts
+
+    def _fit_group(self, ds, y, period, freq):
+        # forecast every column of y, all observed on the dates ds
+        future_ds = ds.append(pd.date_range(ds[-1], periods=period + 1, freq=freq)[1:])
+        history_days = (ds - ds[0]) / pd.Timedelta(days=1)
+        all_days = (future_ds - ds[0]) / pd.Timedelta(days=1)
+        span = history_days[-1] if history_days[-1] > 0 else 1.0
+
+        changepoints = self._changepoints(history_days.to_numpy() / span)
+        seasonalities = self._seasonalities(ds)
+        X_all, n_trend = self._design(all_days.to_numpy(), span, changepoints, seasonalities)
+        X = X_all[:len(ds)]
+
+        # scale each series by its largest absolute value, like Prophet does
+        scale = np.abs(y).max(axis=0)
+        scale[scale == 0] = 1.0
+        y_scaled = y / scale
+
+        # ridge regression for every series at once: (X'X + P) B = X'Y
+        penalty = np.zeros(X.shape[1])
+        penalty[2:n_trend] = self.changepoint_penalty
+        penalty[n_trend:] = self.seasonality_penalty
+        coefficients = np.linalg.solve(X.T @ X + np.diag(penalty), X.T @ y_scaled)
+
+        yhat = X_all @ coefficients * scale
+        trend = X_all[:, :n_trend] @ coefficients[:n_trend] * scale
+
+        # residual quantiles give the band around yhat
+        residuals = y - yhat[:len(ds)]
+        tail = (1 - self.interval_width) / 2
+        lower_offset, upper_offset = np.quantile(residuals, [tail, 1 - tail], axis=0)
+
+        return [
+            pd.DataFrame({
+                'ds': future_ds,
+                'trend': trend[:, i],
+                'yhat_lower': yhat[:, i] + lower_offset[i],
+                'yhat_upper': yhat[:, i] + upper_offset[i],
+                'yhat': yhat[:, i],
+            })
+            for i in range(y.shape[1])
+        ]
+
+    def _changepoints(self, t_scaled):
+        # evenly spaced over the first changepoint_range of the history, like Prophet
+        n_history = int(np.floor(len(t_scaled) * self.changepoint_range))
+        n_changepoints = min(self.n_changepoints, max(n_history - 1, 0))
+        if n_changepoints == 0:
+            return np.array([])
+        positions = np.linspace(0, n_history - 1, n_changepoints + 1).round().astype(int)[1:]
+        return t_scaled[positions]
+
+    def _seasonalities(self, ds):
+        # enable each seasonality under the same rules as Prophet's automatic detection
+        span = ds[-1] - ds[0]
+        spacing = pd.Series(ds).diff().min() if len(ds) > 1 else pd.Timedelta(days=1)
+        seasonalities = []
+        if span >= pd.Timedelta(days=730) and self.yearly_order:
+            seasonalities.append((365.25, self.yearly_order))
+        if spacing < pd.Timedelta(weeks=1) and span >= pd.Timedelta(weeks=2) and self.weekly_order:
+            seasonalities.append((7.0, self.weekly_order))
+        if spacing < pd.Timedelta(days=1) and span >= pd.Timedelta(days=2) and self.daily_order:
+            seasonalities.append((1.0, self.daily_order))
+        return seasonalities
+
+    @staticmethod
+    def _design(days, span, changepoints, seasonalities):
+        # intercept, slope and changepoint hinges first, then the Fourier terms
+        t_scaled = days / span
+        columns = [np.ones_like(t_scaled), t_scaled]
+        if len(changepoints):
+            columns.append(np.maximum(0.0, t_scaled[:, None] - changepoints[None, :]))
+        n_trend = 2 + len(changepoints)
+        for seasonal_period, order in seasonalities:
+            angles = 2 * np.pi * np.arange(1, order + 1)[None, :] * days[:, None] / seasonal_period
+            columns.extend([np.sin(angles), np.cos(angles)])
+        return np.column_stack(columns), n_trend
+
+    def compare_with_prophet(self, data, period=90, freq='D', holdout=None):
+        """
+        Compares this engine with Prophet on the same series.
+
+        Both models are fitted on the series minus its last `holdout` points and scored on
+        those points.
+
+        Args:
+            data (DataFrame): A DataFrame with 'ds' and 'y' columns, as prepared for Prophet.
+            period (int): The number of periods each model forecasts forward.
+            freq (str): The frequency of the forecast dates.
+            holdout (int): The number of trailing points held out for scoring, `period` if None.
+
+        Returns:
+            dict: For each engine the fit seconds, the mean absolute error and the mean absolute
+                  percentage error on the held out points, and the share of them inside the band,
+                  plus the mean absolute difference between the two yhat lines.
+        """
+        from files.ForecastProcessor import ForecastProcessor
+
+        holdout = holdout or period
+        train, test = data.iloc[:-holdout], data.iloc[-holdout:]
+        results = {}
+        forecasts = {}
+        for name, fit in [('band', lambda: self.forecast(train, period, freq)),
+                          ('prophet', lambda: ForecastProcessor.prophet_forecast(train, period=period, freq=freq))]:
+            start = time.perf_counter()
+            forecast = fit()
+            fit_seconds = time.perf_counter() - start
+            scored = test.merge(forecast, on='ds', how='inner')
+            error = scored['y'] - scored['yhat']
+            inside = (scored['y'] >= scored['yhat_lower']) & (scored['y'] <= scored['yhat_upper'])
+            results[name] = {
+                'fit_seconds': fit_seconds,
+                'mae': float(error.abs().mean()),
+                'mape': float((error / scored['y']).abs().mean() * 100),
+                'coverage': float(inside.mean()),
+            }
+            forecasts[name] = forecast.set_index('ds')['yhat']
+        results['yhat_mean_abs_diff'] = float((forecasts['band'] - forecasts['prophet']).abs().mean())
+        results['speedup'] = results['prophet']['fit_seconds'] / max(results['band']['fit_seconds'], 1e-9)
+        return results
@@ -0,0 +1,167 @@
+import json
+import os
+import re
+import threading
+import time
+import pandas as pd
+
+
+class BarCache:
+    """
+    A persistent per-symbol/per-interval store of OHLC bars.
+
+    Bars are kept as one Parquet file per symbol and interval under `cache_dir`, next to a
+    small JSON sidecar that records the earliest date the store is known to cover and when
+    it was last refreshed. Callers load the stored history, ask for only the bars after
+    the last stored timestamp, and write the merged result back.
+
+    Attributes:
+    -----------
+    cache_dir : str
+        The directory where the bar files are stored.
+    max_age : int
+        Number of seconds a stored series is considered fresh enough to serve without
+        asking the data source for new bars.
+    """
+    # yfinance period strings mapped to the offset they cover
+    PERIOD_OFFSETS = {
+        'd': lambda n: pd.DateOffset(days=n),
+        'wk': lambda n: pd.DateOffset(weeks=n),
+        'mo': lambda n: pd.DateOffset(months=n),
+        'y': lambda n: pd.DateOffset(years=n),
+    }
+
+    def __init__(self, cache_dir='data/cache/bars', max_age=5*60):
+        """
+        Initializes the BarCache and creates the cache directory if needed.
+
+        Parameters:
+        -----------
+        cache_dir : str, optional
+            The directory where the bar files are stored (default is 'data/cache/bars').
+        max_age : int, optional
+            Seconds a stored series is served without a delta request (default is 5 minutes).
+        """
+        self.cache_dir = cache_dir
+        self.max_age = max_age
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _base_name(self, symbol, interval):
+        # keep the file names safe for symbols like ^VIX, CL=F or S&P500e
+        safe_symbol = re.sub(r'[^A-Za-z0-9._-]', '_', symbol)
+        return os.path.join(self.cache_dir, f'{safe_symbol}_{interval}')
+
+    def _read_meta(self, symbol, interval):
+        meta_path = self._base_name(symbol, interval) + '.json'
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path, 'r') as file:
+            return json.load(file)
+
+    @classmethod
+    def period_start(cls, period, now=None):
+        """
+        Converts a yfinance period string into the first timestamp the period covers.
+
+        Parameters:
+        -----------
+        period : str
+            A yfinance period such as '5d', '3mo', '2y', 'ytd' or 'max'.
+        now : pandas.Timestamp, optional
+            The reference time (default is the current time).
+
+        Returns:
+        --------
+        pandas.Timestamp or None
+            The start of the period, or None for 'max'.
+        """
+        now = now or pd.Timestamp.now().normalize()
+        if period == 'max':
+            return None
+        if period == 'ytd':
+            return pd.Timestamp(year=now.year, month=1, day=1)
+        match = re.fullmatch(r'(\d+)(d|wk|mo|y)', period)
+        if not match:
+            raise ValueError(f"Unsupported period '{period}'.")
+        count, unit = match.groups()
+        return now - cls.PERIOD_OFFSETS[unit](int(count))
+
+    def load(self, symbol, interval):
+        """
+        Loads the stored bars and their metadata for a symbol and interval.
+
+        Returns:
+        --------
+        tuple
+            (DataFrame or None, dict or None) - the stored bars and the sidecar metadata.
+        """
+        base_name = self._base_name(symbol, interval)
+        meta = self._read_meta(symbol, interval)
+        if meta is None or not os.path.exists(base_name + '.parquet'):
+            return None, None
+        try:
+            bars = pd.read_parquet(base_name + '.parquet')
+        except Exception as e:
+            # a half written or corrupt file is treated like a cache miss
+            print(f"Error reading cached bars for {symbol} {interval}: {e}")
+            return None, None
+        return bars, meta
+
+    def is_fresh(self, meta):
+        """
+        Returns True if the stored series was refreshed less than `max_age` seconds ago.
+        """
+        return meta is not None and time.time() - meta['refreshed_at'] < self.max_age
+
+    def covers(self, meta, start):
+        """
+        Returns True if the stored series reaches back at least to `start`.
+        """
+        if meta is None:
+            return False
+        if meta['start'] is None:
+            return True
+        return start is not None and pd.Timestamp(meta['start']) <= start
+
+    def save(self, symbol, interval, bars, start):
+        """
+        Writes the bars and the covered start date for a symbol and interval.
+
+        The Parquet file is written to a temporary path first and moved into place so that
+        a concurrent reader never sees a partial file.
+        """
+        base_name = self._base_name(symbol, interval)
+        # unique temporary names so concurrent writers never share a file
+        tmp_suffix = f'.{os.getpid()}.{threading.get_ident()}.tmp'
+        bars.to_parquet(base_name + '.parquet' + tmp_suffix)
+        os.replace(base_name + '.parquet' + tmp_suffix, base_name + '.parquet')
+        meta = {'start': None if start is None else str(start), 'refreshed_at': time.time()}
+        with open(base_name + '.json' + tmp_suffix, 'w') as file:
+            json.dump(meta, file)
+        os.replace(base_name + '.json' + tmp_suffix, base_name + '.json')
+
+    @staticmethod
+    def merge(cached, new_bars):
+        """
+        Appends newly fetched bars to the stored bars.
+
+        The last stored bar is usually still forming when it is saved, so rows from
+        `new_bars` replace stored rows with the same timestamp.
+        """
+        if new_bars is None or new_bars.empty:
+            return cached
+        merged = pd.concat([cached, new_bars])
+        merged = merged[~merged.index.duplicated(keep='last')]
+        return merged.sort_index()
+
+    @staticmethod
+    def slice_period(bars, start):
+        """
+        Returns only the bars on or after `start` (all bars when start is None).
+        """
+        if start is None:
+            return bars
+        # intraday bars come back timezone aware, daily bars do not
+        if bars.index.tz is not None and start.tz is None:
+            start = start.tz_localize(bars.index.tz)
+        return bars[bars.index >= start]
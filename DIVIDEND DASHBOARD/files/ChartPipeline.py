@@ -0,0 +1,145 @@
+from files.StockDataFetcher import StockDataFetcher
+from files.CryptoDataFetcher import CryptoDataFetcher
+from files.MT4DataFetcher import MT4DataFetcher
+from files.ForecastProcessor import ForecastProcessor
+from files.ForecastCache import ForecastCache
+from files.DataProcessor import DataProcessor
+from files.Metrics import metrics
+
+class ChartPipeline:
+    """
+    Builds the merged bars and forecast frame behind a Market Watch chart.
+
+    The crypto, MT4 and stock paths each fetch the bars for a symbol, forecast them with
+    the chosen engine (reusing the cached forecast when no new bar has arrived) and merge the two,
+    without importing any Dash page, so the pipeline can also run in worker processes.
+    """
+    def __init__(self, crypto_tickers, mt4_symbols, forecast_cache=None, engine='prophet'):
+        """
+        Initializes the pipeline and the data fetchers it uses.
+
+        Args:
+            crypto_tickers (list): Symbols fetched from KuCoin.
+            mt4_symbols (list): Symbols read from the MT4 CSV files.
+            forecast_cache (ForecastCache): The forecast cache to use, a default one if None.
+            engine (str): The forecast engine, 'prophet' or 'band'.
+        """
+        self.crypto_tickers = crypto_tickers
+        self.mt4_symbols = mt4_symbols
+        self.stock_data_fetcher = StockDataFetcher()
+        self.crypto_data_fetcher = CryptoDataFetcher()
+        self.mt4_data_fetcher = MT4DataFetcher()
+        self.forecast_cache = forecast_cache or ForecastCache()
+        self.engine = engine
+
+    def timeframe_for(self, symbol, show_hourly_chart=False):
+        """
+        Returns the timeframe a symbol is charted at: '1hour' or '1day' for crypto, 'Daily' otherwise.
+        """
+        if symbol in self.crypto_tickers:
+            return '1hour' if show_hourly_chart else '1day'
+        return 'Daily'
+
+    def get_processed_forecast(self, symbol, timeframe, data, period=90, freq='D'):
+        """
+        Returns the processed forecast for a series, fitting the model only on a cache miss.
+
+        Args:
+            symbol (str): The symbol the series belongs to.
+            timeframe (str): The chart timeframe the series was fetched for.
+            data (DataFrame): The OHLC bars indexed by Date.
+            period (int): The number of periods to forecast forward.
+            freq (str): The forecast frequency.
+
+        Returns:
+            DataFrame: The forecast as returned by DataProcessor.process_prophet_forecast.
+        """
+        key = ForecastCache.make_key(symbol, timeframe, data, period, freq, params=ForecastProcessor.forecast_engine_params(self.engine))
+        processed_forecast = self.forecast_cache.get(key)
+        if processed_forecast is None:
+            # prepare the data for prophet
+            with metrics.span('chart_stage_seconds', stage='prepare'):
+                prep_data = DataProcessor.prepare_data_for_prophet(data)
+            # forecast the data, starting a Prophet fit from the previous parameters of this chart
+            with metrics.span('chart_stage_seconds', stage='forecast', engine=self.engine):
+                forecast = ForecastProcessor.forecast(prep_data, period=period, freq=freq, engine=self.engine,
+                                                      warm_start_key=f'{symbol}_{timeframe}')
+            # process the forecasted data
+            with metrics.span('chart_stage_seconds', stage='process'):
+                processed_forecast = DataProcessor.process_prophet_forecast(forecast)
+            self.forecast_cache.put(key, processed_forecast)
+        return processed_forecast
+
+    def fetch_stock_data(self, symbol):
+        print('\nprocessing daily stock', symbol)
+        # set the ticker
+        self.stock_data_fetcher.set_ticker(symbol)
+        # fetch the data
+        return self.stock_data_fetcher.fetch_data()
+
+    def fetch_crypto_data(self, symbol, timeframe):
+        print(f'\nprocessing {timeframe} crypto', symbol)
+        # Choose the appropriate period based on the timeframe
+        period = '1hour' if timeframe == '1hour' else '1day'
+        # set the symbol
+        self.crypto_data_fetcher.set_symbol(symbol)
+        # fetch the data
+        return self.crypto_data_fetcher.fetch_data(period=period)
+
+    def fetch_mt4_data(self, symbol):
+        print('\nprocessing mt4', symbol)
+        # set the symbol
+        self.mt4_data_fetcher.set_symbol(symbol)
+        # fetch the data
+        return self.mt4_data_fetcher.fetch_data()
+
+    def merged_data(self, symbol, show_hourly_chart=False):
+        """
+        Fetches, forecasts and merges the data for a symbol.
+
+        Args:
+            symbol (str): The symbol to chart.
+            show_hourly_chart (bool): Use hourly bars for crypto symbols.
+
+        Returns:
+            tuple: (timeframe, DataFrame) - the chart timeframe and the merged bars and forecast.
+        """
+        timeframe = self.timeframe_for(symbol, show_hourly_chart)
+        freq = 'D'
+        if symbol in self.crypto_tickers:
+            with metrics.span('chart_stage_seconds', stage='download', source='crypto'):
+                data = self.fetch_crypto_data(symbol, timeframe)
+            freq = 'H' if timeframe == '1hour' else 'D'
+        elif symbol in self.mt4_symbols:
+            with metrics.span('chart_stage_seconds', stage='download', source='mt4'):
+                data = self.fetch_mt4_data(symbol)
+        else:
+            with metrics.span('chart_stage_seconds', stage='download', source='stock'):
+                data = self.fetch_stock_data(symbol)
+        # forecast the data, reusing the cached forecast if no new bar has arrived
+        processed_forecast = self.get_processed_forecast(symbol, timeframe, data, freq=freq)
+        # merge the dataframes
+        with metrics.span('chart_stage_seconds', stage='merge'):
+            return timeframe, DataProcessor.merge_dataframes_for_prophet(data, processed_forecast)
+
+# one pipeline per worker process, created on its first job
+_worker_pipeline = None
+
+def compute_merged_data(crypto_tickers, mt4_symbols, symbol, show_hourly_chart=False, engine='prophet'):
+    """
+    Runs ChartPipeline.merged_data in a worker process, reusing the process's pipeline.
+
+    Args:
+        crypto_tickers (list): Symbols fetched from KuCoin.
+        mt4_symbols (list): Symbols read from the MT4 CSV files.
+        symbol (str): The symbol to chart.
+        show_hourly_chart (bool): Use hourly bars for crypto symbols.
+        engine (str): The forecast engine, 'prophet' or 'band'.
+
+    Returns:
+        tuple: (timeframe, DataFrame) as returned by ChartPipeline.merged_data.
+    """
+    global _worker_pipeline
+    if _worker_pipeline is None:
+        _worker_pipeline = ChartPipeline(crypto_tickers, mt4_symbols, engine=engine)
+    return _worker_pipeline.merged_data(symbol, show_hourly_chart)
@@ -1,16 +1,65 @@
 import requests
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from requests.adapters import HTTPAdapter
 import pandas as pd
+from files.Metrics import metrics
+
+class RateLimiter:
+    """
+    A thread safe sliding window rate limiter.
+
+    :param max_calls: The number of calls allowed in each window.
+    :param period: The length of the window in seconds.
+    """
+    def __init__(self, max_calls, period):
+        self.max_calls = max_calls
+        self.period = period
+        self.calls = deque()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Blocks until another call fits in the current window, then records it.
+        """
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                # forget the calls that have left the window
+                while self.calls and now - self.calls[0] >= self.period:
+                    self.calls.popleft()
+                if len(self.calls) < self.max_calls:
+                    self.calls.append(now)
+                    return
+                wait = self.period - (now - self.calls[0])
+            time.sleep(wait)
 
 class CryptoDataFetcher:
-    def __init__(self):
+    # KuCoin returns at most 1500 candles per /market/candles request
+    MAX_CANDLES_PER_REQUEST = 1500
+    # length of each candle type in seconds
+    CANDLE_SECONDS = {'1min': 60, '3min': 180, '5min': 300, '15min': 900, '30min': 1800,
+                      '1hour': 3600, '2hour': 7200, '4hour': 14400, '6hour': 21600, '8hour': 28800,
+                      '12hour': 43200, '1day': 86400, '1week': 604800}
+    # note VIP0 is 2000 requests per 30 seconds, shared by every fetcher in the process
+    RATE_LIMITER = RateLimiter(max_calls=2000, period=30)
+
+    def __init__(self, max_workers=8):
         self.symbol = None
+        self.max_workers = max_workers
+        # pooled session so concurrent pages reuse their connections
+        self.session = requests.Session()
+        self.session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=max_workers))
+        # time every request the session makes
+        self.session.hooks['response'].append(metrics.http_response_hook)
 
     def set_symbol(self, symbol):
         self.symbol = symbol
 
     def fetch_data(self, period='1day'):
-        # note VIP0 is 2000 requests per 30 seconds
         # Type of candlestick patterns: 1min, 3min, 5min, 15min, 30min, 1hour, 2hour, 4hour, 6hour, 8hour, 12hour, 1day, 1week
         # check if symbol is set
         if not self.symbol:
@@ -19,18 +68,63 @@ class CryptoDataFetcher:
         start_date = datetime.now() - timedelta(days=730)
         end_date = datetime.now()
 
-        url = f'https://api.kucoin.com/api/v1/market/candles?type={period}&symbol={self.symbol}&startAt={int(start_date.timestamp())}&endAt={int(end_date.timestamp())}'
-
         try:
-            response = requests.get(url)
-            response.raise_for_status()
-            data = response.json()
-            df = pd.DataFrame(data['data'], columns=['Date', 'Open', 'Close', 'High', 'Low', 'Volume', 'Turnover'])
-            df['Date'] = pd.to_datetime(df['Date'], unit='s')
+            # split the window into pages KuCoin can answer in full and fetch them concurrently
+            pages = self._page_windows(int(start_date.timestamp()), int(end_date.timestamp()), period)
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(pages))) as executor:
+                candles = [row for page in executor.map(lambda window: self._fetch_page(period, *window), pages) for row in page]
+            df = pd.DataFrame(candles, columns=['Date', 'Open', 'Close', 'High', 'Low', 'Volume', 'Turnover'])
+            df['Date'] = pd.to_datetime(df['Date'].astype(int), unit='s')
+            # pages share their boundary candle, keep one copy of each
+            df = df.drop_duplicates(subset='Date', keep='last')
             df.set_index('Date', inplace=True)
             df = df.astype(float).sort_index(ascending=True)[['Open', 'High', 'Low', 'Close']]
             return df
         except requests.RequestException as e:
             # Handle different types of exceptions appropriately here
             print(f"Error fetching data: {e}")
-            return None
\ No newline at end of file
+            return None
+
+    def _page_windows(self, start_at, end_at, period):
+        """
+        Splits [start_at, end_at] into (startAt, endAt) windows of at most MAX_CANDLES_PER_REQUEST candles.
+        """
+        page_seconds = self.CANDLE_SECONDS[period] * self.MAX_CANDLES_PER_REQUEST
+        return [(page_start, min(page_start + page_seconds, end_at)) for page_start in range(start_at, end_at, page_seconds)]
+
+    def _fetch_page(self, period, start_at, end_at, retries=3):
+        """
+        Fetches the raw candles of one page, backing off when KuCoin reports the rate limit.
+        """
+        url = f'https://api.kucoin.com/api/v1/market/candles?type={period}&symbol={self.symbol}&startAt={start_at}&endAt={end_at}'
+        for attempt in range(retries):
+            self.RATE_LIMITER.acquire()
+            response = self.session.get(url, timeout=10)
+            # KuCoin reports the rate limit as HTTP 429 with code 429000, back off before raising on the status
+            if response.status_code == 429 or self._error_code(response) == '429000':
+                if attempt < retries - 1:
+                    time.sleep(self._retry_after(response, attempt))
+                continue
+            response.raise_for_status()
+            data = response.json()
+            if data.get('code') == '200000':
+                return data['data']
+            raise requests.RequestException(f"KuCoin error {data.get('code')}: {data.get('msg')}")
+        raise requests.RequestException(f"KuCoin rate limit still exceeded after {retries} attempts")
+
+    @staticmethod
+    def _error_code(response):
+        # the KuCoin code of an error response, None if the body is not JSON
+        try:
+            data = response.json()
+        except ValueError:
+            return None
+        return data.get('code') if isinstance(data, dict) else None
+
+    @staticmethod
+    def _retry_after(response, attempt):
+        # seconds to wait, from the Retry-After header when KuCoin sends one
+        try:
+            return max(0.0, float(response.headers.get('Retry-After')))
+        except (TypeError, ValueError):
+            return 2 ** attempt
@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 from scipy.signal import savgol_filter
 
@@ -23,13 +24,75 @@ class DataProcessor:
         data = data.rename(columns={'Date': 'ds', 'Close': 'y'})
         return data
 
+    @staticmethod
+    def smooth_forecasts(forecast_dfs, window_length=31, polyorder=2):
+        """
+        Smooths the prediction lines of many forecasts in one vectorized pass.
+
+        The yhat, yhat_upper and yhat_lower columns of every forecast with the same length are
+        stacked into one 2-D array and filtered along the time axis with a single
+        savgol_filter call. The input frames are not modified.
+
+        Parameters:
+        forecast_dfs (dict): A dictionary mapping each name to a forecast DataFrame with 'ds',
+                             'yhat', 'yhat_lower', 'yhat_upper' and 'trend' columns.
+        window_length (int): The length of the filter window.
+        polyorder (int): The order of the polynomial fitted in each window.
+
+        Returns:
+        dict: A dictionary mapping each name to a new DataFrame with the 'ds', 'yhat',
+              'yhat_lower', 'yhat_upper' and 'trend' columns plus the smoothed
+              'predicted_price', 'upper_band' and 'lower_band' columns.
+        """
+        line_columns = ['yhat', 'yhat_upper', 'yhat_lower']
+        smoothed_columns = ['predicted_price', 'upper_band', 'lower_band']
+        # group the forecasts by length so each group stacks into one array
+        groups = {}
+        for name, forecast_df in forecast_dfs.items():
+            groups.setdefault(len(forecast_df), []).append(name)
+
+        smoothed_dfs = {}
+        for names in groups.values():
+            # rows are yhat, yhat_upper, yhat_lower of the first forecast, then of the second, ...
+            stacked = np.vstack([forecast_dfs[name][line_columns].to_numpy(dtype=float).T for name in names])
+            smoothed = savgol_filter(stacked, window_length=window_length, polyorder=polyorder, axis=-1)
+            for i, name in enumerate(names):
+                df = forecast_dfs[name][['ds', 'yhat', 'yhat_lower', 'yhat_upper', 'trend']].copy()
+                for j, column in enumerate(smoothed_columns):
+                    df[column] = smoothed[3 * i + j]
+                smoothed_dfs[name] = df
+        return smoothed_dfs
+
+    @staticmethod
+    def process_prophet_forecasts(forecast_dfs):
+        """
+        Processes many forecast DataFrames at once, smoothing them in one vectorized pass.
+
+        Parameters:
+        forecast_dfs (dict): A dictionary mapping each name to a forecast DataFrame from the
+                             Prophet model or the band engine.
+
+        Returns:
+        dict: A dictionary mapping each name to its processed forecast, as returned by
+              process_prophet_forecast.
+        """
+        smoothed_dfs = DataProcessor.smooth_forecasts(forecast_dfs)
+        processed_dfs = {}
+        for name, forecast_df in smoothed_dfs.items():
+            # keep only needed columns in the forecast dataframe
+            forecast_df = forecast_df[['ds', 'predicted_price', 'lower_band', 'upper_band', 'trend']]
+            # rename the ds column to Date and set it as the index
+            processed_dfs[name] = forecast_df.rename(columns={'ds': 'Date'}).set_index('Date')
+        return processed_dfs
+
     @staticmethod
     def process_prophet_forecast(forecast_df):
         """
         Processes the forecast DataFrame obtained from the Prophet model.
 
-        This method takes the forecast DataFrame, smoothens the prediction lines using a rolling mean,
-        and keeps only relevant columns for further analysis.
+        This method takes the forecast DataFrame, smoothens the prediction lines using a
+        Savitzky-Golay filter, and keeps only relevant columns for further analysis. The input
+        DataFrame is not modified.
 
         Parameters:
         forecast_df (DataFrame): The forecast DataFrame obtained from the Prophet model.
@@ -38,10 +101,8 @@ class DataProcessor:
         DataFrame: A DataFrame with smoothed predicted prices, upper and lower confidence bands, 
                    and the trend, indexed by date.
         """
-        # use savgol_filter
-        forecast_df['predicted_price'] = savgol_filter(forecast_df['yhat'], window_length=31, polyorder=2) 
-        forecast_df['upper_band'] = savgol_filter(forecast_df['yhat_upper'], window_length=31, polyorder=2)
-        forecast_df['lower_band'] = savgol_filter(forecast_df['yhat_lower'], window_length=31, polyorder=2)
+        # smooth the prediction lines with savgol_filter
+        forecast_df = DataProcessor.smooth_forecasts({None: forecast_df})[None]
 
         # keep only needed columns in the forecast dataframe
         forecast_df = forecast_df[['ds', 'predicted_price', 'lower_band', 'upper_band', 'trend']] 
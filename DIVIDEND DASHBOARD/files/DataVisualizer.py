@@ -1,15 +1,37 @@
+import numpy as np
+import pandas as pd
 import plotly.graph_objects as go
 from datetime import datetime
 
 class DataVisualizer:
+    # the forecast lines drawn over the candles
+    LINE_COLUMNS = ['predicted_price', 'trend', 'upper_band', 'lower_band']
+
     @staticmethod
-    def create_candlestick_chart(data, symbol, timeframe, width=1500, height=890):
+    def create_candlestick_chart(data, symbol, timeframe, width=1500, height=890, max_points=None):
         """
         Creates a candlestick chart with additional predicted price and trend lines.
 
+        Args:
+            data (DataFrame): The merged bars and forecast indexed by Date.
+            symbol (str): The symbol shown in the title.
+            timeframe (str): The timeframe shown in the title.
+            width (int): The figure width in pixels.
+            height (int): The figure height in pixels.
+            max_points (int): If given, longer data is reduced to about this many candles
+                              with aggregate_ohlc and this many points per line with lttb,
+                              so the figure size no longer grows with the history length.
+
         Returns:
             fig (go.Figure): A Plotly Figure object containing the candlestick chart.
         """
+        # one x array per trace, the lines may be downsampled to different dates
+        candles = data[['Open', 'High', 'Low', 'Close']]
+        lines = {column: data[column] for column in DataVisualizer.LINE_COLUMNS}
+        if max_points is not None:
+            candles = DataVisualizer.aggregate_ohlc(candles, max_points)
+            lines = {column: DataVisualizer.downsample_line(line, max_points) for column, line in lines.items()}
+
         # Initialize a new figure instead of adding to self.fig
         fig = go.Figure()
         # clear the figure
@@ -21,40 +43,40 @@ class DataVisualizer:
         
         # Define traces
         candlestick_trace = go.Candlestick(
-            x=data.index, 
-            open=data.Open, 
-            high=data.High, 
-            low=data.Low, 
-            close=data.Close, 
+            x=candles.index, 
+            open=candles.Open, 
+            high=candles.High, 
+            low=candles.Low, 
+            close=candles.Close, 
             name='Candlestick', 
             increasing_line_color='#F6FEFF', 
             decreasing_line_color='#1CBDFB'
         )
 
         predicted_price_trace = go.Scatter(
-            x=data.index, 
-            y=data.predicted_price, 
+            x=lines['predicted_price'].index, 
+            y=lines['predicted_price'], 
             line=dict(color='#B111D6', width=1), 
             name='Predicted Price'
         )
 
         trend_trace = go.Scatter(
-            x=data.index, 
-            y=data.trend, 
+            x=lines['trend'].index, 
+            y=lines['trend'], 
             line=dict(color='#0074BA', width=1), 
             name='Predicted Trend'
         )
 
         upper_band_trace = go.Scatter(
-            x=data.index, 
-            y=data.upper_band, 
+            x=lines['upper_band'].index, 
+            y=lines['upper_band'], 
             line=dict(color='#1E82CD', width=2), 
             name='upper_band'
         )
 
         lower_band_trace = go.Scatter(
-            x=data.index, 
-            y=data.lower_band, 
+            x=lines['lower_band'].index, 
+            y=lines['lower_band'], 
             line=dict(color='#1E82CD', width=2), 
             name='lower_band'
         )
@@ -73,9 +95,91 @@ class DataVisualizer:
             annotations=[{"text": f"This graph was last generated on {timestamp}", 
                           "showarrow": False, "x": 0.55, "y": 1.05, "xref": "paper", "yref": "paper"}],
             width=width, height=height, xaxis_rangeslider_visible=False, 
+            # keep the user's zoom when the same chart is redrawn, e.g. at full resolution after a zoom
+            uirevision=f'{symbol} {timeframe}', 
             paper_bgcolor='#202123', plot_bgcolor='#202123', 
             font=dict(color='white', size=12),
             font_size=14, font_family="Rockwell", title_font_family="Rockwell", title_font_size=24
         )
 
         return fig
+
+    @staticmethod
+    def aggregate_ohlc(data, max_candles):
+        """
+        Aggregates consecutive bars into at most `max_candles` candles.
+
+        Each candle covers the same number of bars and takes the first Open, the highest High,
+        the lowest Low and the last Close of its bars, dated at its first bar. Data that
+        already has no more than `max_candles` bars is returned as is.
+
+        Args:
+            data (DataFrame): Bars with Open, High, Low and Close columns indexed by Date.
+            max_candles (int): The largest number of candles to return.
+
+        Returns:
+            DataFrame: The aggregated bars.
+        """
+        if len(data) <= max_candles:
+            return data
+        bars_per_candle = int(np.ceil(len(data) / max_candles))
+        buckets = np.arange(len(data)) // bars_per_candle
+        candles = data.groupby(buckets).agg({'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last'})
+        candles.index = data.index[::bars_per_candle]
+        return candles
+
+    @staticmethod
+    def downsample_line(line, max_points):
+        """
+        Reduces a line to at most `max_points` points with lttb, dropping missing values first.
+
+        Args:
+            line (Series): The line values indexed by Date.
+            max_points (int): The largest number of points to return.
+
+        Returns:
+            Series: The kept points of the line.
+        """
+        line = line.dropna()
+        if len(line) <= max_points:
+            return line
+        x = line.index.asi8.astype(float) if isinstance(line.index, pd.DatetimeIndex) else np.arange(len(line), dtype=float)
+        return line.iloc[DataVisualizer.lttb(x, line.to_numpy(dtype=float), max_points)]
+
+    @staticmethod
+    def lttb(x, y, threshold):
+        """
+        Picks the points of a line to keep with the Largest-Triangle-Three-Buckets algorithm.
+
+        The first and last points are always kept. The points in between are split into
+        threshold - 2 buckets and from each bucket the point forming the largest triangle
+        with the point kept from the previous bucket and the average of the next bucket is
+        kept, which preserves the peaks and troughs of the line.
+
+        Args:
+            x (ndarray): The x values, increasing.
+            y (ndarray): The y values.
+            threshold (int): The number of points to keep.
+
+        Returns:
+            ndarray: The positions of the kept points.
+        """
+        n = len(x)
+        if threshold >= n or threshold < 3:
+            return np.arange(n)
+        # bucket edges over the points between the first and the last
+        edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+        kept = np.empty(threshold, dtype=int)
+        kept[0], kept[-1] = 0, n - 1
+        previous = 0
+        for i in range(threshold - 2):
+            start, end = edges[i], edges[i + 1]
+            # the average point of the next bucket, the last point for the last bucket
+            next_start, next_end = end, edges[i + 2] if i + 2 < len(edges) else n
+            next_x, next_y = x[next_start:next_end].mean(), y[next_start:next_end].mean()
+            # twice the triangle area for every candidate in this bucket
+            areas = np.abs((x[previous] - next_x) * (y[start:end] - y[previous])
+                           - (x[previous] - x[start:end]) * (next_y - y[previous]))
+            previous = start + int(np.argmax(areas))
+            kept[i + 1] = previous
+        return kept
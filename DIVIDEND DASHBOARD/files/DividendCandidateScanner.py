@@ -0,0 +1,184 @@
+import multiprocessing
+import queue
+import time
+from prophet import Prophet
+from files.BandForecastEngine import BandForecastEngine
+from files.DataProcessor import DataProcessor
+
+def forcasting_preparation(df):
+    """
+    Resets the index of the price data and keeps only the Date and Close columns.
+    """
+    df = df.reset_index()
+    return df[['Date', 'Close']]
+
+def forecast_data(data):
+    """
+    Fits Prophet on the Date and Close columns and forecasts 90 days forward.
+    """
+    data = data.rename(columns={'Date': 'ds', 'Close': 'y'})
+    model = Prophet()
+    model.fit(data)
+    future = model.make_future_dataframe(periods=90, freq='D')
+    forecast = model.predict(future)
+    return forecast
+
+def evaluate_candidate(symbol, data):
+    """
+    Forecasts one candidate in a worker process.
+
+    Only the raw forecast columns are returned; the smoothing runs once for every
+    candidate in the parent, see DividendCandidateScanner.scan.
+
+    Args:
+        symbol (str): The ticker symbol.
+        data (DataFrame): The candidate's OHLC bars indexed by Date.
+
+    Returns:
+        DataFrame: The 'ds', 'yhat', 'yhat_lower', 'yhat_upper' and 'trend' columns of the forecast.
+    """
+    forcasting_prep = forcasting_preparation(data)
+    forecast = forecast_data(forcasting_prep)
+    return forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper', 'trend']]
+
+def is_below_lower_band(data, processed_forecast):
+    """
+    Checks whether the last close of a candidate is below the smoothed lower band on that date.
+    """
+    # check if price is less then the lower band
+    date = data.index[-1].strftime('%Y-%m-%d')
+    price = data.Close.iloc[-1]
+    lower_band = processed_forecast.query(f'ds == "{date}"')['lower_band'].values[0]
+    return price < lower_band
+
+class DividendCandidateScanner:
+    """
+    Forecasts many symbols and keeps the ones trading below their lower band.
+
+    With the 'prophet' engine evaluate_candidate runs for every symbol in a process pool.
+    The workers only fit the forecasts. Forecasts are collected as they finish, and every
+    batch that finished together is smoothed in one DataProcessor.smooth_forecasts call
+    before the lower band check, so qualifying symbols can be reported while the others
+    are still being fit. The scan gives up once no symbol has finished for `symbol_timeout`
+    seconds or after `total_timeout` seconds in all, and any fit still running when the
+    scan ends is terminated with the pool.
+
+    With the 'band' engine every symbol is forecast in the scanning process by a single
+    BandForecastEngine.forecast_many call, which solves all symbols sharing the same dates
+    in one batch, so screening hundreds of symbols takes seconds and needs no pool.
+    """
+    def __init__(self, max_workers=None, symbol_timeout=120, total_timeout=600, engine='prophet'):
+        """
+        Args:
+            max_workers (int): The number of worker processes, the number of cores if None.
+            symbol_timeout (int): Seconds to wait for the next symbol to finish.
+            total_timeout (int): Seconds the whole scan may take.
+            engine (str): The forecast engine, 'prophet' or the NumPy 'band' engine.
+        """
+        if engine not in ('prophet', 'band'):
+            raise ValueError(f"Unknown forecast engine '{engine}'. Use 'prophet' or 'band'.")
+        self.max_workers = max_workers or multiprocessing.cpu_count()
+        self.symbol_timeout = symbol_timeout
+        self.total_timeout = total_timeout
+        self.engine = engine
+        self.band_engine = BandForecastEngine()
+
+    def scan(self, price_data, on_progress=None, on_candidate=None):
+        """
+        Evaluates every candidate and returns the ones trading below their lower band.
+
+        Args:
+            price_data (dict): A dictionary mapping each symbol to its OHLC bars.
+            on_progress (callable): Optional callable taking (done, total) each time symbols
+                                    were forecast or failed.
+            on_candidate (callable): Optional callable taking (symbol, processed_forecast) as
+                                     soon as a symbol is found below its lower band.
+
+        Returns:
+            dict: A dictionary mapping each qualifying symbol to its processed forecast, in
+                  the order of `price_data`.
+        """
+        buy_list = {}
+        if not price_data:
+            return buy_list
+        if self.engine == 'band':
+            self._scan_band(price_data, buy_list, on_progress, on_candidate)
+        else:
+            self._scan_prophet(price_data, buy_list, on_progress, on_candidate)
+        return {symbol: buy_list[symbol] for symbol in price_data if symbol in buy_list}
+
+    def _scan_band(self, price_data, buy_list, on_progress, on_candidate):
+        series = {}
+        for symbol, data in price_data.items():
+            try:
+                series[symbol] = forcasting_preparation(data).rename(columns={'Date': 'ds', 'Close': 'y'})
+            except Exception as e:
+                print(f"Error evaluating {symbol}: {e}")
+        try:
+            # every symbol with the same dates is solved in one least squares call
+            forecasts = self.band_engine.forecast_many(series, period=90, freq='D')
+        except Exception as e:
+            # one unusable series fails its whole group, so fit them one by one instead
+            print(f"Error forecasting the candidates in one batch, forecasting them one by one: {e}")
+            forecasts = {}
+            for symbol, data in series.items():
+                try:
+                    forecasts[symbol] = self.band_engine.forecast(data, period=90, freq='D')
+                except Exception as e:
+                    print(f"Error evaluating {symbol}: {e}")
+        self._check_forecasts(price_data, forecasts, buy_list, on_candidate)
+        if on_progress is not None:
+            on_progress(len(price_data), len(price_data))
+
+    def _scan_prophet(self, price_data, buy_list, on_progress, on_candidate):
+        finished = queue.Queue()
+        done = 0
+        deadline = time.monotonic() + self.total_timeout
+        # spawn rather than fork so workers never inherit the web server's threads
+        context = multiprocessing.get_context('spawn')
+        with context.Pool(processes=min(self.max_workers, len(price_data))) as pool:
+            for symbol, data in price_data.items():
+                pool.apply_async(evaluate_candidate, (symbol, data),
+                                 callback=lambda forecast, symbol=symbol: finished.put((symbol, forecast, None)),
+                                 error_callback=lambda error, symbol=symbol: finished.put((symbol, None, error)))
+            while done < len(price_data):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    print(f"Scan timed out after {self.total_timeout}s, skipping the remaining symbols")
+                    break
+                try:
+                    batch = [finished.get(timeout=min(self.symbol_timeout, remaining))]
+                except queue.Empty:
+                    print(f"No symbol finished for {self.symbol_timeout}s, skipping the remaining symbols")
+                    break
+                # take everything else that finished meanwhile, to smooth it in one pass
+                while True:
+                    try:
+                        batch.append(finished.get_nowait())
+                    except queue.Empty:
+                        break
+                done += len(batch)
+
+                forecasts = {}
+                for symbol, forecast, error in batch:
+                    if error is not None:
+                        print(f"Error evaluating {symbol}: {error}")
+                    else:
+                        forecasts[symbol] = forecast
+                self._check_forecasts(price_data, forecasts, buy_list, on_candidate)
+                if on_progress is not None:
+                    on_progress(done, len(price_data))
+        # leaving the with block terminates the pool along with any fit still running
+
+    @staticmethod
+    def _check_forecasts(price_data, forecasts, buy_list, on_candidate):
+        # smooth the forecasts in one vectorized pass, then keep the ones below their lower band
+        processed_forecasts = DataProcessor.smooth_forecasts(forecasts)
+        for symbol in forecasts:
+            try:
+                if is_below_lower_band(price_data[symbol], processed_forecasts[symbol]):
+                    buy_list[symbol] = processed_forecasts[symbol]
+                    if on_candidate is not None:
+                        on_candidate(symbol, processed_forecasts[symbol])
+            except Exception as e:
+                print(f"Error evaluating {symbol}: {e}")
@@ -0,0 +1,119 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import date
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from files.Metrics import metrics
+
+class DividendDataFetcher:
+    """
+    A client for the Polygon /v3/reference/dividends endpoint.
+
+    Requests go through one pooled session that retries rate limited and failed calls,
+    every page of a query is followed through `next_url`, and the combined results are
+    kept in an on-disk cache keyed by the query parameters so repeated queries on the same
+    day are answered without a network call.
+
+    Attributes:
+    -----------
+    api_key : str
+        The Polygon API key.
+    cache_dir : str
+        The directory where cached query results are stored.
+    ttl : int
+        Number of seconds a cached query result is served before it is fetched again.
+    """
+    BASE_URL = 'https://api.polygon.io/v3/reference/dividends'
+
+    def __init__(self, api_key, cache_dir='data/cache/polygon', ttl=6*60*60):
+        """
+        Initializes the client, its pooled session and the cache directory.
+
+        Parameters:
+        -----------
+        api_key : str
+            The Polygon API key.
+        cache_dir : str, optional
+            The directory where cached query results are stored (default is 'data/cache/polygon').
+        ttl : int, optional
+            Seconds a cached query result is served (default is 6 hours).
+        """
+        self.api_key = api_key
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # retry rate limits and server errors, honouring Polygon's Retry-After header
+        retry = Retry(total=3, backoff_factor=1, status_forcelist=[429, 500, 502, 503, 504], allowed_methods=['GET'])
+        self.session = requests.Session()
+        self.session.mount('https://', HTTPAdapter(max_retries=retry))
+        # time every request the session makes
+        self.session.hooks['response'].append(metrics.http_response_hook)
+
+    def fetch_dividends(self, params, paginate=True):
+        """
+        Fetches the dividends matching the query parameters.
+
+        Parameters:
+        -----------
+        params : dict
+            The query parameters, e.g. {'ticker': 'O', 'limit': 1} or
+            {'ex_dividend_date.gt': '2024-05-01', 'limit': 1000}. The API key is added here.
+        paginate : bool, optional
+            Follow `next_url` until every page has been read (default is True). Use False for
+            queries that only want the first page, such as the latest dividend of a ticker.
+
+        Returns:
+        --------
+        pandas.DataFrame
+            A DataFrame with one row per dividend, empty if nothing matched.
+        """
+        cache_path = self._cache_path(params, paginate)
+        results = self._read_cache(cache_path)
+        metrics.cache_result('polygon', 'miss' if results is None else 'hit')
+        if results is None:
+            results = self._get_pages(params, paginate)
+            self._write_cache(cache_path, results)
+        return pd.DataFrame(results)
+
+    def _get_pages(self, params, paginate):
+        """
+        Requests the first page and, if asked to, every following page of a query.
+        """
+        response = self.session.get(self.BASE_URL, params={**params, 'apiKey': self.api_key}, timeout=15)
+        response.raise_for_status()
+        data = response.json()
+        results = data.get('results', [])
+        # next_url already carries the query, only the API key has to be added again
+        while paginate and data.get('next_url'):
+            response = self.session.get(data['next_url'], params={'apiKey': self.api_key}, timeout=15)
+            response.raise_for_status()
+            data = response.json()
+            results.extend(data.get('results', []))
+        return results
+
+    def _cache_path(self, params, paginate):
+        # key on the query and today's date so results never outlive the day they were fetched on
+        key = json.dumps({'params': params, 'paginate': paginate, 'date': str(date.today())}, sort_keys=True, default=str)
+        return os.path.join(self.cache_dir, hashlib.sha1(key.encode()).hexdigest() + '.json')
+
+    def _read_cache(self, cache_path):
+        # serve the cached results if they are younger than the ttl
+        try:
+            if time.time() - os.path.getmtime(cache_path) > self.ttl:
+                return None
+            with open(cache_path, 'r') as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def _write_cache(self, cache_path, results):
+        # write to a temporary file first so a concurrent reader never sees a partial file
+        tmp_path = f'{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w') as file:
+            json.dump(results, file)
+        os.replace(tmp_path, cache_path)
@@ -0,0 +1,106 @@
+import json
+import threading
+from collections import OrderedDict
+from files.Metrics import metrics
+
+try:
+    # orjson serializes the figure's numpy arrays natively and several times faster than json
+    import orjson
+except ImportError:
+    orjson = None
+
+class FigureCache:
+    """
+    An in-memory LRU cache of serialized chart figures, bounded by their size in bytes.
+
+    Entries are keyed by the symbol, timeframe, version, bar count and last bar of the
+    merged data a figure was drawn from, plus the view it shows, so a figure is only built
+    and serialized again once the data changed, including a forming bar whose prices moved
+    while its timestamp stayed the same. Figures are kept as compact JSON bytes
+    and handed back as plain dicts, which Dash sends to the browser without building a
+    go.Figure again.
+    """
+    def __init__(self, max_bytes=64*1024*1024):
+        """
+        Args:
+            max_bytes (int): The total size of the cached figures above which the least
+                             recently used ones are dropped.
+        """
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def make_key(symbol, timeframe, data, view=None, version=None):
+        """
+        Builds the cache key of a figure.
+
+        Args:
+            symbol (str): The charted symbol.
+            timeframe (str): The chart timeframe.
+            data (DataFrame): The merged bars and forecast the figure is drawn from.
+            view (tuple): Anything else that changes the figure, e.g. the zoomed x range.
+            version (int): The version the data was published under, if it has one.
+
+        Returns:
+            tuple: The cache key.
+        """
+        closes = data['Close']
+        last_bar = closes.last_valid_index()
+        # the forming bar keeps its timestamp while its prices move
+        last_prices = () if last_bar is None else tuple(float(data.at[last_bar, column]) for column in ('High', 'Low', 'Close'))
+        return (symbol, timeframe, version, int(closes.count()), len(data), str(last_bar), last_prices, view)
+
+    def get(self, key):
+        """
+        Returns the cached figure for a key as a dict, or None on a miss.
+        """
+        with self.lock:
+            payload = self.entries.get(key)
+            if payload is not None:
+                self.entries.move_to_end(key)
+        metrics.cache_result('figure', 'miss' if payload is None else 'hit')
+        if payload is None:
+            return None
+        return self.loads(payload)
+
+    def put(self, key, fig):
+        """
+        Serializes a figure, stores it under a key and returns it as a dict.
+
+        Args:
+            key (tuple): The key from make_key.
+            fig (go.Figure): The figure to cache.
+
+        Returns:
+            dict: The serialized figure, ready to be returned from a Dash callback.
+        """
+        with metrics.span('chart_stage_seconds', stage='serialize'):
+            payload = self.dumps(fig)
+        with self.lock:
+            previous = self.entries.pop(key, None)
+            if previous is not None:
+                self.total_bytes -= len(previous)
+            self.entries[key] = payload
+            self.total_bytes += len(payload)
+            # drop the least recently used figures, but always keep the newest one
+            while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+                _, evicted = self.entries.popitem(last=False)
+                self.total_bytes -= len(evicted)
+        return self.loads(payload)
+
+    @staticmethod
+    def dumps(fig):
+        """
+        Serializes a figure to JSON bytes, with orjson if it is installed.
+        """
+        if orjson is not None:
+            return fig.to_json(engine='orjson').encode('utf-8')
+        return fig.to_json(engine='json').encode('utf-8')
+
+    @staticmethod
+    def loads(payload):
+        if orjson is not None:
+            return orjson.loads(payload)
+        return json.loads(payload)
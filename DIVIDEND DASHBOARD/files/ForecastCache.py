@@ -0,0 +1,124 @@
+import hashlib
+import json
+import os
+import threading
+import pandas as pd
+from files.Metrics import metrics
+
+class ForecastCache:
+    """
+    An on-disk cache of processed forecast frames with size based eviction.
+
+    Entries are keyed by a fingerprint of everything that decides the forecast: the symbol,
+    timeframe, last bar timestamp and bar count of the input series, the forecast horizon,
+    the frequency and the model parameters. Each entry is one Parquet file, and when the
+    files add up to more than `max_bytes` the least recently used ones are deleted.
+
+    Attributes:
+    -----------
+    cache_dir : str
+        The directory where the forecast files are stored.
+    max_bytes : int
+        The total size the forecast files are allowed to take up.
+    """
+    def __init__(self, cache_dir='data/cache/forecasts', max_bytes=200*1024*1024):
+        """
+        Initializes the cache and creates the cache directory if needed.
+
+        Parameters:
+        -----------
+        cache_dir : str, optional
+            The directory where the forecast files are stored (default is 'data/cache/forecasts').
+        max_bytes : int, optional
+            The total size the forecast files may take up (default is 200 MB).
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(symbol, timeframe, data, period, freq, params=None):
+        """
+        Builds the cache key for forecasting a series.
+
+        Parameters:
+        -----------
+        symbol : str
+            The symbol the series belongs to.
+        timeframe : str
+            The chart timeframe, e.g. 'Daily', '1hour' or '1day'.
+        data : pandas.DataFrame
+            The input bars, indexed by date. Only the last timestamp and the row count are used.
+        period : int
+            The number of periods forecast forward.
+        freq : str
+            The forecast frequency.
+        params : dict, optional
+            The model parameters that change the forecast.
+
+        Returns:
+        --------
+        str
+            A hex digest identifying the forecast.
+        """
+        fingerprint = {
+            'symbol': symbol,
+            'timeframe': timeframe,
+            'last_bar': str(data.index[-1]),
+            'bars': len(data),
+            'period': period,
+            'freq': freq,
+            'params': params or {},
+        }
+        return hashlib.sha1(json.dumps(fingerprint, sort_keys=True, default=str).encode()).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + '.parquet')
+
+    def get(self, key):
+        """
+        Returns the cached forecast frame for a key, or None on a miss.
+        """
+        path = self._path(key)
+        try:
+            forecast_df = pd.read_parquet(path)
+        except (OSError, ValueError):
+            metrics.cache_result('forecast', 'miss')
+            return None
+        metrics.cache_result('forecast', 'hit')
+        # touch the file so eviction sees it as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return forecast_df
+
+    def put(self, key, forecast_df):
+        """
+        Stores a forecast frame under a key and evicts old entries if the cache is too large.
+        """
+        path = self._path(key)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        forecast_df.to_parquet(tmp_path)
+        os.replace(tmp_path, path)
+        self._evict()
+
+    def _evict(self):
+        # delete the least recently used files until the cache fits in max_bytes
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith('.parquet'):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
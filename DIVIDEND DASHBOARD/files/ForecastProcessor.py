@@ -1,8 +1,51 @@
+import json
+import os
+import re
+import time
 from prophet import Prophet
+from files.BandForecastEngine import BandForecastEngine
 
 class ForecastProcessor:
+    # fitted parameters of the last model per warm start key, shared by every process
+    WARM_START_DIR = 'data/cache/warm_start'
+    # fit time and optimizer iterations of the last fit per warm start key
+    fit_stats = {}
+    # the NumPy engine used when engine='band'
+    band_engine = BandForecastEngine()
+
+    @staticmethod
+    def forecast(data, period=90, freq='D', engine='prophet', warm_start_key=None):
+        """
+        Generates a forecast with the chosen engine.
+
+        Args:
+            data (DataFrame): A Pandas DataFrame with two columns: 'ds' and 'y'.
+            period (int): The number of periods to forecast forward.
+            freq (str): The frequency of the forecast.
+            engine (str): 'prophet' for a Prophet fit or 'band' for the BandForecastEngine.
+            warm_start_key (str): Passed to prophet_forecast, ignored by the band engine.
+
+        Returns:
+            DataFrame: A forecast with at least the 'ds', 'yhat', 'yhat_lower', 'yhat_upper' and
+                       'trend' columns, ready for DataProcessor.process_prophet_forecast.
+        """
+        if engine == 'band':
+            return ForecastProcessor.band_engine.forecast(data, period=period, freq=freq)
+        if engine == 'prophet':
+            return ForecastProcessor.prophet_forecast(data, period=period, freq=freq, warm_start_key=warm_start_key)
+        raise ValueError(f"Unknown forecast engine '{engine}'. Use 'prophet' or 'band'.")
+
     @staticmethod
-    def prophet_forecast(data, period=90, freq='D'):
+    def forecast_engine_params(engine='prophet'):
+        """
+        Returns the settings of an engine, for use in forecast cache keys.
+        """
+        if engine == 'band':
+            return {'model': 'band', **ForecastProcessor.band_engine.params()}
+        return {'model': engine}
+
+    @staticmethod
+    def prophet_forecast(data, period=90, freq='D', warm_start_key=None):
         """
         Generates a forecast using the Prophet model from the provided time series data.
 
@@ -16,13 +59,80 @@ class ForecastProcessor:
                         - 'W' generates weekly data points, defaulting to Sunday as the week start.
                           Use 'W-MON', 'W-TUE', 'W-WED', etc., for weeks starting on other days.
                           This flexibility aligns future data points with specific weekly cycles.
+            warm_start_key (str): Optional name of the series, e.g. 'BTC-USDC_1hour'. When given,
+                                  the fit is initialized from the parameters of the previous fit
+                                  for the same key, which usually converges in far fewer
+                                  optimizer iterations once a single new bar has been added.
+                                  The fit time and iterations are kept in `fit_stats[warm_start_key]`.
 
         Returns:
             DataFrame: A Pandas DataFrame containing the forecast. Includes the forecasted
                        values along with components like trend and uncertainty intervals.
         """
         model = Prophet()
-        model.fit(data)
+        if warm_start_key is None:
+            model.fit(data)
+        else:
+            model = ForecastProcessor._warm_start_fit(model, data, warm_start_key)
         future = model.make_future_dataframe(periods=period, freq=freq)
         forecast = model.predict(future)
         return forecast
+
+    @staticmethod
+    def _warm_start_fit(model, data, warm_start_key):
+        """
+        Fits the model starting from the stored parameters for the key and stores the new ones.
+        """
+        init = ForecastProcessor._load_warm_start(warm_start_key)
+        start = time.perf_counter()
+        # save_iterations is passed through to cmdstanpy so the iterations can be counted
+        fit_kwargs = {'save_iterations': True}
+        if init:
+            fit_kwargs['init'] = init
+        try:
+            model.fit(data, **fit_kwargs)
+        except Exception as e:
+            if not init:
+                raise
+            # the stored parameters no longer fit the model (e.g. a seasonality was added), fit cold
+            print(f"Warm start failed for {warm_start_key}, fitting from scratch: {e}")
+            init = None
+            model = Prophet()
+            model.fit(data, save_iterations=True)
+        fit_seconds = time.perf_counter() - start
+
+        try:
+            iterations = len(model.stan_backend.stan_fit.optimized_iterations_np)
+        except Exception:
+            iterations = None
+        ForecastProcessor.fit_stats[warm_start_key] = {'fit_seconds': fit_seconds, 'iterations': iterations, 'warm_start': bool(init)}
+        print(f"Prophet fit for {warm_start_key}: {fit_seconds:.2f}s, {iterations} iterations, warm start: {bool(init)}")
+
+        ForecastProcessor._save_warm_start(warm_start_key, model)
+        return model
+
+    @staticmethod
+    def _warm_start_path(warm_start_key):
+        safe_key = re.sub(r'[^A-Za-z0-9._-]', '_', warm_start_key)
+        return os.path.join(ForecastProcessor.WARM_START_DIR, safe_key + '.json')
+
+    @staticmethod
+    def _load_warm_start(warm_start_key):
+        # read the Stan init of the previous fit, None if there is none
+        try:
+            with open(ForecastProcessor._warm_start_path(warm_start_key), 'r') as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _save_warm_start(warm_start_key, model):
+        # scalars are stored as numbers and the changepoint and seasonality vectors as lists
+        init = {name: float(model.params[name][0][0]) for name in ['k', 'm', 'sigma_obs']}
+        init.update({name: model.params[name][0].tolist() for name in ['delta', 'beta']})
+        os.makedirs(ForecastProcessor.WARM_START_DIR, exist_ok=True)
+        path = ForecastProcessor._warm_start_path(warm_start_key)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w') as file:
+            json.dump(init, file)
+        os.replace(tmp_path, path)
@@ -0,0 +1,260 @@
+import heapq
+import itertools
+import json
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from files.ChartPipeline import compute_merged_data
+from files.MergedDataStore import MergedDataStore
+from files.Metrics import metrics
+
+class ForecastScheduler:
+    """
+    Precomputes the merged chart data for a watchlist in a process pool.
+
+    Every `interval` seconds each job is queued again; since the bar and forecast caches
+    only fit a new model when a new bar has arrived, a pass with no new bars is cheap.
+    Jobs are (symbol, show_hourly_chart) pairs and run in priority order, lower numbers
+    first, and the symbol on screen leads every pass. Finished frames are published to a
+    MergedDataStore under (symbol, timeframe) together with a version number that only goes
+    up when the frame actually changed, so every server worker process reads the same frames.
+    The symbol on screen is kept in a file next to the frames, so a server worker that does
+    not run the scheduler can still put its symbol first.
+    When a worker process dies, e.g. a fit killed for running out of memory, the pool is
+    replaced with a new one and the scheduler carries on.
+    """
+    PRIORITY_VIEWED = 0
+    PRIORITY_CHANGED = 1
+    PRIORITY_ROUTINE = 2
+    # the most seconds before a symbol put on screen in another process is picked up
+    VIEWED_POLL_INTERVAL = 1
+
+    def __init__(self, crypto_tickers, mt4_symbols, jobs, max_workers=2, interval=15*60, on_result=None, engine='prophet', store=None):
+        """
+        Initializes the scheduler without starting it.
+
+        Args:
+            crypto_tickers (list): Symbols fetched from KuCoin.
+            mt4_symbols (list): Symbols read from the MT4 CSV files.
+            jobs (list): The (symbol, show_hourly_chart) pairs to keep precomputed.
+            max_workers (int): The number of worker processes.
+            interval (int): Seconds between passes over all jobs.
+            on_result (callable): Optional callable taking (symbol, timeframe, merged_df)
+                                  for every published result.
+            engine (str): The forecast engine the workers use, 'prophet' or 'band'.
+            store (MergedDataStore): Where results are published, a default store if None.
+        """
+        self.crypto_tickers = crypto_tickers
+        self.mt4_symbols = mt4_symbols
+        self.jobs = list(jobs)
+        self.max_workers = max_workers
+        self.interval = interval
+        self.on_result = on_result
+        self.engine = engine
+        self.store = store if store is not None else MergedDataStore()
+        self.queue = []
+        self.queued = {}
+        self.running = set()
+        self.counter = itertools.count()
+        self.viewed = None
+        self.viewed_path = os.path.join(self.store.store_dir, 'viewed.json')
+        self.condition = threading.Condition()
+        self.executor = None
+        self.thread = None
+        self.stop_event = threading.Event()
+
+    def start(self):
+        """
+        Starts the worker processes and the dispatcher thread.
+        """
+        self.executor = self._new_executor()
+        self.thread = threading.Thread(target=self._run, name='forecast-scheduler', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """
+        Stops the dispatcher thread and shuts the worker processes down.
+        """
+        self.stop_event.set()
+        with self.condition:
+            self.condition.notify_all()
+        # read under the condition, so a pool being replaced right now is shut down as well
+        with self.condition:
+            executor = self.executor
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def submit(self, symbol, show_hourly_chart=False, priority=PRIORITY_ROUTINE):
+        """
+        Queues a job, or raises the priority of a job that is already queued.
+        """
+        job = (symbol, show_hourly_chart)
+        with self.condition:
+            if job in self.queued and self.queued[job] <= priority:
+                return
+            # entries with an outdated priority are skipped when they are popped
+            self.queued[job] = priority
+            heapq.heappush(self.queue, (priority, next(self.counter), job))
+            self.condition.notify()
+
+    def prioritize(self, symbol, show_hourly_chart=False):
+        """
+        Marks the job for the symbol on screen, moving it to the front of the queue if it is
+        queued and to the front of every following pass. It can be called in any process
+        sharing the store, the scheduler picks the job up within VIEWED_POLL_INTERVAL.
+        """
+        job = (symbol, show_hourly_chart)
+        # written only when the symbol on screen changes, so redraws cost a small read
+        if self._read_viewed() != job:
+            self._write_viewed(job)
+        if self.thread is not None:
+            self._view(job)
+
+    def publish(self, symbol, timeframe, merged_df):
+        """
+        Publishes a result, bumping its version only if it differs from the previous one.
+
+        Returns:
+            int: The version of the published result.
+        """
+        version, changed = self.store.put(symbol, timeframe, merged_df)
+        if not changed:
+            return version
+        if self.on_result is not None:
+            self.on_result(symbol, timeframe, merged_df)
+        return version
+
+    def result(self, symbol, timeframe):
+        """
+        Returns (version, merged_df) of the latest published result, or (0, None).
+        """
+        return self.store.get(symbol, timeframe)
+
+    def version(self, symbol, timeframe):
+        """
+        Returns the version of the latest published result without loading it, or 0.
+        """
+        return self.store.version(symbol, timeframe)
+
+    def _run(self):
+        next_pass = time.monotonic()
+        while not self.stop_event.is_set():
+            # the symbol on screen in any server worker
+            viewed = self._read_viewed()
+            if viewed is not None and viewed != self.viewed:
+                self._view(viewed)
+            # queue a pass over every job when it is due
+            if time.monotonic() >= next_pass:
+                for symbol, show_hourly_chart in self.jobs:
+                    self.submit(symbol, show_hourly_chart)
+                if self.viewed is not None:
+                    self.submit(*self.viewed, priority=self.PRIORITY_VIEWED)
+                next_pass = time.monotonic() + self.interval
+            with self.condition:
+                job, priority = self._pop_job()
+                if job is None:
+                    self.condition.wait(timeout=max(0, min(next_pass - time.monotonic(), self.VIEWED_POLL_INTERVAL)))
+                    continue
+                self.running.add(job)
+            submitted = time.perf_counter()
+            executor = self.executor
+            try:
+                future = executor.submit(compute_merged_data, self.crypto_tickers, self.mt4_symbols, *job, engine=self.engine)
+            except (BrokenProcessPool, RuntimeError) as e:
+                with self.condition:
+                    self.running.discard(job)
+                if self.stop_event.is_set():
+                    return
+                # the job never ran, so it goes back in the queue for the new pool
+                print(f"Error submitting {job[0]} to the forecast pool, restarting the pool: {e}")
+                self._replace_executor(executor)
+                self.submit(*job, priority=priority)
+                continue
+            future.add_done_callback(lambda future, job=job, submitted=submitted, executor=executor: self._publish(job, future, submitted, executor))
+
+    def _new_executor(self):
+        # spawn rather than fork so workers never inherit the web server's threads
+        return ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context('spawn'))
+
+    def _replace_executor(self, broken):
+        # every job running in a broken pool fails at once, only the first one replaces it
+        with self.condition:
+            if self.executor is not broken or self.stop_event.is_set():
+                return
+            self.executor = self._new_executor()
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def _pop_job(self):
+        # return the highest priority job and its priority while fewer than max_workers jobs
+        # are running, (None, None) otherwise
+        if len(self.running) >= self.max_workers:
+            return None, None
+        deferred = []
+        found = None
+        while self.queue:
+            entry = heapq.heappop(self.queue)
+            priority, _, job = entry
+            if self.queued.get(job) != priority:
+                continue
+            # a job that is already running stays queued until it finishes
+            if job in self.running:
+                deferred.append(entry)
+                continue
+            del self.queued[job]
+            found = job, priority
+            break
+        for entry in deferred:
+            heapq.heappush(self.queue, entry)
+        return found if found is not None else (None, None)
+
+    def _publish(self, job, future, submitted, executor):
+        with self.condition:
+            self.running.discard(job)
+            self.condition.notify()
+        # the stages run in a worker process, so the server can only time the whole job
+        try:
+            timeframe, merged_df = future.result()
+        except BrokenProcessPool as e:
+            # a worker process died, the job is retried on the next pass in a new pool rather
+            # than straight away, in case it was the one that killed the worker
+            metrics.observe('forecast_job_seconds', time.perf_counter() - submitted, status='error')
+            print(f"Error precomputing {job[0]}, a forecast worker died, restarting the pool: {e}")
+            self._replace_executor(executor)
+            return
+        except Exception as e:
+            metrics.observe('forecast_job_seconds', time.perf_counter() - submitted, status='error')
+            print(f"Error precomputing {job[0]}: {e}")
+            return
+        metrics.observe('forecast_job_seconds', time.perf_counter() - submitted, status='ok')
+        self.publish(job[0], timeframe, merged_df)
+
+    def _view(self, job):
+        with self.condition:
+            self.viewed = job
+            queued = job in self.queued
+        if queued:
+            self.submit(*job, priority=self.PRIORITY_VIEWED)
+
+    def _read_viewed(self):
+        try:
+            with open(self.viewed_path, 'r') as file:
+                symbol, show_hourly_chart = json.load(file)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, TypeError) as e:
+            print(f"Error reading the viewed symbol {self.viewed_path}: {e}")
+            return None
+        return symbol, show_hourly_chart
+
+    def _write_viewed(self, job):
+        # write a temporary file and swap it in, so the scheduler never reads half a file
+        tmp_path = f'{self.viewed_path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            with open(tmp_path, 'w') as file:
+                json.dump(list(job), file)
+            os.replace(tmp_path, self.viewed_path)
+        except OSError as e:
+            print(f"Error writing the viewed symbol {self.viewed_path}: {e}")
@@ -1,4 +1,5 @@
 import pandas as pd
+import io
 import os
 
 class MT4DataFetcher:
@@ -12,6 +13,8 @@ class MT4DataFetcher:
         self.symbol = None
         self.period = period
         self.base_path = base_path or r'C:\Users\sean7\AppData\Roaming\MetaQuotes\Terminal\0BB29DBF61C9F39836A4ED9CF1A954C9\MQL4\Files'
+        # per file read state: byte offset, file identity, last parsed line and the parsed frame
+        self.file_states = {}
 
     def set_symbol(self, symbol):
         """
@@ -33,6 +36,10 @@ class MT4DataFetcher:
         """
         Fetches the MT4 data for the set symbol and period.
 
+        The parsed frame and byte offset are kept per file, so an unchanged file is not read
+        again and a file that only grew has just its new lines parsed. A truncated, replaced
+        or rewritten file is parsed again from the start.
+
         :return: A DataFrame containing the fetched data.
         """
         if not self.symbol:
@@ -42,11 +49,85 @@ class MT4DataFetcher:
         file_path = os.path.join(self.base_path, filename)
 
         try:
-            col_names = ['Date', 'Open', 'High', 'Low', 'Close']
-            df = pd.read_csv(file_path, index_col=0, parse_dates=True, delimiter=';', names=col_names)
-            return df
+            stat = os.stat(file_path)
         except FileNotFoundError:
             raise FileNotFoundError(f"CSV file not found at {file_path}")
+
+        try:
+            state = self.file_states.get(file_path)
+            if state is None or self._was_replaced(state, stat, file_path):
+                # first read, or the file was truncated or rewritten: parse it from the start
+                state = self._read_from(file_path, 0, None)
+            elif stat.st_size > state['offset']:
+                # the file only grew: parse the appended lines
+                state = self._read_from(file_path, state['offset'], state)
+            state['size'] = stat.st_size
+            state['mtime_ns'] = stat.st_mtime_ns
+            state['inode'] = stat.st_ino
+            self.file_states[file_path] = state
+            return state['data'].copy()
         except Exception as e:
             raise Exception(f"Error while reading the CSV file: {e}")
 
+    @staticmethod
+    def _was_replaced(state, stat, file_path):
+        """
+        Checks whether a file changed in any way other than lines being appended.
+
+        :param state: The read state stored for the file.
+        :param stat: The current os.stat result for the file.
+        :param file_path: The path of the file.
+        :return: True if the file has to be parsed again from the start.
+        """
+        if stat.st_ino != state['inode'] or stat.st_size < state['offset']:
+            return True
+        # same length but a new modification time means it was rewritten in place
+        if stat.st_size == state['size'] and stat.st_mtime_ns != state['mtime_ns']:
+            return True
+        # the last line we parsed must still be sitting right before the offset
+        anchor = state['anchor']
+        with open(file_path, 'rb') as file:
+            file.seek(state['offset'] - len(anchor))
+            return file.read(len(anchor)) != anchor
+
+    @staticmethod
+    def _read_from(file_path, offset, state):
+        """
+        Parses the complete lines of a file from a byte offset onwards.
+
+        A trailing line without a newline may still be being written, so it is left for the
+        next read.
+
+        :param file_path: The path of the file.
+        :param offset: The byte offset to start parsing from.
+        :param state: The read state to extend, or None for a full reload.
+        :return: The new read state.
+        """
+        with open(file_path, 'rb') as file:
+            file.seek(offset)
+            chunk = file.read()
+        # only parse up to the last complete line
+        end = chunk.rfind(b'\n') + 1
+        chunk = chunk[:end]
+
+        col_names = ['Date', 'Open', 'High', 'Low', 'Close']
+        if chunk.strip():
+            new_rows = pd.read_csv(io.BytesIO(chunk), index_col=0, parse_dates=True, delimiter=';', names=col_names)
+        else:
+            new_rows = None
+
+        if state is None:
+            data = new_rows if new_rows is not None else pd.DataFrame(columns=col_names[1:])
+            anchor = b''
+        else:
+            data = state['data']
+            anchor = state['anchor']
+            if new_rows is not None:
+                data = pd.concat([data, new_rows])
+                data = data[~data.index.duplicated(keep='last')]
+
+        if end:
+            # remember the last complete line to detect rewrites on the next read
+            anchor = chunk[chunk.rfind(b'\n', 0, end - 1) + 1:end]
+
+        return {'offset': offset + end, 'anchor': anchor, 'data': data}
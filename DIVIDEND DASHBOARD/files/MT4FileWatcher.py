@@ -0,0 +1,140 @@
+import os
+import re
+import threading
+import time
+
+try:
+    # watchdog uses inotify on Linux and ReadDirectoryChangesW on Windows
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    FileSystemEventHandler = object
+    Observer = None
+
+class MT4FileWatcher:
+    """
+    Watches the MT4 files folder and reports which <SYMBOL>_<PERIOD>.csv files changed.
+
+    Native file system events are used when the watchdog package is installed, otherwise the
+    folder is polled for size and modification time changes. Each change bumps a per file
+    version number and calls `on_change(symbol, period)` from the watcher thread.
+    """
+    FILE_PATTERN = re.compile(r'^(?P<symbol>.+)_(?P<period>\d+)\.csv$')
+
+    def __init__(self, base_path, on_change=None, poll_interval=5, debounce=1.0):
+        """
+        Initializes the watcher without starting it.
+
+        :param base_path: The folder the MT4 CSV files are written to.
+        :param on_change: Optional callable taking (symbol, period) for every changed file.
+        :param poll_interval: Seconds between folder scans when polling.
+        :param debounce: Seconds a file has to stay quiet before a change is reported, since
+                         the collector writes each file in several chunks.
+        """
+        self.base_path = base_path
+        self.on_change = on_change
+        self.poll_interval = poll_interval
+        self.debounce = debounce
+        self.versions = {}
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.snapshot = {}
+        self.observer = None
+        self.thread = None
+        self.stop_event = threading.Event()
+
+    def start(self):
+        """
+        Starts watching in a daemon thread. Returns False if the folder does not exist.
+        """
+        if not os.path.isdir(self.base_path):
+            print(f"MT4 files folder not found, not watching: {self.base_path}")
+            return False
+        self.snapshot = self._scan()
+        if Observer is not None:
+            self.observer = Observer()
+            self.observer.schedule(_EventHandler(self), self.base_path, recursive=False)
+            self.observer.daemon = True
+            self.observer.start()
+        self.thread = threading.Thread(target=self._run, name='mt4-file-watcher', daemon=True)
+        self.thread.start()
+        return True
+
+    def stop(self):
+        """
+        Stops the watcher thread and the native observer.
+        """
+        self.stop_event.set()
+        if self.observer is not None:
+            self.observer.stop()
+
+    def version(self, symbol, period):
+        """
+        Returns the number of changes seen for a symbol and period since the watcher started.
+        """
+        with self.lock:
+            return self.versions.get((symbol, period), 0)
+
+    def _scan(self):
+        # map each matching file to its (size, modification time)
+        snapshot = {}
+        for entry in os.scandir(self.base_path):
+            if self.FILE_PATTERN.match(entry.name):
+                stat = entry.stat()
+                snapshot[entry.name] = (stat.st_size, stat.st_mtime_ns)
+        return snapshot
+
+    def _mark(self, filename):
+        # record the file as changed, to be reported once it has been quiet for `debounce`
+        if self.FILE_PATTERN.match(filename):
+            with self.lock:
+                self.pending[filename] = time.monotonic()
+
+    def _run(self):
+        while not self.stop_event.wait(self.poll_interval if self.observer is None else self.debounce):
+            if self.observer is None:
+                try:
+                    snapshot = self._scan()
+                except OSError as e:
+                    print(f"Error scanning MT4 files folder: {e}")
+                    continue
+                for filename, signature in snapshot.items():
+                    if self.snapshot.get(filename) != signature:
+                        self._mark(filename)
+                self.snapshot = snapshot
+            self._flush()
+
+    def _flush(self):
+        # report the files that have stopped changing
+        now = time.monotonic()
+        with self.lock:
+            ready = [name for name, changed_at in self.pending.items() if now - changed_at >= self.debounce]
+            for filename in ready:
+                del self.pending[filename]
+        for filename in ready:
+            match = self.FILE_PATTERN.match(filename)
+            key = (match.group('symbol'), match.group('period'))
+            with self.lock:
+                self.versions[key] = self.versions.get(key, 0) + 1
+            if self.on_change is not None:
+                try:
+                    self.on_change(*key)
+                except Exception as e:
+                    print(f"Error handling MT4 update for {filename}: {e}")
+
+class _EventHandler(FileSystemEventHandler):
+    """
+    Forwards watchdog events for the CSV files to the MT4FileWatcher.
+    """
+    def __init__(self, watcher):
+        self.watcher = watcher
+
+    def on_modified(self, event):
+        if not event.is_directory:
+            self.watcher._mark(os.path.basename(event.src_path))
+
+    on_created = on_modified
+
+    def on_moved(self, event):
+        if not event.is_directory:
+            self.watcher._mark(os.path.basename(event.dest_path))
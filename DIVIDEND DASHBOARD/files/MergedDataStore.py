@@ -0,0 +1,200 @@
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+import pyarrow as pa
+from files.Metrics import metrics
+
+class MergedDataStore:
+    """
+    A bounded store of merged chart frames shared by every process of the dashboard.
+
+    Each (symbol, timeframe) frame is one Arrow IPC file under `store_dir`, read through a
+    memory map, so every server worker and the forecast scheduler see the same data and the
+    operating system's page cache holds a single copy of it. Every frame carries a version
+    in its file metadata that only changes when the frame's content changes. When the files
+    add up to more than `max_bytes` the least recently read ones are deleted, going by the
+    access time every read sets, and each process keeps at most `memory_bytes` of decoded
+    frames in memory, also evicted LRU first. A read never changes a file's modification
+    time, which is what tells the processes their decoded copy is still current.
+
+    Attributes:
+    -----------
+    store_dir : str
+        The directory where the frame files are stored.
+    max_bytes : int
+        The total size the frame files are allowed to take up.
+    memory_bytes : int
+        The total size of the decoded frames each process keeps in memory.
+    """
+    def __init__(self, store_dir='data/cache/merged', max_bytes=512*1024*1024, memory_bytes=128*1024*1024):
+        """
+        Initializes the store and creates the store directory if needed.
+
+        Parameters:
+        -----------
+        store_dir : str, optional
+            The directory where the frame files are stored (default is 'data/cache/merged').
+        max_bytes : int, optional
+            The total size the frame files may take up (default is 512 MB).
+        memory_bytes : int, optional
+            The size of the decoded frames kept in memory per process (default is 128 MB).
+        """
+        self.store_dir = store_dir
+        self.max_bytes = max_bytes
+        self.memory_bytes = memory_bytes
+        # (symbol, timeframe) -> ((file mtime_ns, inode), version, frame, frame bytes), least recently used first
+        self.loaded = OrderedDict()
+        self.loaded_bytes = 0
+        self.lock = threading.Lock()
+        os.makedirs(self.store_dir, exist_ok=True)
+
+    def _path(self, symbol, timeframe):
+        safe_key = re.sub(r'[^A-Za-z0-9._-]', '_', f'{symbol}_{timeframe}')
+        return os.path.join(self.store_dir, safe_key + '.arrow')
+
+    def get(self, symbol, timeframe):
+        """
+        Returns the stored frame of a chart.
+
+        Parameters:
+        -----------
+        symbol : str
+            The charted symbol.
+        timeframe : str
+            The chart timeframe.
+
+        Returns:
+        --------
+        tuple
+            (version, DataFrame) of the stored frame, or (0, None) if there is none.
+        """
+        path = self._path(symbol, timeframe)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            metrics.cache_result('merged', 'miss')
+            return 0, None
+        file_id = (stat.st_mtime_ns, stat.st_ino)
+        key = (symbol, timeframe)
+        with self.lock:
+            loaded = self.loaded.get(key)
+            if loaded is not None and loaded[0] == file_id:
+                self.loaded.move_to_end(key)
+                hit = True
+            else:
+                hit = False
+        if hit:
+            metrics.cache_result('merged', 'hit')
+            self._touch(path, stat)
+            return loaded[1], loaded[2]
+        try:
+            version, merged_df = self._read(path)
+        except (OSError, pa.ArrowInvalid):
+            # deleted or replaced while it was being read
+            metrics.cache_result('merged', 'miss')
+            return 0, None
+        metrics.cache_result('merged', 'disk')
+        # a file replaced since the stat gets a new id, so the next get reads it again
+        self._remember(key, file_id, version, merged_df)
+        self._touch(path, stat)
+        return version, merged_df
+
+    def version(self, symbol, timeframe):
+        """
+        Returns the version of the stored frame of a chart, 0 if there is none, reading only the file's metadata.
+        """
+        try:
+            with pa.memory_map(self._path(symbol, timeframe), 'r') as source:
+                metadata = pa.ipc.open_file(source).schema.metadata or {}
+        except (OSError, pa.ArrowInvalid):
+            return 0
+        return int(metadata.get(b'version', 0))
+
+    def put(self, symbol, timeframe, merged_df):
+        """
+        Stores the frame of a chart, giving it a new version only if its content changed.
+
+        Parameters:
+        -----------
+        symbol : str
+            The charted symbol.
+        timeframe : str
+            The chart timeframe.
+        merged_df : pandas.DataFrame
+            The merged bars and forecast.
+
+        Returns:
+        --------
+        tuple
+            (version, changed) - the version of the stored frame and whether it was written.
+        """
+        previous_version, previous_df = self.get(symbol, timeframe)
+        if previous_df is not None and previous_df.equals(merged_df):
+            return previous_version, False
+        # a microsecond timestamp keeps versions increasing across processes without a lock,
+        # and small enough to stay exact as a JavaScript number in a dcc.Store
+        version = max(time.time_ns() // 1000, previous_version + 1)
+        table = pa.Table.from_pandas(merged_df)
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), b'version': str(version).encode()})
+
+        path = self._path(symbol, timeframe)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with pa.OSFile(tmp_path, 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, path)
+        stat = os.stat(path)
+        self._remember((symbol, timeframe), (stat.st_mtime_ns, stat.st_ino), version, merged_df)
+        self._evict()
+        return version, True
+
+    def _read(self, path):
+        # the memory map is only open while the table is decoded, so the file can be replaced
+        with pa.memory_map(path, 'r') as source:
+            table = pa.ipc.open_file(source).read_all()
+        version = int((table.schema.metadata or {}).get(b'version', 0))
+        return version, table.to_pandas()
+
+    @staticmethod
+    def _touch(path, stat):
+        # mark the file as recently read for eviction, setting only its access time, since
+        # the modification time identifies the content every process has decoded
+        try:
+            os.utime(path, ns=(time.time_ns(), stat.st_mtime_ns))
+        except OSError:
+            pass
+
+    def _remember(self, key, file_id, version, merged_df):
+        # keep the decoded frame in this process, dropping the least recently used ones over budget
+        frame_bytes = int(merged_df.memory_usage(deep=True).sum())
+        with self.lock:
+            previous = self.loaded.pop(key, None)
+            if previous is not None:
+                self.loaded_bytes -= previous[3]
+            self.loaded[key] = (file_id, version, merged_df, frame_bytes)
+            self.loaded_bytes += frame_bytes
+            while self.loaded_bytes > self.memory_bytes and len(self.loaded) > 1:
+                _, evicted = self.loaded.popitem(last=False)
+                self.loaded_bytes -= evicted[3]
+
+    def _evict(self):
+        # delete the least recently read files until the store fits in max_bytes
+        entries = []
+        for entry in os.scandir(self.store_dir):
+            if entry.name.endswith('.arrow'):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_atime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
@@ -0,0 +1,266 @@
+import bisect
+import glob
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+# upper bounds in seconds, wide enough for a cold Prophet fit
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+class Metrics:
+    """
+    In-process timing histograms and counters, rendered in the Prometheus text format.
+
+    Series are identified by a metric name and a set of labels, e.g.
+    metrics.observe('chart_stage_seconds', 0.42, stage='forecast'). Every process keeps its
+    own series, so work done in the forecast scheduler's worker processes is only visible
+    through the timings the server process records around it.
+
+    Under gunicorn every worker process calls share() with a directory all of them write
+    their series to, and /metrics sums the series of every worker into one total, whichever
+    worker answers the scrape. A worker's latest series reach the directory every few
+    seconds, so a scrape may miss what the other workers recorded in that time.
+    """
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        """
+        Args:
+            buckets (tuple): The histogram bucket upper bounds in seconds.
+        """
+        self.buckets = tuple(buckets)
+        self.histograms = {}
+        self.counters = {}
+        self.help = {}
+        self.lock = threading.Lock()
+        # the directory every process of the server shares its series in, None for one process
+        self.directory = None
+
+    def describe(self, name, help_text):
+        """
+        Sets the HELP line of a metric.
+        """
+        self.help[name] = help_text
+
+    def observe(self, name, seconds, **labels):
+        """
+        Records one duration in a histogram.
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                # one count per bucket, the last one is +Inf
+                histogram = self.histograms[key] = {'buckets': [0] * (len(self.buckets) + 1), 'sum': 0.0, 'count': 0}
+            histogram['buckets'][bisect.bisect_left(self.buckets, seconds)] += 1
+            histogram['sum'] += seconds
+            histogram['count'] += 1
+
+    def inc(self, name, amount=1, **labels):
+        """
+        Increments a counter.
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    @contextmanager
+    def span(self, name, **labels):
+        """
+        Times the body of a with block into a histogram, also when it raises.
+
+        Example:
+            with metrics.span('chart_stage_seconds', stage='merge'):
+                merged_df = DataProcessor.merge_dataframes_for_prophet(data, forecast)
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def cache_result(self, cache, result):
+        """
+        Counts a cache lookup, e.g. cache_result('forecast', 'hit').
+        """
+        self.inc('cache_requests_total', cache=cache, result=result)
+
+    def http_response_hook(self, response, *args, **kwargs):
+        """
+        A requests response hook recording the time and status of every request a session makes.
+
+        Example:
+            session.hooks['response'].append(metrics.http_response_hook)
+        """
+        host = urlsplit(response.url).hostname or 'unknown'
+        self.observe('http_request_seconds', response.elapsed.total_seconds(), host=host)
+        self.inc('http_requests_total', host=host, status=str(response.status_code))
+        return response
+
+    def share(self, directory, interval=5):
+        """
+        Writes the series of this process to `directory` every `interval` seconds, and sums
+        the series of every process writing there into what render() returns.
+
+        Call it in each worker right after the fork. The series the worker inherited from
+        the parent are dropped, the parent writes those itself with write_snapshot(). The
+        files of workers that exited are kept, so the totals never go back when a worker
+        is replaced; clear the directory when the server starts.
+
+        Args:
+            directory (str): The directory shared by every process of the server.
+            interval (float): The seconds between two writes of this process's series.
+        """
+        # a lock held by another thread of the parent at the fork would never be released
+        self.lock = threading.Lock()
+        self.histograms, self.counters = {}, {}
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        stop_event = threading.Event()
+
+        def _write_periodically():
+            while not stop_event.wait(interval):
+                try:
+                    self.write_snapshot()
+                except OSError as e:
+                    print(f"Error writing the metrics to {directory}: {e}")
+
+        threading.Thread(target=_write_periodically, name='metrics-share', daemon=True).start()
+
+    def write_snapshot(self, directory=None):
+        """
+        Writes the series of this process to its file in the shared directory.
+        """
+        directory = directory or self.directory
+        histograms, counters = self._snapshot()
+        snapshot = {'buckets': list(self.buckets),
+                    'histograms': [[name, labels, value] for (name, labels), value in histograms.items()],
+                    'counters': [[name, labels, value] for (name, labels), value in counters.items()]}
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'metrics_{os.getpid()}.json')
+        # write a temporary file and swap it in, so a scrape never reads half a file
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w') as file:
+            json.dump(snapshot, file)
+        os.replace(tmp_path, path)
+
+    def render(self):
+        """
+        Returns every metric in the Prometheus text exposition format, summed over every
+        process sharing the directory when share() was called.
+        """
+        if self.directory is None:
+            histograms, counters = self._snapshot()
+        else:
+            # this process's series are written first, so the scrape has them up to date
+            try:
+                self.write_snapshot()
+            except OSError as e:
+                # the last file this process wrote is still summed, only a few seconds old
+                print(f"Error writing the metrics to {self.directory}: {e}")
+            histograms, counters = self._read_shared()
+
+        lines = []
+        for name in sorted({name for name, _ in histograms}):
+            self._header(lines, name, 'histogram')
+            for (series_name, labels), histogram in sorted(histograms.items()):
+                if series_name != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(self.buckets + ('+Inf',), histogram['buckets']):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{self._labels(labels + (("le", str(bound)),))} {cumulative}')
+                lines.append(f'{name}_sum{self._labels(labels)} {histogram["sum"]}')
+                lines.append(f'{name}_count{self._labels(labels)} {histogram["count"]}')
+        for name in sorted({name for name, _ in counters}):
+            self._header(lines, name, 'counter')
+            for (series_name, labels), value in sorted(counters.items()):
+                if series_name == name:
+                    lines.append(f'{name}{self._labels(labels)} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def _snapshot(self):
+        with self.lock:
+            histograms = {key: {'buckets': list(value['buckets']), 'sum': value['sum'], 'count': value['count']}
+                          for key, value in self.histograms.items()}
+            counters = dict(self.counters)
+        return histograms, counters
+
+    def _read_shared(self):
+        histograms, counters = {}, {}
+        for path in glob.glob(os.path.join(self.directory, 'metrics_*.json')):
+            try:
+                with open(path, 'r') as file:
+                    snapshot = json.load(file)
+            except (OSError, ValueError) as e:
+                print(f"Error reading the metrics {path}: {e}")
+                continue
+            if tuple(snapshot['buckets']) != self.buckets:
+                print(f"Skipping the metrics {path}, written with other histogram buckets")
+                continue
+            for name, labels, value in snapshot['histograms']:
+                key = (name, tuple(tuple(label) for label in labels))
+                total = histograms.setdefault(key, {'buckets': [0] * (len(self.buckets) + 1), 'sum': 0.0, 'count': 0})
+                total['buckets'] = [a + b for a, b in zip(total['buckets'], value['buckets'])]
+                total['sum'] += value['sum']
+                total['count'] += value['count']
+            for name, labels, value in snapshot['counters']:
+                key = (name, tuple(tuple(label) for label in labels))
+                counters[key] = counters.get(key, 0) + value
+        return histograms, counters
+
+    def _header(self, lines, name, metric_type):
+        if name in self.help:
+            lines.append(f'# HELP {name} {self.help[name]}')
+        lines.append(f'# TYPE {name} {metric_type}')
+
+    @staticmethod
+    def _labels(labels):
+        if not labels:
+            return ''
+        escaped = [(key, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')) for key, value in labels]
+        return '{' + ','.join(f'{key}="{value}"' for key, value in escaped) + '}'
+
+    def instrument_dash(self, app):
+        """
+        Times every Dash callback request and serves the metrics on /metrics.
+
+        Dash runs every callback through a POST to /_dash-update-component, so the request
+        is timed with Flask hooks and labelled with the callback's output id.
+
+        Args:
+            app (dash.Dash): The Dash app whose Flask server is instrumented.
+        """
+        import flask
+
+        server = app.server
+
+        @server.before_request
+        def _start_timer():
+            flask.g.metrics_start = time.perf_counter()
+
+        @server.after_request
+        def _record_callback(response):
+            start = getattr(flask.g, 'metrics_start', None)
+            if start is not None and flask.request.path.endswith('/_dash-update-component'):
+                body = flask.request.get_json(silent=True) or {}
+                output = body.get('output', 'unknown')
+                self.observe('dash_callback_seconds', time.perf_counter() - start, output=output)
+                self.inc('dash_callbacks_total', output=output, status=str(response.status_code))
+            return response
+
+        @server.route('/metrics')
+        def _metrics():
+            return flask.Response(self.render(), mimetype='text/plain; version=0.0.4')
+
+# the metrics of this process, shared by every module
+metrics = Metrics()
+metrics.describe('chart_stage_seconds', 'Seconds spent in each stage of building a Market Watch chart.')
+metrics.describe('dash_callback_seconds', 'Seconds spent serving each Dash callback.')
+metrics.describe('dash_callbacks_total', 'Dash callback requests by output and HTTP status.')
+metrics.describe('http_request_seconds', 'Seconds spent on outbound HTTP requests by host.')
+metrics.describe('http_requests_total', 'Outbound HTTP requests by host and status.')
+metrics.describe('cache_requests_total', 'Cache lookups by cache and result.')
+metrics.describe('startup_seconds', 'Seconds from importing app.py to the app and its pages being ready.')
+metrics.describe('forecast_job_seconds', 'Seconds from submitting a scheduler job to its result.')
@@ -1,4 +1,6 @@
 import yfinance as yf
+from files.BarCache import BarCache
+from files.Metrics import metrics
 
 class StockDataFetcher:
     """
@@ -8,6 +10,8 @@ class StockDataFetcher:
     -----------
     ticker : str
         A string to store the stock ticker symbol.
+    bar_cache : BarCache
+        The on-disk bar store used to serve history and fetch only new bars.
 
     Methods:
     --------
@@ -16,12 +20,21 @@ class StockDataFetcher:
 
     fetch_data(self, period='2y', interval='1d')
         Fetches and returns stock data for the set ticker symbol.
+
+    fetch_many(self, tickers, period='2y', interval='1d', chunk_size=50)
+        Fetches and returns stock data for many ticker symbols with grouped downloads.
     """
-    def __init__(self):
+    def __init__(self, bar_cache=None):
         """
         Initializes the StockDataFetcher class with no ticker set.
+
+        Parameters:
+        -----------
+        bar_cache : BarCache, optional
+            The bar store to use (default is a BarCache in 'data/cache/bars').
         """
         self.ticker = None
+        self.bar_cache = bar_cache or BarCache()
 
     def set_ticker(self, ticker):
         """
@@ -38,6 +51,10 @@ class StockDataFetcher:
         """
         Fetches and returns stock data for the set ticker symbol.
 
+        Bars are served from the on-disk bar cache. A cold cache downloads the whole period
+        once, a warm cache only downloads the bars after the last stored timestamp, and a
+        cache refreshed within `bar_cache.max_age` seconds is served without any request.
+
         Parameters:
         -----------
         period : str, optional
@@ -57,5 +74,140 @@ class StockDataFetcher:
         """
         if not self.ticker:
             raise ValueError("Ticker symbol not set. Use set_ticker() to set a stock ticker symbol before fetching data.")
-        symbol_data = yf.download(self.ticker, period=period, interval=interval, rounding=True)[['Open', 'High', 'Low', 'Close']]
-        return symbol_data
+        start = self.bar_cache.period_start(period)
+        cached, meta = self.bar_cache.load(self.ticker, interval)
+
+        if self.bar_cache.covers(meta, start):
+            # serve the stored bars without a request if they were refreshed recently
+            if self.bar_cache.is_fresh(meta):
+                metrics.cache_result('bars', 'hit')
+                return self.bar_cache.slice_period(cached, start)
+            metrics.cache_result('bars', 'stale')
+            try:
+                # only ask for the bars from the last stored timestamp onwards
+                new_bars = self._download(self.ticker, start=cached.index[-1], interval=interval)
+            except Exception as e:
+                # serve the stored history rather than failing the chart
+                print(f"Error fetching new bars for {self.ticker}: {e}")
+                return self.bar_cache.slice_period(cached, start)
+            symbol_data = self.bar_cache.merge(cached, new_bars)
+            cache_start = meta['start']
+        else:
+            metrics.cache_result('bars', 'miss')
+            symbol_data = self._download(self.ticker, period=period, interval=interval)
+            cache_start = start
+
+        if not symbol_data.empty:
+            self.bar_cache.save(self.ticker, interval, symbol_data, cache_start)
+        return self.bar_cache.slice_period(symbol_data, start)
+
+    def fetch_many(self, tickers, period='2y', interval='1d', chunk_size=50):
+        """
+        Fetches and returns stock data for many ticker symbols at once.
+
+        Tickers with fresh bars in the cache are served locally. Tickers with no usable
+        history are downloaded together for the whole period, and tickers with stale
+        history are downloaded together from the oldest of their last stored timestamps.
+        Each group is sent to yfinance as one grouped download per `chunk_size` tickers.
+
+        Parameters:
+        -----------
+        tickers : list of str
+            The ticker symbols to fetch.
+        period : str, optional
+            The period over which to fetch stock data (default is '2y', indicating 2 years).
+        interval : str, optional
+            The interval between data points (default is '1d', indicating 1 day).
+        chunk_size : int, optional
+            The maximum number of tickers sent in one download (default is 50).
+
+        Returns:
+        --------
+        dict
+            A dictionary mapping each ticker to a DataFrame with Open, High, Low and Close
+            columns, in the same shape `fetch_data` returns. Tickers that yfinance returned
+            no data for are left out.
+        """
+        start = self.bar_cache.period_start(period)
+        results = {}
+        cold_tickers = []
+        stale_tickers = {}
+
+        # sort the tickers by what the cache can do for them
+        for ticker in tickers:
+            cached, meta = self.bar_cache.load(ticker, interval)
+            if not self.bar_cache.covers(meta, start):
+                metrics.cache_result('bars', 'miss')
+                cold_tickers.append(ticker)
+            elif self.bar_cache.is_fresh(meta):
+                metrics.cache_result('bars', 'hit')
+                results[ticker] = self.bar_cache.slice_period(cached, start)
+            else:
+                metrics.cache_result('bars', 'stale')
+                stale_tickers[ticker] = (cached, meta)
+
+        # download the whole period for tickers without usable history
+        if cold_tickers:
+            downloaded = self._download_many(cold_tickers, chunk_size, period=period, interval=interval)
+            for ticker, symbol_data in downloaded.items():
+                self.bar_cache.save(ticker, interval, symbol_data, start)
+                results[ticker] = self.bar_cache.slice_period(symbol_data, start)
+
+        # download only the recent bars for tickers with stale history
+        if stale_tickers:
+            delta_start = min(cached.index[-1] for cached, _ in stale_tickers.values())
+            try:
+                downloaded = self._download_many(list(stale_tickers), chunk_size, start=delta_start, interval=interval)
+            except Exception as e:
+                # serve the stored history rather than failing the scan
+                print(f"Error fetching new bars: {e}")
+                downloaded = {}
+            for ticker, (cached, meta) in stale_tickers.items():
+                symbol_data = self.bar_cache.merge(cached, downloaded.get(ticker))
+                if ticker in downloaded:
+                    self.bar_cache.save(ticker, interval, symbol_data, meta['start'])
+                results[ticker] = self.bar_cache.slice_period(symbol_data, start)
+
+        # keep the order the tickers were asked for
+        return {ticker: results[ticker] for ticker in tickers if ticker in results}
+
+    @staticmethod
+    def _download_many(tickers, chunk_size, **kwargs):
+        """
+        Downloads OHLC bars for many tickers with grouped yfinance downloads.
+
+        Returns a dictionary mapping each ticker to its bars, leaving out tickers that
+        came back empty.
+        """
+        frames = {}
+        for i in range(0, len(tickers), chunk_size):
+            chunk = tickers[i:i + chunk_size]
+            # yfinance makes its own requests, so the whole download is timed
+            with metrics.span('http_request_seconds', host='yfinance'):
+                chunk_data = yf.download(chunk, group_by='ticker', rounding=True, threads=True, **kwargs)
+            if chunk_data.empty:
+                continue
+            # older yfinance versions return flat columns when only one ticker is asked for
+            if chunk_data.columns.nlevels == 1:
+                chunk_data = {chunk[0]: chunk_data}
+            for ticker in chunk:
+                if ticker not in chunk_data:
+                    continue
+                # failed tickers are returned as all NaN columns
+                symbol_data = chunk_data[ticker][['Open', 'High', 'Low', 'Close']].dropna(how='all')
+                if not symbol_data.empty:
+                    frames[ticker] = symbol_data
+        return frames
+
+    @staticmethod
+    def _download(ticker, **kwargs):
+        """
+        Downloads OHLC bars for a single ticker with yfinance and flattens the columns.
+        """
+        # yfinance makes its own requests, so the whole download is timed
+        with metrics.span('http_request_seconds', host='yfinance'):
+            symbol_data = yf.download(ticker, rounding=True, **kwargs)
+        # newer yfinance versions return (Price, Ticker) columns even for a single ticker
+        if symbol_data.columns.nlevels > 1:
+            symbol_data.columns = symbol_data.columns.get_level_values(0)
+        return symbol_data[['Open', 'High', 'Low', 'Close']]
@@ -0,0 +1,56 @@
+import threading
+import time
+from files.Metrics import metrics
+
+class TTLCache:
+    """
+    An in-memory cache of computed values that expire after `ttl` seconds.
+
+    Used for the parts of a page that need the network, such as the market indices chart,
+    so a page load reuses a recent value instead of downloading it again. Each key has its
+    own lock, so concurrent page loads wait for one computation instead of all running it.
+    When a computation fails or returns None the last good value is served, if there is one,
+    so a page still renders while Yahoo or Polygon is down.
+    """
+    def __init__(self, ttl=15*60, name='ttl'):
+        """
+        Args:
+            ttl (int): Seconds a computed value is served before it is computed again.
+            name (str): The cache label used in the cache metrics.
+        """
+        self.ttl = ttl
+        self.name = name
+        self.entries = {}
+        self.key_locks = {}
+        self.lock = threading.Lock()
+
+    def get(self, key, compute):
+        """
+        Returns the value for a key, calling `compute()` if it is missing or expired.
+
+        Args:
+            key (hashable): The cache key.
+            compute (callable): Computes the value, called without arguments.
+
+        Returns:
+            The cached or newly computed value, the stale value if the computation failed,
+            or None if there is no value at all.
+        """
+        with self.lock:
+            key_lock = self.key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            entry = self.entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl:
+                metrics.cache_result(self.name, 'hit')
+                return entry[1]
+            metrics.cache_result(self.name, 'miss')
+            try:
+                value = compute()
+            except Exception as e:
+                print(f"Error computing {key}: {e}")
+                value = None
+            if value is None:
+                # serve the last good value rather than nothing
+                return entry[1] if entry is not None else None
+            self.entries[key] = (time.monotonic(), value)
+            return value
@@ -1,36 +1,171 @@
-import requests
+import ast
 import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from files.Metrics import metrics
 
 class TradingBotController:
+    """
+    Sends start and stop signals to a 3Commas bot without blocking the caller.
+
+    Signals are posted from a single background thread over a pooled session with timeouts
+    and bounded retries, so they reach 3Commas in the order they were sent and a slow or
+    unreachable endpoint never holds up a chart or the signal daemon. The last state each
+    bot was put in is kept in `state_path`, across restarts, and a signal that would put a
+    bot in the state it is already in, or is already being sent, is not posted again.
+    """
+    # the 3Commas endpoint for TradingView style signals
+    API_URL = "https://3commas.io/trade_signal/trading_view"
+    STARTED = 'started'
+    STOPPED = 'stopped'
+
+    def __init__(self, api_url=API_URL, state_path='data/bot_state.json', timeout=(3.05, 10), retries=3):
+        """
+        :param api_url: The signal endpoint, e.g. a local stand-in server when testing.
+        :param state_path: The JSON file the state of each bot is kept in.
+        :param timeout: The (connect, read) timeout of a post in seconds.
+        :param retries: How many times a post is retried when the connection fails or
+                        3Commas answers 429 or a 5xx gateway error. A post that reached
+                        3Commas and timed out is not sent again, it may have been acted on.
+        """
+        self.api_url = api_url
+        self.state_path = state_path
+        self.timeout = timeout
+        self.session = requests.Session()
+        retry = Retry(total=retries, connect=retries, read=0, status=retries, backoff_factor=0.5,
+                      status_forcelist=(429, 502, 503, 504), allowed_methods=frozenset({'POST'}),
+                      respect_retry_after_header=True, raise_on_status=False)
+        self.session.mount('https://', HTTPAdapter(max_retries=retry))
+        self.session.mount('http://', HTTPAdapter(max_retries=retry))
+        # time every request the session makes
+        self.session.hooks['response'].append(metrics.http_response_hook)
+        # one thread, so the signals are sent in order
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='trading-bot')
+        self.lock = threading.Lock()
+        # bot key -> {'state': 'started' or 'stopped', 'time': epoch seconds}
+        self.states = self._load_states()
+        # bot key -> the state a post in flight will put the bot in
+        self.pending = {}
+
     def start_bot(self, trade_message):
-        print("\nStarting the buy bot...\n")
-        # Convert string dict to dict
-        trade_dict = eval(trade_message)
-        print("is this a dict?", type(trade_dict))
-        # Define the API endpoint
-        api_url = "https://3commas.io/trade_signal/trading_view"
-        # Your data payload this is for stopping the bot
-        payload = trade_dict
-        # Send POST request
-        response = requests.post(api_url, json=payload)
-        # Check response
-        if response.status_code == 200:
-            print("Bot started successfully.")
-        else:
-            print("Failed to START the bot. Status code:", response.status_code)
+        """
+        Sends the start signal in the background.
+
+        :param trade_message: The JSON signal message, e.g. the one set up in 3Commas.
+        :return: A Future resolving to True if the bot was started, or None if the signal
+                 was not sent because the bot is already started.
+        :raises ValueError: If the message is not a JSON object, nothing is sent.
+        """
+        return self._dispatch(self.STARTED, trade_message)
 
     def stop_bot(self, trade_message):
-        print("\nStopping the buy bot...\n")
-        # Convert string dict to dict
-        trade_dict = eval(trade_message)
-        # Define the API endpoint
-        api_url = "https://3commas.io/trade_signal/trading_view"
-        # Your data payload this is for stopping the bot
-        payload = trade_dict
-        # Send POST request
-        response = requests.post(api_url, json=payload)
-        # Check response
-        if response.status_code == 200:
-            print("Bot stopped successfully.")
-        else:
-            print("Failed to stop the bot. Status code:", response.status_code)
+        """
+        Sends the stop signal in the background.
+
+        :param trade_message: The JSON signal message, e.g. the one set up in 3Commas.
+        :return: A Future resolving to True if the bot was stopped, or None if the signal
+                 was not sent because the bot is already stopped.
+        :raises ValueError: If the message is not a JSON object, nothing is sent.
+        """
+        return self._dispatch(self.STOPPED, trade_message)
+
+    def state(self, bot_key):
+        """
+        Returns the last state a bot was put in, 'started', 'stopped' or None if unknown.
+        """
+        with self.lock:
+            return self.states.get(bot_key, {}).get('state')
+
+    @staticmethod
+    def parse_message(trade_message):
+        """
+        Parses a signal message into a dict.
+
+        Messages are JSON. Messages saved by older versions may be Python dict literals with
+        single quotes, which are read with ast.literal_eval, never executed.
+
+        :param trade_message: The message string.
+        :return: The message as a dict.
+        :raises ValueError: If the message is not a JSON object or dict literal.
+        """
+        # the errors never quote the message, it holds the bot's secret
+        if not trade_message or not trade_message.strip():
+            raise ValueError("the bot message is empty")
+        try:
+            payload = json.loads(trade_message)
+        except (TypeError, ValueError):
+            try:
+                payload = ast.literal_eval(trade_message)
+            except (TypeError, ValueError, SyntaxError, MemoryError, RecursionError):
+                raise ValueError("the bot message is not valid JSON")
+        if not isinstance(payload, dict):
+            raise ValueError("the bot message is not a JSON object")
+        return payload
+
+    @staticmethod
+    def bot_key(payload):
+        """
+        Returns the key a bot's state is kept under, its 3Commas bot uuid or id when the
+        message has one, so the start and stop messages of a bot share one state.
+        """
+        for field in ('bot_uuid', 'bot_id'):
+            if payload.get(field) is not None:
+                return str(payload[field])
+        return 'default'
+
+    def _dispatch(self, target, trade_message):
+        # an invalid message raises, so callers can tell it apart from a suppressed duplicate
+        payload = self.parse_message(trade_message)
+        key = self.bot_key(payload)
+        with self.lock:
+            # the post in flight decides the state, otherwise the last persisted state
+            current = self.pending.get(key, self.states.get(key, {}).get('state'))
+            if current == target:
+                print(f"Bot {key} is already {target}, not sending the signal again")
+                return None
+            self.pending[key] = target
+        print(f"\nSending the {target} signal for bot {key}...\n")
+        return self.executor.submit(self._post, key, target, payload)
+
+    def _post(self, key, target, payload):
+        try:
+            response = self.session.post(self.api_url, json=payload, timeout=self.timeout)
+            sent = response.status_code == 200
+            if not sent:
+                print(f"Failed to set bot {key} {target}. Status code: {response.status_code}")
+        except requests.RequestException as e:
+            print(f"Failed to set bot {key} {target}: {e}")
+            sent = False
+        with self.lock:
+            if self.pending.get(key) == target:
+                del self.pending[key]
+            if sent:
+                self.states[key] = {'state': target, 'time': time.time()}
+                self._save_states()
+        if sent:
+            print(f"Bot {key} {target} successfully.")
+        # a failed signal leaves the state as it was, so the next signal is sent again
+        return sent
+
+    def _load_states(self):
+        try:
+            with open(self.state_path, 'r') as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            print(f"Error reading the bot state {self.state_path}: {e}")
+            return {}
+
+    def _save_states(self):
+        # write a temporary file and swap it in, so a crash never leaves half a file
+        os.makedirs(os.path.dirname(self.state_path) or '.', exist_ok=True)
+        tmp_path = f'{self.state_path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w') as file:
+            json.dump(self.states, file, indent=2)
+        os.replace(tmp_path, self.state_path)
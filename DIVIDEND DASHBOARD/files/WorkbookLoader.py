@@ -0,0 +1,102 @@
+import os
+import pickle
+import threading
+import pandas as pd
+from files.Metrics import metrics
+
+class WorkbookLoader:
+    """
+    Loads every sheet of an Excel workbook once per file modification time.
+
+    The parsed sheets are kept in memory, shared by every WorkbookLoader for the same file,
+    and in a sidecar file under `cache_dir` so a restarted server does not have to parse
+    the workbook again until it is saved.
+
+    Attributes:
+    -----------
+    path : str
+        The path of the Excel workbook.
+    cache_dir : str
+        The directory where the parsed sheets are stored.
+    """
+    # parsed workbooks shared by every loader in the process: path -> (mtime_ns, sheets)
+    _loaded = {}
+    _lock = threading.Lock()
+
+    def __init__(self, path='data/Dividend_Dashboard.xlsx', cache_dir='data/cache/workbook'):
+        """
+        Initializes the loader for a workbook.
+
+        Parameters:
+        -----------
+        path : str, optional
+            The path of the Excel workbook (default is 'data/Dividend_Dashboard.xlsx').
+        cache_dir : str, optional
+            The directory where the parsed sheets are stored (default is 'data/cache/workbook').
+        """
+        self.path = os.path.abspath(path)
+        self.cache_dir = cache_dir
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def sheets(self):
+        """
+        Returns all sheets of the workbook, parsing it only if it changed since the last load.
+
+        Returns:
+        --------
+        dict
+            A dictionary mapping each sheet name to its DataFrame. The frames are shared, use
+            `read_sheet` to get a copy that is safe to modify.
+        """
+        mtime_ns = os.stat(self.path).st_mtime_ns
+        with self._lock:
+            loaded = self._loaded.get(self.path)
+            if loaded is not None and loaded[0] == mtime_ns:
+                metrics.cache_result('workbook', 'hit')
+                return loaded[1]
+            sheets = self._read_sidecar(mtime_ns)
+            if sheets is None:
+                metrics.cache_result('workbook', 'miss')
+                # parse every sheet in one pass over the file
+                sheets = pd.read_excel(self.path, sheet_name=None)
+                self._write_sidecar(mtime_ns, sheets)
+            else:
+                metrics.cache_result('workbook', 'sidecar')
+            self._loaded[self.path] = (mtime_ns, sheets)
+            return sheets
+
+    def read_sheet(self, sheet_name):
+        """
+        Returns a copy of one sheet of the workbook.
+
+        Parameters:
+        -----------
+        sheet_name : str
+            The name of the sheet.
+
+        Returns:
+        --------
+        pandas.DataFrame
+            The sheet as it would be returned by pd.read_excel.
+        """
+        return self.sheets()[sheet_name].copy()
+
+    def _sidecar_path(self):
+        return os.path.join(self.cache_dir, os.path.basename(self.path) + '.pickle')
+
+    def _read_sidecar(self, mtime_ns):
+        # the sidecar is only valid for the workbook version it was written from
+        try:
+            with open(self._sidecar_path(), 'rb') as file:
+                cached = pickle.load(file)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+        if cached.get('mtime_ns') != mtime_ns:
+            return None
+        return cached['sheets']
+
+    def _write_sidecar(self, mtime_ns, sheets):
+        tmp_path = f'{self._sidecar_path()}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as file:
+            pickle.dump({'mtime_ns': mtime_ns, 'sheets': sheets}, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self._sidecar_path())
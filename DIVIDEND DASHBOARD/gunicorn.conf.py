@@ -0,0 +1,57 @@
+"""
+gunicorn settings for serving the dashboard through wsgi.py, e.g. `gunicorn` from the
+DIVIDEND DASHBOARD folder. Every setting can be changed with the environment variables below.
+"""
+import fcntl
+import gc
+import glob
+import os
+
+wsgi_app = 'wsgi:server'
+bind = f"{os.environ.get('DASH_HOST', '0.0.0.0')}:{os.environ.get('DASH_PORT', 8050)}"
+# one worker process per core, each serving several requests at once with threads, since
+# most callbacks wait on disk or the network and release the GIL while doing so
+workers = int(os.environ.get('DASH_WORKERS', os.cpu_count() or 1))
+threads = int(os.environ.get('DASH_THREADS', 4))
+worker_class = 'gthread'
+# seconds a worker may stay unresponsive before it is restarted
+timeout = int(os.environ.get('DASH_TIMEOUT', 300))
+# import the app once in the master, so the workers share its pages copy-on-write
+preload_app = True
+# the lock file held by the worker running the background services
+BACKGROUND_LOCK = os.environ.get('DASH_BACKGROUND_LOCK', 'data/cache/background.lock')
+# the directory the workers share their metrics in, so /metrics answers with the totals of
+# every worker whichever one serves the scrape
+METRICS_DIR = os.environ.get('DASH_METRICS_DIR', 'data/cache/metrics')
+
+def on_starting(server):
+    # the totals start from zero with every start of the server
+    for path in glob.glob(os.path.join(METRICS_DIR, 'metrics_*.json')):
+        os.remove(path)
+
+def when_ready(server):
+    # the startup timings were recorded by the master while preloading the app
+    from files.Metrics import metrics
+    metrics.write_snapshot(METRICS_DIR)
+    # move everything the preloaded app allocated out of the garbage collector's reach, so
+    # collections in the workers do not write to, and so copy, the shared pages
+    gc.freeze()
+
+def post_fork(server, worker):
+    from files.Metrics import metrics
+    metrics.share(METRICS_DIR)
+    # the first worker to take the lock runs the forecast scheduler and the MT4 file watcher,
+    # a worker forked to replace it takes the lock over once the old one is gone; the other
+    # workers tell the scheduler which symbol is on screen through the merged data store
+    os.makedirs(os.path.dirname(BACKGROUND_LOCK), exist_ok=True)
+    lock_file = open(BACKGROUND_LOCK, 'w')
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        lock_file.close()
+        return
+    # keep the file open for the life of the worker, closing it releases the lock
+    worker.background_lock = lock_file
+    from files.BackgroundServices import background_services
+    server.log.info(f'Worker {worker.pid} runs the background services')
+    background_services.start()
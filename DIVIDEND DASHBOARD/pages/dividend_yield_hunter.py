@@ -1,17 +1,20 @@
 import dash
-from dash import html, dcc, Input, Output, callback, dash_table, no_update, State
+from dash import html, dcc, Input, Output, callback, dash_table, no_update, State, DiskcacheManager
 from dash import callback_context
+import dash_bootstrap_components as dbc
+import diskcache
 import pandas as pd
 from datetime import date, timedelta, datetime, date
 from files.StockDataFetcher import StockDataFetcher
-import requests
+from files.DividendDataFetcher import DividendDataFetcher
+from files.DividendCandidateScanner import DividendCandidateScanner
+from files.Metrics import metrics
+from files.TTLCache import TTLCache
 import yfinance as yf
-from prophet import Prophet
 import plotly.graph_objects as go
 import plotly.express as px
 import os
 from dotenv import load_dotenv
-from scipy.signal import savgol_filter
 
 
 load_dotenv('.env')
@@ -21,30 +24,42 @@ TODAYS_DATE = date.today()
 MONEY_FORMAT = dash_table.FormatTemplate.money(2)
 DECIMAL_FORMAT = dash_table.FormatTemplate.Format(precision=2, symbol_suffix='%')
 POLYGON_API = os.environ.get('POLYGON_IO_API')
+# worker processes and timeouts (in seconds) for the candidate scan
+SCAN_WORKERS = int(os.environ.get('SCAN_WORKERS', os.cpu_count()))
+SCAN_SYMBOL_TIMEOUT = int(os.environ.get('SCAN_SYMBOL_TIMEOUT', 120))
+SCAN_TOTAL_TIMEOUT = int(os.environ.get('SCAN_TOTAL_TIMEOUT', 600))
+# 'prophet' fits every candidate in the worker pool, the NumPy 'band' engine forecasts them all in one batch
+FORECAST_ENGINE = os.environ.get('FORECAST_ENGINE', 'prophet')
+# seconds the scan results of a date are served from the cache
+SCAN_CACHE_TTL = int(os.environ.get('SCAN_CACHE_TTL', 60*60))
+SCAN_STREAM_STYLE = {'display': 'flex', 'justifyContent': 'center', 'alignItems': 'center', 'flexDirection': 'column', 'margin': 20}
 
 dash.register_page(__name__, path='/dividend_yield_hunter', name='Dividend Yield Hunter 🏹')
 
 ############### Object Instantiation ###############
 stock_data_fetcher = StockDataFetcher()
+dividend_data_fetcher = DividendDataFetcher(POLYGON_API)
+candidate_scanner = DividendCandidateScanner(SCAN_WORKERS, SCAN_SYMBOL_TIMEOUT, SCAN_TOTAL_TIMEOUT, engine=FORECAST_ENGINE)
+# the ex-dividend chart changes at most daily, its Polygon query is also cached on disk
+ex_dividend_chart_cache = TTLCache(ttl=60*60, name='ex_dividend_chart')
+# runs the scan in a job process and keeps its progress and result on disk, so every server worker can follow it
+background_callback_manager = DiskcacheManager(diskcache.Cache('data/cache/background_callbacks'))
+# the scan results of each selected date
+scan_results_cache = diskcache.Cache('data/cache/yield_hunter')
 
 #################### FUNCTIONS ####################
-def fetch_and_filter_dividends(selected_date, api):
+def fetch_and_filter_dividends(selected_date):
     # Calculate the date one day after today
     fetch_date = selected_date
     #  format the date to match "Year-mmonth-day"
     fetch_date = fetch_date.strftime('%Y-%m-%d')
 
-    url = f'https://api.polygon.io/v3/reference/dividends?ex_dividend_date={fetch_date}&dividend_type=CD&order=asc&limit=1000&sort=ex_dividend_date&apiKey={api}'
-
-    # make a request to the url 
-    response = requests.get(url)
-    # convert the response to json
-    data = response.json()
+    # fetch every page of cash dividends going ex on the date
+    df = dividend_data_fetcher.fetch_dividends({'ex_dividend_date': fetch_date, 'dividend_type': 'CD', 'order': 'asc',
+                                                'limit': 1000, 'sort': 'ex_dividend_date'})
 
     # check if data is empty
-    if data['results']:
-        # create a dataframe from the json data
-        df = pd.DataFrame(data['results'])
+    if not df.empty:
         # create a list from the dataframe ticker column
         ticker_list = df['ticker'].tolist()
     else:
@@ -53,7 +68,8 @@ def fetch_and_filter_dividends(selected_date, api):
         return ticker_list, df3
     
     # get close prices for the tickers
-    ticker_prices = yf.download(ticker_list, period='1d', interval='1d', prepost=True, rounding=True)['Close']
+    with metrics.span('http_request_seconds', host='yfinance'):
+        ticker_prices = yf.download(ticker_list, period='1d', interval='1d', prepost=True, rounding=True)['Close']
     # grap only the last row of the dataframe if there are multiple rows
     ticker_prices = ticker_prices.tail(1)
     # transpose the dataframe
@@ -78,37 +94,10 @@ def fetch_and_filter_dividends(selected_date, api):
     ticker_list = df3['ticker'].tolist()
     return ticker_list, df3
 
-def forcasting_preparation(df):
-    # todo: add a doc string
-    df = df.reset_index()
-    return df[['Date', 'Close']]
-        
-def forecast_data(data):
-    # todo: add a doc string
-    data = data.rename(columns={'Date': 'ds', 'Close': 'y'})
-    model = Prophet()
-    model.fit(data)
-    future = model.make_future_dataframe(periods=90, freq='D')
-    forecast = model.predict(future)
-    return forecast
-
-def process_forecasted_data(forecast_df):
-    df = forecast_df.copy()
-    # keep only needed columns in the forecast dataframe
-    df = df[['ds', 'yhat', 'yhat_lower', 'yhat_upper', 'trend']]  
-    # use savgol_filter
-    df['predicted_price'] = savgol_filter(df['yhat'], window_length=31, polyorder=2) 
-    df['upper_band'] = savgol_filter(df['yhat_upper'], window_length=31, polyorder=2)
-    df['lower_band'] = savgol_filter(df['yhat_lower'], window_length=31, polyorder=2)
-    return df 
-
-def get_upcoming_ex_dividends(api_key):
+def get_upcoming_ex_dividends():
     """
     Fetches and plots the upcoming ex-dividend dates for the current month.
 
-    Parameters:
-    api_key (str): API key for accessing the data source.
-
     Returns:
     plotly.graph_objs._figure.Figure: A bar plot of the upcoming ex-dividend dates.
     """
@@ -132,16 +121,9 @@ def get_upcoming_ex_dividends(api_key):
     # Calculate the end of the current month
     end_of_month = today.replace(day=28) + timedelta(days=4)
 
-    # Define the API endpoint with parameters for the date range
-    api_url = f"https://api.polygon.io/v3/reference/dividends?ex_dividend_date.gt={start_date_str}&ex_dividend_date.lt={end_of_month_str}&limit=1000&apiKey={api_key}"
-
-    # Send GET request to the API
-    response = requests.get(api_url)
-    # Convert the response to JSON
-    data = response.json()
-
-    # Create a DataFrame from the API response
-    df = pd.DataFrame(data['results'])
+    # Fetch every page of dividends in the date range
+    df = dividend_data_fetcher.fetch_dividends({'ex_dividend_date.gt': start_date_str, 'ex_dividend_date.lt': end_of_month_str,
+                                                'limit': 1000})
     if df.empty:
         print("No dividend data available for the given date range.")
         # Handle the scenario, possibly by loading data for a different date range.
@@ -170,124 +152,174 @@ def get_upcoming_ex_dividends(api_key):
 
     
 
+def ex_dividend_graph():
+    """
+    Returns the upcoming ex-dividend chart, fetching it at most once per cache ttl.
+    """
+    chart = ex_dividend_chart_cache.get(date.today(), get_upcoming_ex_dividends)
+    return dcc.Graph(id='Upcoming_exDividend_chart', figure=chart if chart is not None else {})
+
 #################### PAGE LAYOUT ####################
-layout = html.Div(children=[
-    html.Div(children=[
-        html.Br(),
-        html.H4(f'Dividend Yield Hunter {TODAYS_DATE}', style={'textAlign': 'center', 'margin': 10, 'padding': 0}),
-        html.Div(children=[
-            dcc.DatePickerSingle(id='user_date', date=TODAYS_DATE, display_format='YYYY-MM-DD'),
-        ], style={'margin': 30}),
+def layout():
+    """
+    Builds the page shell. The upcoming ex-dividend chart is fetched by update_output once
+    the shell is on screen, so loading the page never waits on Polygon.
+    """
+    return html.Div(children=[
         html.Div(children=[
-            html.Button('Find Dividends', id='find-button', className='btn btn-outline-dark', n_clicks=0, style={'margin': 10}),
-            html.Button('Clear Charts', id='clear-button', className='btn btn-outline-danger', n_clicks=0, style={'margin': 10}),
-        ], style={'display': 'flex', 'justifyContent': 'left', 'alignItems': 'left', 'flexDirection': 'row', 'margin': 20})
-    ]),
-    # html.Div(id='Upcoming_exDividend_chart_container', children=[
-    #     # insert a dcc.graph here
-    #     dcc.Loading(
-    #         id="circle",
-    #         type="graph", # This can be "graph", "cube", "circle", "dot", or "default"
-    #         children=dcc.Graph(id='Upcoming_exDividend_chart', figure=get_upcoming_ex_dividends(POLYGON_API))
-    #     )
-    # ], style={'display': 'flex', 'justifyContent': 'center', 'alignItems': 'center', 'flexDirection': 'column', 'margin': 20}),
-    dcc.Loading(
-        id="loading",
-        type="graph", # This can be "graph", "cube", "circle", "dot", or "default"
-        children=html.Div(id='container', children=[
-            dcc.Graph(id='Upcoming_exDividend_chart', figure=get_upcoming_ex_dividends(POLYGON_API))
-        ], style={'display': 'flex', 'justifyContent': 'center', 'alignItems': 'center', 'flexDirection': 'column', 'margin': 20})
-    ),
-])
+            html.Br(),
+            html.H4(f'Dividend Yield Hunter {date.today()}', style={'textAlign': 'center', 'margin': 10, 'padding': 0}),
+            html.Div(children=[
+                dcc.DatePickerSingle(id='user_date', date=date.today(), display_format='YYYY-MM-DD'),
+            ], style={'margin': 30}),
+            html.Div(children=[
+                html.Button('Find Dividends', id='find-button', className='btn btn-outline-dark', n_clicks=0, style={'margin': 10}),
+                html.Button('Clear Charts', id='clear-button', className='btn btn-outline-danger', n_clicks=0, style={'margin': 10}),
+            ], style={'display': 'flex', 'justifyContent': 'left', 'alignItems': 'left', 'flexDirection': 'row', 'margin': 20}),
+            # symbols forecast out of the candidates, shown while a scan runs
+            dbc.Progress(id='scan_progress', value=0, max=1, label='', striped=True, animated=True, style={'display': 'none'}),
+        ]),
+        html.Div(id='scan_stream', children=[], style={'display': 'none'}),
+        # html.Div(id='Upcoming_exDividend_chart_container', children=[
+        #     # insert a dcc.graph here
+        #     dcc.Loading(
+        #         id="circle",
+        #         type="graph", # This can be "graph", "cube", "circle", "dot", or "default"
+        #         children=dcc.Graph(id='Upcoming_exDividend_chart', figure=get_upcoming_ex_dividends())
+        #     )
+        # ], style={'display': 'flex', 'justifyContent': 'center', 'alignItems': 'center', 'flexDirection': 'column', 'margin': 20}),
+        dcc.Loading(
+            id="loading",
+            type="graph", # This can be "graph", "cube", "circle", "dot", or "default"
+            children=html.Div(id='container', children=[
+                dcc.Graph(id='Upcoming_exDividend_chart', figure={})
+            ], style={'display': 'flex', 'justifyContent': 'center', 'alignItems': 'center', 'flexDirection': 'column', 'margin': 20})
+        ),
+    ])
 
 @callback(
     [Output('container', 'children'), Output('find-button', 'n_clicks')],
-    [Input('clear-button', 'n_clicks'), Input('find-button', 'n_clicks'), Input('user_date', 'date')],
-    prevent_initial_call=True
+    [Input('clear-button', 'n_clicks')],
+    # the initial call loads the ex-dividend chart into the page shell
+    prevent_initial_call=False
 )
-def update_output(clear_clicks, find_clicks, date):
+def update_output(clear_clicks):
     # Determine which input was triggered
     ctx = callback_context
     if not ctx.triggered:
-        return no_update, no_update  # In case the callback was triggered without any of the specified inputs being clicked
-
-    # Get the ID of the button that triggered the callback
-    button_id = ctx.triggered[0]['prop_id'].split('.')[0]
-
-    # If the clear button was clicked, clear the charts and reset find button clicks
-    if button_id == 'clear-button':
-        chart = get_upcoming_ex_dividends(POLYGON_API)
-        return [dcc.Graph(id='Upcoming_exDividend_chart', figure=chart)], 0
-        
-    # If the find button was clicked, generate the graphs
-    elif button_id == 'find-button':
-        # If the find button has not been clicked, do not update the graphs
-        if find_clicks <= 0:
-            return no_update, no_update
-
-        # convert the date to a datetime object and format it
-        date = datetime.strptime(date, '%Y-%m-%d').date()
-        ticker_list, dataframe = fetch_and_filter_dividends(date, POLYGON_API)
-
-        # If there are no dividends tomorrow, do not update the graphs
-        if ticker_list:
-            buy_list = []
-
-            for symbol in ticker_list:
-                # set the symbol
-                stock_data_fetcher.set_ticker(symbol)
-                # fetch the data
-                data = stock_data_fetcher.fetch_data()
-                forcasting_prep = forcasting_preparation(data)
-                forecast = forecast_data(forcasting_prep)
-                processed_forecast = process_forecasted_data(forecast)
-                # check if price is less then the lower band
-                date = data.index[-1].strftime('%Y-%m-%d')
-                price = data.Close[-1]
-                lower_band = processed_forecast.query(f'ds == "{date}"')['lower_band'].values[0]
-                # # check if the price is below the lower band
-                if price < lower_band:
-                    # visualize the data
-                    # plotly_visualize_forecast(symbol, data, processed_forecast)
-                    # append symbol to the short list
-                    buy_list.append([symbol, data, processed_forecast])
-
-            # if there are no stocks to buy return a message
-            if not buy_list:
-                components_to_return = html.H3('There are no dividends opportunities', style={'textAlign': 'center', 'margin': 10, 'padding': 0, 'color': 'white'}), find_clicks
-                return components_to_return, find_clicks
-            
-            buy_df = dataframe[['cash_amount','ex_dividend_date','frequency','pay_date','ticker','close_Prices','percentage','yearly_percentage']]
-            # extract the symbols from the buy_list
-            symbols = [sub_list[0] for sub_list in buy_list]
-            # filter the buy_df for the symbols in the buy_list
-            buy_df = buy_df[buy_df['ticker'].isin(symbols)]
-            # create a column that contains the number of shares to buy based on 100$ investment
-            buy_df['num_shares_100'] = 100 / buy_df['close_Prices']
-            # convert to integer
-            buy_df['num_shares_100'] = buy_df['num_shares_100'].astype(int)
-            buy_df['purchase_cost'] = buy_df['num_shares_100'] * buy_df['close_Prices']
-            buy_df['next_div_pay'] = buy_df['num_shares_100'] * buy_df['cash_amount']
-            buy_df['yr_div_pay'] = buy_df['next_div_pay'] * buy_df['frequency']    
-
-            # Generate graphs for each item in the list
-            graphs = [create_chart(symbol) for symbol in buy_list]
-            # generate the yield table 
-            yield_table = create_table(buy_df)
-            
-            # Now append the yield_table_component to your graphs list or any other container list
-            # that you are using to return the layout components
-            components_to_return = graphs + [yield_table]
-        else:
-            components_to_return = html.H3('There are no dividends opportunities', style={'textAlign': 'center', 'margin': 10, 'padding': 0, 'color': 'white'})
-        # Make sure to return the correct number of outputs
-        return components_to_return, find_clicks
-    
-    # If the callback was not triggered by one of the buttons we're interested in
-    return no_update, no_update
+        # the page was just loaded, show the upcoming ex-dividends
+        return [ex_dividend_graph()], no_update
+    # the clear button was clicked, clear the charts and reset find button clicks
+    return [ex_dividend_graph()], 0
+
+# the scan runs in a job process started by the background callback manager, so it never
+# holds a web worker, and the Clear Charts button cancels it
+@callback(
+    Output('container', 'children', allow_duplicate=True),
+    Input('find-button', 'n_clicks'),
+    State('user_date', 'date'),
+    background=True,
+    manager=background_callback_manager,
+    running=[
+        (Output('find-button', 'disabled'), True, False),
+        (Output('scan_progress', 'style'), {'display': 'flex', 'margin': 20}, {'display': 'none'}),
+        # the results streamed in while the scan runs, replaced by the final results in 'container'
+        (Output('scan_stream', 'style'), SCAN_STREAM_STYLE, {'display': 'none'}),
+    ],
+    progress=[Output('scan_progress', 'value'), Output('scan_progress', 'max'), Output('scan_progress', 'label'), Output('scan_stream', 'children')],
+    cancel=[Input('clear-button', 'n_clicks')],
+    prevent_initial_call=True
+)
+def find_dividends(set_progress, find_clicks, date):
+    # If the find button has not been clicked, do not update the graphs
+    if not find_clicks:
+        return no_update
+    # a date that was already scanned is served from the disk cache
+    cache_key = f'scan {date} {FORECAST_ENGINE}'
+    components = scan_results_cache.get(cache_key)
+    if components is not None:
+        return components
+    # convert the date to a datetime object and format it
+    date = datetime.strptime(date, '%Y-%m-%d').date()
+    components, cacheable = scan_for_dividends(date, set_progress)
+    if cacheable:
+        scan_results_cache.set(cache_key, components, expire=SCAN_CACHE_TTL)
+    return components
+
+def scan_for_dividends(selected_date, set_progress):
+    """
+    Finds the stocks going ex-dividend on a date that trade below their forecast lower band.
+
+    The yield table of every candidate is streamed to the page as soon as the dividends and
+    prices are in, and each qualifying chart is added below it as its forecast completes,
+    in order of yearly_percentage.
 
+    Args:
+        selected_date (date): The ex-dividend date.
+        set_progress (callable): Takes (value, max, label, streamed components) for the
+                                 progress bar and the streamed results.
 
-def create_chart(symbol):
+    Returns:
+        tuple: (components, cacheable) - the yield table and charts, or a message, and
+               whether they can be cached for the date.
+    """
+    set_progress((0, 1, 'Fetching ex-dividends and prices', []))
+    ticker_list, dataframe = fetch_and_filter_dividends(selected_date)
+
+    # If there are no dividends on the date, there is nothing to scan
+    if not ticker_list:
+        # not cached, the list may have been empty because Polygon was unreachable
+        return html.H3('There are no dividends opportunities', style={'textAlign': 'center', 'margin': 10, 'padding': 0, 'color': 'white'}), False
+
+    buy_df = create_buy_df(dataframe)
+    # the candidates' table is shown while their history is downloaded and forecast
+    # the streamed components get their own ids, the hidden stream stays on the page next to the final results
+    streamed = {'table': create_table(buy_df, table_id='streamed_yield_table'), 'charts': {}, 'progress': (0, len(ticker_list), f'Downloading the price history of {len(ticker_list)} symbols')}
+    # charts are shown in the order of ticker_list, which is sorted by yearly_percentage
+    rank = {symbol: position for position, symbol in enumerate(ticker_list)}
+
+    def stream():
+        charts = [streamed['charts'][symbol] for symbol in sorted(streamed['charts'], key=rank.get)]
+        set_progress((*streamed['progress'], [streamed['table']] + charts))
+
+    def on_progress(done, total):
+        streamed['progress'] = (done, total, f'{done}/{total} symbols forecast')
+        stream()
+
+    def on_candidate(symbol, processed_forecast):
+        streamed['charts'][symbol] = create_chart([symbol, price_data[symbol], processed_forecast], id_prefix='streamed-graph')
+
+    stream()
+    # fetch the price history for every candidate with grouped downloads
+    price_data = stock_data_fetcher.fetch_many(ticker_list)
+    # forecast the candidates and keep the ones below their lower band
+    buy_forecasts = candidate_scanner.scan(price_data, on_progress=on_progress, on_candidate=on_candidate)
+
+    # if there are no stocks to buy return a message
+    if not buy_forecasts:
+        return html.H3('There are no dividends opportunities', style={'textAlign': 'center', 'margin': 10, 'padding': 0, 'color': 'white'}), True
+
+    # keep only the qualifying symbols in the final table
+    buy_df = buy_df[buy_df['ticker'].isin(buy_forecasts)]
+    charts = [create_chart([symbol, price_data[symbol], buy_forecasts[symbol]]) for symbol in sorted(buy_forecasts, key=rank.get)]
+    return [create_table(buy_df)] + charts, True
+
+def create_buy_df(dataframe):
+    """
+    Adds the cost and dividend pay of a $100 position to the candidates' yields.
+    """
+    buy_df = dataframe[['cash_amount','ex_dividend_date','frequency','pay_date','ticker','close_Prices','percentage','yearly_percentage']].copy()
+    # create a column that contains the number of shares to buy based on 100$ investment
+    buy_df['num_shares_100'] = 100 / buy_df['close_Prices']
+    # convert to integer
+    buy_df['num_shares_100'] = buy_df['num_shares_100'].astype(int)
+    buy_df['purchase_cost'] = buy_df['num_shares_100'] * buy_df['close_Prices']
+    buy_df['next_div_pay'] = buy_df['num_shares_100'] * buy_df['cash_amount']
+    buy_df['yr_div_pay'] = buy_df['next_div_pay'] * buy_df['frequency']
+    return buy_df
+
+
+def create_chart(symbol, id_prefix='graph'):
     # Placeholder for creating a chart component based on the symbol
     # You would replace this with your actual chart creation code that uses the symbol
     # unpack the symbol list
@@ -296,7 +328,7 @@ def create_chart(symbol):
     fig = plotly_visualize_forecast(symbol, data, processed_forecast)
 
     return dcc.Graph(
-        id=f'graph-{symbol}',
+        id=f'{id_prefix}-{symbol}',
         figure=fig
     )
 
@@ -346,9 +378,9 @@ def plotly_visualize_forecast(symbol, data, forcast_processed, width=1200, heigh
     fig.add_trace(go.Scatter(x=forcast_processed.ds, y=forcast_processed.lower_band, line=dict(color='#1E82CD', width=2), name='lower_band'))
     return fig
 
-def create_table(df):
+def create_table(df, table_id='yield_table'):
     return dash_table.DataTable(
-        id='yield_table',
+        id=table_id,
                     columns=[
                         {
                             "name": i, 
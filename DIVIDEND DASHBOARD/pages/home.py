@@ -4,22 +4,24 @@ import plotly.express as px
 import pandas as pd
 import datetime as datetime
 import numpy as np
+from files.WorkbookLoader import WorkbookLoader
 
 #################### CONSTANTS ####################
 MONEY_FORMAT = dash_table.FormatTemplate.money(2)
 PERCENTAGE_FORMAT = dash_table.FormatTemplate.percentage(2)
-# get the current date and time
-CURRENT_TIME = datetime.datetime.now()
-# reformat to not show microseconds
-CURRENT_TIME = CURRENT_TIME.strftime("%Y-%m-%d %H:%M:%S")
 # excel file path
 EXCEL_FILE = 'data/Dividend_Dashboard.xlsx'
+# columns of the current holdings table
+HOLDINGS_COLUMNS = ['Ticker', 'Date Op.', 'Shares', 'Close' , 'Pur. Price', 'Exit Price', 'Amt. Paid', 'Pos. Value', 'G/L ($)', 'G/L (%)', 'Div. Earned']
+
+############### Object Instantiation ###############
+workbook_loader = WorkbookLoader(EXCEL_FILE)
 
 #################### FUNCTIONS ####################
 def get_yr_div_profits(sheet_names):
     yr_div_profits = {}
     for sheet in sheet_names:
-        data = pd.read_excel(EXCEL_FILE, sheet_name=sheet)
+        data = workbook_loader.read_sheet(sheet)
         div_profits = round(data['Amount'].sum(), 2)
         yr_div_profits[sheet] = div_profits
     df = pd.DataFrame.from_dict(yr_div_profits, orient='index', columns=['Amount'])
@@ -27,9 +29,9 @@ def get_yr_div_profits(sheet_names):
 
 def get_current_holdings():
     #  read in the current holdings sheet
-    c_holdings_df = pd.read_excel(EXCEL_FILE, sheet_name='current_holdings')
+    c_holdings_df = workbook_loader.read_sheet('current_holdings')
     #  keep only the columns we need
-    c_holdings_df = c_holdings_df[['Ticker', 'Date Op.', 'Shares', 'Close' , 'Pur. Price', 'Exit Price', 'Amt. Paid', 'Pos. Value', 'G/L ($)', 'G/L (%)', 'Div. Earned']]
+    c_holdings_df = c_holdings_df[HOLDINGS_COLUMNS]
     # rounding the values to 2 decimal places
     c_holdings_df = c_holdings_df.round(2)
     # convert the shares to int type
@@ -42,7 +44,7 @@ def get_current_holdings():
 
 # get the dividends paid by month
 def sum_dividends_by_month():
-    data = pd.read_excel(EXCEL_FILE, sheet_name='2023')
+    data = workbook_loader.read_sheet('2023')
     data = data[['Month', 'Amount']]
     # Define the order for the months
     months_order = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
@@ -125,11 +127,12 @@ def load_and_preprocess_data(filepath):
     Returns:
     tuple: A tuple containing preprocessed dataframes.
     """
-    # Read data from Excel file
-    closed_trades_df = pd.read_excel(filepath, sheet_name='closed_trades')
-    div_paid_2023_df = pd.read_excel(filepath, sheet_name='2023')
-    div_paid_2022_df = pd.read_excel(filepath, sheet_name='2022')
-    div_paid_2021_df = pd.read_excel(filepath, sheet_name='2021')
+    # Read data from the parsed workbook
+    loader = WorkbookLoader(filepath)
+    closed_trades_df = loader.read_sheet('closed_trades')
+    div_paid_2023_df = loader.read_sheet('2023')
+    div_paid_2022_df = loader.read_sheet('2022')
+    div_paid_2021_df = loader.read_sheet('2021')
 
     # Preprocess closed trades data
     closed_trades_df = preprocess_data(closed_trades_df)
@@ -210,106 +213,120 @@ def plot_yearly_dividends(df):
 
 dash.register_page(__name__, path='/', name='Home 🤑')
 
-#################### LOAD DATA ####################
-div_profits_df = get_yr_div_profits(['2021', '2022', '2023'])
-cur_holdings_df = get_current_holdings()
-cur_dividends_paid_df = sum_dividends_by_month()
-
-filepath = './data/Dividend_Dashboard.xlsx'
-div_paid_df = load_and_preprocess_data(filepath)
-# Calculate cumulative growth
-cumulative_growth_df = calculate_cumulative_growth(div_paid_df)
-
-# Prepare and plot yearly dividends
-div_paid_yearly_df = cumulative_growth_df.groupby(pd.Grouper(freq='Y')).sum()
-div_paid_yearly_df.index = div_paid_yearly_df.index.year
-
 #################### PAGE LAYOUT ####################
-layout = html.Div(children=[
-    html.Div(children=[
-        html.Br(),
-        html.Div(children=[
-            dcc.Graph(figure=create_bar_chart(div_profits_df)),
-            dcc.Graph(figure=create_line_chart(cur_dividends_paid_df))
-        ], style={'textAlign': 'center', 'display': 'flex', 'justifyContent': 'center', 'alignItems': 'center', 'flexDirection': 'row'}),
-        html.Div(children=[
-            dcc.Graph(figure = plot_cumulative_growth(cumulative_growth_df)),
-            dcc.Graph(figure = plot_yearly_dividends(div_paid_yearly_df)),
-        ], style={'textAlign': 'center', 'display': 'flex', 'justifyContent': 'center', 'alignItems': 'center', 'flexDirection': 'row'}),
+def layout():
+    """
+    Builds the page shell. The charts and the holdings table are filled in by the
+    callbacks once the shell is on screen, so importing the page does not parse the workbook.
+    """
+    return html.Div(children=[
         html.Div(children=[
-            html.Div([
-                html.H4('Current Holdings', style={'paddingLeft': '25px'}),
-                html.H6(f'(Last updated {CURRENT_TIME})', id='last_update', style={'paddingLeft': '10px', 'paddingTop': '15px'}),
-            ], style={'font-family': 'Rockwell, serif', 'textAlign': 'left', 'display': 'flex', 'justifyContent': 'left', 'alignItems': 'left', 'flexDirection': 'row'}),
-            dash_table.DataTable(
-                id='curr_holdings_table',
-                columns=[
-                    {
-                        "name": i, 
-                        "id": i,
-                        "type": "numeric",
-                        "format": MONEY_FORMAT if i in ['Close', 'Pur. Price', 'Exit Price', 'Amt. Paid', 'Pos. Value', 'G/L ($)', 'Div. Earned'] else
-                                  PERCENTAGE_FORMAT if i == 'G/L (%)' else None 
-                     } for i in cur_holdings_df.columns],
-                data=cur_holdings_df.to_dict('records'),
-                cell_selectable=False,
-                sort_action='native',
-                filter_action='native',
-                style_header={'textAlign': 'center', 'backgroundColor': '#1E1E1E', 'fontWeight': 'bold', 'color': 'white'},
-                style_filter={'backgroundColor': '#FFEB9C', 'fontWeight': 'bold', 'color': '#9C5700'},
-                style_cell_conditional=[
-                    {
-                        'if': { 'column_id': ['Ticker', 'Shares'] },
-                        'textAlign': 'center'
-                    }
-                ],
-                style_data_conditional=[
-                    {
-                        'if': {'row_index': 'odd'},
-                        'backgroundColor': '#1E1E1E',
-                        'color': 'white',
-                        'fontWeight': 'bold'
-                    },
-                    {
-                        'if': {'row_index': 'even'},
-                        'backgroundColor': '#adaaaa',  # A light grey for even rows
-                        'color': 'black',
-                        'fontWeight': 'bold'
-                    },
-                    # Odd rows with G/L ($) greater than 0
-                    {
-                        'if': {
-                            'filter_query': '{G/L ($)} > 0',
-                            'row_index': 'odd',
+            html.Br(),
+            html.Div(children=[
+                dcc.Graph(id='div_profits_chart', figure={}),
+                dcc.Graph(id='monthly_dividends_chart', figure={})
+            ], style={'textAlign': 'center', 'display': 'flex', 'justifyContent': 'center', 'alignItems': 'center', 'flexDirection': 'row'}),
+            html.Div(children=[
+                dcc.Graph(id='cumulative_growth_chart', figure={}),
+                dcc.Graph(id='yearly_dividends_chart', figure={}),
+            ], style={'textAlign': 'center', 'display': 'flex', 'justifyContent': 'center', 'alignItems': 'center', 'flexDirection': 'row'}),
+            html.Div(children=[
+                html.Div([
+                    html.H4('Current Holdings', style={'paddingLeft': '25px'}),
+                    html.H6('', id='last_update', style={'paddingLeft': '10px', 'paddingTop': '15px'}),
+                ], style={'font-family': 'Rockwell, serif', 'textAlign': 'left', 'display': 'flex', 'justifyContent': 'left', 'alignItems': 'left', 'flexDirection': 'row'}),
+                dash_table.DataTable(
+                    id='curr_holdings_table',
+                    columns=[
+                        {
+                            "name": i, 
+                            "id": i,
+                            "type": "numeric",
+                            "format": MONEY_FORMAT if i in ['Close', 'Pur. Price', 'Exit Price', 'Amt. Paid', 'Pos. Value', 'G/L ($)', 'Div. Earned'] else
+                                      PERCENTAGE_FORMAT if i == 'G/L (%)' else None 
+                         } for i in HOLDINGS_COLUMNS],
+                    data=[],
+                    cell_selectable=False,
+                    sort_action='native',
+                    filter_action='native',
+                    style_header={'textAlign': 'center', 'backgroundColor': '#1E1E1E', 'fontWeight': 'bold', 'color': 'white'},
+                    style_filter={'backgroundColor': '#FFEB9C', 'fontWeight': 'bold', 'color': '#9C5700'},
+                    style_cell_conditional=[
+                        {
+                            'if': { 'column_id': ['Ticker', 'Shares'] },
+                            'textAlign': 'center'
+                        }
+                    ],
+                    style_data_conditional=[
+                        {
+                            'if': {'row_index': 'odd'},
+                            'backgroundColor': '#1E1E1E',
+                            'color': 'white',
+                            'fontWeight': 'bold'
                         },
-                        'backgroundColor': '#00B050',  # A darker green background for odd rows
-                        'color': '#115910',
-                        'fontWeight': 'bold'
-                    },
-                    # Even rows with G/L ($) greater than 0
-                    {
-                        'if': {
-                            'filter_query': '{G/L ($)} > 0',
-                            'row_index': 'even',
+                        {
+                            'if': {'row_index': 'even'},
+                            'backgroundColor': '#adaaaa',  # A light grey for even rows
+                            'color': 'black',
+                            'fontWeight': 'bold'
                         },
-                        'backgroundColor': '#D9EAD3',  # A lighter green background for even rows
-                        'color': '#115910',
-                        'fontWeight': 'bold'
-                    },
-                ],
-                style_as_list_view=False,
-                style_table={'overflowX': 'scroll', 'width': '100%'}, 
+                        # Odd rows with G/L ($) greater than 0
+                        {
+                            'if': {
+                                'filter_query': '{G/L ($)} > 0',
+                                'row_index': 'odd',
+                            },
+                            'backgroundColor': '#00B050',  # A darker green background for odd rows
+                            'color': '#115910',
+                            'fontWeight': 'bold'
+                        },
+                        # Even rows with G/L ($) greater than 0
+                        {
+                            'if': {
+                                'filter_query': '{G/L ($)} > 0',
+                                'row_index': 'even',
+                            },
+                            'backgroundColor': '#D9EAD3',  # A lighter green background for even rows
+                            'color': '#115910',
+                            'fontWeight': 'bold'
+                        },
+                    ],
+                    style_as_list_view=False,
+                    style_table={'overflowX': 'scroll', 'width': '100%'}, 
+                )
+            ], style={'textAlign': 'center', 'display': 'flex', 'justifyContent': 'left', 'alignItems': 'left', 'flexDirection': 'column'}),
+            dcc.Interval(
+                id='interval-component',
+                interval=30*60*1000, # in milliseconds = 5 minutes
+                n_intervals=0
             )
-        ], style={'textAlign': 'center', 'display': 'flex', 'justifyContent': 'left', 'alignItems': 'left', 'flexDirection': 'column'}),
-        dcc.Interval(
-            id='interval-component',
-            interval=30*60*1000, # in milliseconds = 5 minutes
-            n_intervals=0
-        )
+        ])
     ])
-])
 
 #################### CALLBACKS ####################
+# Callback to draw the charts after the page shell has rendered
+@callback(
+    Output('div_profits_chart', 'figure'),
+    Output('monthly_dividends_chart', 'figure'),
+    Output('cumulative_growth_chart', 'figure'),
+    Output('yearly_dividends_chart', 'figure'),
+    Input('interval-component', 'n_intervals')
+)
+def update_charts(n):
+    # the workbook is only parsed again when it was saved since the last load
+    div_profits_df = get_yr_div_profits(['2021', '2022', '2023'])
+    cur_dividends_paid_df = sum_dividends_by_month()
+
+    div_paid_df = load_and_preprocess_data(EXCEL_FILE)
+    # Calculate cumulative growth
+    cumulative_growth_df = calculate_cumulative_growth(div_paid_df)
+
+    # Prepare and plot yearly dividends
+    div_paid_yearly_df = cumulative_growth_df.groupby(pd.Grouper(freq='Y')).sum()
+    div_paid_yearly_df.index = div_paid_yearly_df.index.year
+    return (create_bar_chart(div_profits_df), create_line_chart(cur_dividends_paid_df),
+            plot_cumulative_growth(cumulative_growth_df), plot_yearly_dividends(div_paid_yearly_df))
+
 @callback(
     Output('curr_holdings_table', 'data'),
     Output('last_update', 'children'),
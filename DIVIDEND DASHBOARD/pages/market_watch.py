@@ -1,35 +1,39 @@
 import dash
 import os
-import pickle
-import requests
 import pandas as pd
 import yfinance as yf
 import plotly.graph_objects as go
-from dash import html, dcc, Input, Output, State, callback, dash_table 
+from dash import html, dcc, Input, Output, State, callback, callback_context, dash_table, no_update
 from plotly.subplots import make_subplots
 from datetime import date
 from dotenv import load_dotenv
 from files.TradingBotController import TradingBotController
-from files.StockDataFetcher import StockDataFetcher
-from files.CryptoDataFetcher import CryptoDataFetcher
-from files.MT4DataFetcher import MT4DataFetcher
-from files.ForecastProcessor import ForecastProcessor
-from files.DataProcessor import DataProcessor
+from files.MT4FileWatcher import MT4FileWatcher
+from files.ChartPipeline import ChartPipeline
+from files.ForecastScheduler import ForecastScheduler
+from files.MergedDataStore import MergedDataStore
 from files.DataVisualizer import DataVisualizer
+from files.FigureCache import FigureCache
+from files.TTLCache import TTLCache
+from files.DividendDataFetcher import DividendDataFetcher
+from files.WorkbookLoader import WorkbookLoader
+from files.Metrics import metrics
+from files.BackgroundServices import background_services
+from files.AutotradeState import AutotradeState
+from files.AutotradeSignalDaemon import AutotradeSignalDaemon
 
 load_dotenv('.env')
 
 #################### Object Instantiation ####################
 bot_controller = TradingBotController()
-stock_data_fetcher = StockDataFetcher()
-crypto_data_fetcher = CryptoDataFetcher()
-mt4_data_fetcher = MT4DataFetcher()
+dividend_data_fetcher = DividendDataFetcher(os.environ.get('POLYGON_IO_API'))
 #################### FUNCTIONS ####################
 
 def download_market_data(tickers, period='1y', interval='1d'):
     """Downloads historical market data for given tickers."""
     try:
-        return yf.download(tickers, period=period, interval=interval, group_by='ticker', rounding=True)
+        with metrics.span('http_request_seconds', host='yfinance'):
+            return yf.download(tickers, period=period, interval=interval, group_by='ticker', rounding=True)
     except Exception as e:
         print(f"Error downloading data: {e}")
         return None
@@ -105,7 +109,7 @@ def create_indices_charts(tickers=['^VIX', '^GSPC', 'CL=F', 'GC=F'], period='1y'
 
 def load_and_combine_tickers(CRYPTO_TICKERS, MT4_TICKERS, ETF_TICKERS):
     # get the Ticker column from the dividend excel file
-    dividend_tickers = pd.read_excel('data/Dividend_Dashboard.xlsx', sheet_name='current_holdings', usecols='G') 
+    dividend_tickers = WorkbookLoader('data/Dividend_Dashboard.xlsx').read_sheet('current_holdings')[['Ticker']]
     # convert divedend tickers to a list
     dividend_tickers = dividend_tickers['Ticker'].tolist()
     # sort the list
@@ -128,106 +132,79 @@ def getAdjustedSymbolNameForChart(symbol):
         return TICKER_DICT[symbol]
     return symbol
 
-def process_stock_data(symbol):
-    print('\nprocessing daily stock', symbol)
-    # set the ticker
-    stock_data_fetcher.set_ticker(symbol)
-    # fetch the data
-    data = stock_data_fetcher.fetch_data()
-    # prepare the data for prophet
-    prep_data = DataProcessor.prepare_data_for_prophet(data)
-    # forecast the data 
-    forecast = ForecastProcessor.prophet_forecast(prep_data)
-    processed_forecast = DataProcessor.process_prophet_forecast(forecast)
-    # merge the dataframes 
-    MERGED_DATA[symbol] = DataProcessor.merge_dataframes_for_prophet(data, processed_forecast)
-    # slice the merged data using the num_bars as a percentage
-    stock_slice_df = splice_data(MERGED_DATA[symbol], 100)
-    return create_chart_figure(stock_slice_df, symbol, 'Daily')
-
-def process_crypto_data(symbol, timeframe):
-    print(f'\nprocessing {timeframe} crypto', symbol)
-    # Choose the appropriate period based on the timeframe
-    period = '1hour' if timeframe == '1hour' else '1day'
-    freq = 'H' if timeframe == '1hour' else 'D'
-    # set the symbol
-    crypto_data_fetcher.set_symbol(symbol)
-    # fetch the data
-    crypto_df = crypto_data_fetcher.fetch_data(period=period)
-    # prepare the data for prophet
-    prep_data = DataProcessor.prepare_data_for_prophet(crypto_df)
-    # forecast the data 
-    forecast = ForecastProcessor.prophet_forecast(prep_data, freq=freq)
-    # process the forecasted data 
-    processed_forecast = DataProcessor.process_prophet_forecast(forecast)
-    # merge the dataframes
-    MERGED_DATA[symbol] = DataProcessor.merge_dataframes_for_prophet(crypto_df, processed_forecast) 
-    if timeframe == '1hour':
-        # For hourly data, slice to show the last 291 rows
-        crypto_slice_df = MERGED_DATA[symbol].iloc[-291:]
-    else:
-        # For daily data, use splice_data function
-        crypto_slice_df = splice_data(MERGED_DATA[symbol], 100)
-    return create_chart_figure(crypto_slice_df, symbol, timeframe)
-
-def process_mt4_data(symbol):
-    print('\nprocessing mt4', symbol)
-    # set the symbol
-    mt4_data_fetcher.set_symbol(symbol)
-    timeframe = 'Daily'
-    freq = 'D'
-    mt4_data = mt4_data_fetcher.fetch_data()
-    # prepare the data for prophet
-    prep_data = DataProcessor.prepare_data_for_prophet(mt4_data)
-    # forecast the data 
-    forecast = ForecastProcessor.prophet_forecast(prep_data, freq=freq)
-    # process the forecasted data 
-    processed_forecast = DataProcessor.process_prophet_forecast(forecast)
-    # merge the dataframes
-    MERGED_DATA[symbol] = DataProcessor.merge_dataframes_for_prophet(mt4_data, processed_forecast)
-    # slice the merged data using the num_bars as a percentage
-    mt4_slice_df = splice_data(MERGED_DATA[symbol], 100)
-    return create_chart_figure(mt4_slice_df, symbol, timeframe)
-
 def create_chart_figure(data_slice, symbol, timeframe):
     chart_symbol_title = getAdjustedSymbolNameForChart(symbol)
-    fig = DataVisualizer.create_candlestick_chart(data_slice, chart_symbol_title, timeframe)
+    # aggregate the candles and downsample the lines so the figure size stays bounded
+    fig = DataVisualizer.create_candlestick_chart(data_slice, chart_symbol_title, timeframe, max_points=CHART_MAX_POINTS)
     return fig
 
-def process_chart_pipeline(symbol, show_hourly_chart=False):
-    if symbol in CRYPTO_TICKERS:
-        timeframe = '1hour' if show_hourly_chart else '1day'
-        return process_crypto_data(symbol, timeframe)
-    elif symbol in MT4_SYMBOLS:
-        return process_mt4_data(symbol)
-    else:
-        return process_stock_data(symbol)
+def relayout_x_range(relayout_data):
+    """
+    Returns the (start, end) x range of a zoom or pan from the chart's relayoutData, or None.
+    """
+    if not relayout_data:
+        return None
+    if 'xaxis.range[0]' in relayout_data and 'xaxis.range[1]' in relayout_data:
+        return relayout_data['xaxis.range[0]'], relayout_data['xaxis.range[1]']
+    if 'xaxis.range' in relayout_data:
+        return tuple(relayout_data['xaxis.range'][:2])
+    return None
+
+def slice_x_range(df, x_range):
+    # pad the range by half its width on each side so short pans still show data
+    start, end = pd.Timestamp(x_range[0]), pd.Timestamp(x_range[1])
+    if df.index.tz is not None:
+        start, end = start.tz_localize(df.index.tz), end.tz_localize(df.index.tz)
+    pad = (end - start) / 2
+    return df.loc[start - pad:end + pad]
+
+def process_chart_pipeline(symbol, show_hourly_chart=False, x_range=None):
+    with metrics.span('chart_stage_seconds', stage='total'):
+        # put the symbol on screen first in the background scheduler's passes
+        forecast_scheduler.prioritize(symbol, show_hourly_chart)
+        timeframe = chart_pipeline.timeframe_for(symbol, show_hourly_chart)
+        # read the precomputed data, building it here only if the scheduler has not got to it yet
+        version, merged_df = forecast_scheduler.result(symbol, timeframe)
+        metrics.cache_result('scheduler', 'miss' if merged_df is None else 'hit')
+        if merged_df is None:
+            timeframe, merged_df = chart_pipeline.merged_data(symbol, show_hourly_chart)
+            version = forecast_scheduler.publish(symbol, timeframe, merged_df)
+        # reuse the serialized figure until the published data changes
+        figure_key = FigureCache.make_key(symbol, timeframe, merged_df, view=(x_range, CHART_MAX_POINTS), version=version)
+        figure = figure_cache.get(figure_key)
+        if figure is not None:
+            return figure
+        if x_range is not None:
+            # zoomed in: redraw only the visible range, at full resolution once it is short enough
+            slice_df = slice_x_range(merged_df, x_range)
+        elif timeframe == '1hour':
+            # For hourly data, slice to show the last 291 rows
+            slice_df = merged_df.iloc[-291:]
+        else:
+            # For daily data, use splice_data function
+            slice_df = splice_data(merged_df, 100)
+        with metrics.span('chart_stage_seconds', stage='figure'):
+            fig = create_chart_figure(slice_df, symbol, timeframe)
+        return figure_cache.put(figure_key, fig)
         
 
-def fetch_dividend_data(ticker, api_key):
+def fetch_dividend_data(ticker):
     """
     Fetches the dividend data for a given stock ticker using the Polygon API.
 
     Parameters:
     ticker (str): The stock ticker symbol.
-    api_key (str): Your Polygon API key.
 
     Returns:
     DataFrame: A DataFrame containing dividend information.
     """
-    # Format the URL for the API request, including the ticker symbol and API key
-    url = f'https://api.polygon.io/v3/reference/dividends?ticker={ticker}&limit=1&apiKey={api_key}'
+    # only the latest dividend is needed, so do not follow the pages
+    dividend_df = dividend_data_fetcher.fetch_dividends({'ticker': ticker, 'limit': 1}, paginate=False)
 
-    # Make a GET request to the API and parse the JSON response
-    response = requests.get(url).json()
-
-    # Check if the response contains results and return an empty DataFrame if not
-    if not response.get('results'):
+    # return an empty DataFrame if there are no results
+    if dividend_df.empty:
         return pd.DataFrame()
 
-    # Convert the extracted data into a Pandas DataFrame
-    dividend_df = pd.DataFrame(response['results'])
-
     # Select and retain only the specified columns in the DataFrame
     dividend_df = dividend_df[['ticker', 'cash_amount', 'ex_dividend_date', 'frequency', 'pay_date']]
 
@@ -235,7 +212,7 @@ def fetch_dividend_data(ticker, api_key):
 
 def create_table(ticker):
     try:
-        table_df = fetch_dividend_data(ticker, POLYGON_API_KEY)
+        table_df = fetch_dividend_data(ticker)
     except:
         table_df = pd.DataFrame()
     return dash_table.DataTable(
@@ -285,7 +262,23 @@ TODAYS_DATE = date.today()
 POLYGON_API_KEY = os.environ.get('POLYGON_IO_API')
 ALPHAVANTAGE_API_KEY = os.environ.get('ALPHAVANTAGE_CO_API')
 MONEY_FORMAT = dash_table.FormatTemplate.money(2)
-MERGED_DATA = {}
+# the most candles and line points a chart sends to the browser
+CHART_MAX_POINTS = int(os.environ.get('CHART_MAX_POINTS', 500))
+# megabytes of serialized chart figures kept in memory
+FIGURE_CACHE_MB = int(os.environ.get('FIGURE_CACHE_MB', 64))
+# megabytes of merged chart data kept on disk for every worker, and decoded in each worker's memory
+MERGED_STORE_MB = int(os.environ.get('MERGED_STORE_MB', 512))
+MERGED_MEMORY_MB = int(os.environ.get('MERGED_MEMORY_MB', 128))
+# worker processes and seconds between passes of the background forecast scheduler
+FORECAST_WORKERS = int(os.environ.get('FORECAST_WORKERS', 2))
+FORECAST_INTERVAL = int(os.environ.get('FORECAST_INTERVAL', 15*60))
+# 'prophet' or the NumPy 'band' engine
+FORECAST_ENGINE = os.environ.get('FORECAST_ENGINE', 'prophet')
+# 'internal' runs the autotrade signal daemon in the dashboard, 'external' leaves it to autotrade_daemon.py
+AUTOTRADE_DAEMON = os.environ.get('AUTOTRADE_DAEMON', 'internal')
+# how the daemon's signal outcomes are shown under the autotrade button
+AUTOTRADE_STATUS_TEXT = {'sent': ', sent to the bot', 'suppressed': ', not sent, the bot was already in that state',
+                         'invalid': ', not sent'}
 # Map of ticker symbols to human-readable names
 TICKER_TO_NAME_MAP = {
     '^VIX': 'VIX Volatility Index',
@@ -295,107 +288,230 @@ TICKER_TO_NAME_MAP = {
 }
 
 
+#################### BACKGROUND WORK ####################
+chart_pipeline = ChartPipeline(CRYPTO_TICKERS, MT4_SYMBOLS, engine=FORECAST_ENGINE)
+figure_cache = FigureCache(max_bytes=FIGURE_CACHE_MB*1024*1024)
+# the merged chart data, shared by every server worker through memory-mapped files
+merged_data_store = MergedDataStore(max_bytes=MERGED_STORE_MB*1024*1024, memory_bytes=MERGED_MEMORY_MB*1024*1024)
+# the indices chart is downloaded at most once per interval-component tick
+indices_chart_cache = TTLCache(ttl=15*60, name='indices_chart')
+# keep every watchlist chart precomputed, plus the hourly crypto charts
+forecast_scheduler = ForecastScheduler(CRYPTO_TICKERS, MT4_SYMBOLS,
+                                       jobs=[(ticker, False) for ticker in TICKERS] + [(ticker, True) for ticker in CRYPTO_TICKERS],
+                                       max_workers=FORECAST_WORKERS, interval=FORECAST_INTERVAL, engine=FORECAST_ENGINE,
+                                       store=merged_data_store)
+
+def on_mt4_file_change(symbol, period):
+    print(f'\nmt4 file changed: {symbol} {period}')
+    # recompute only the symbol whose file changed
+    if symbol in MT4_SYMBOLS and period == chart_pipeline.mt4_data_fetcher.period:
+        forecast_scheduler.submit(symbol, priority=ForecastScheduler.PRIORITY_CHANGED)
+
+mt4_file_watcher = MT4FileWatcher(chart_pipeline.mt4_data_fetcher.base_path, on_change=on_mt4_file_change)
+
+def start_background_services():
+    forecast_scheduler.start()
+    mt4_file_watcher.start()
+
+# started by app.py or the WSGI server in one process only, never on import
+background_services.register('market_watch', start_background_services)
+
+# the autotrade settings written by this page and the signals written by the daemon
+autotrade_state = AutotradeState()
+if AUTOTRADE_DAEMON == 'internal':
+    autotrade_daemon = AutotradeSignalDaemon(chart_pipeline, bot_controller, state=autotrade_state, store=merged_data_store)
+    background_services.register('autotrade_daemon', autotrade_daemon.start)
+
 dash.register_page(__name__, path='/market_watch', name='Market Watch 📈')
 
+def autotrade_label(autotrade_on):
+    if autotrade_on:
+        return [html.P('Autotrade is On', style={'color': 'green'})]
+    return [html.P('Autotrade is Off', style={'color': 'red'})]
+
+def bot_messages_label(settings):
+    # which bot messages the daemon will send, and whether it can read them
+    labels = []
+    for name, field in (('Start', 'buy_message'), ('Stop', 'sell_message')):
+        if not settings[field]:
+            labels.append(html.P(f'{name} message not saved', style={'color': 'red'}))
+            continue
+        try:
+            TradingBotController.parse_message(settings[field])
+        except ValueError as e:
+            labels.append(html.P(f'{name} message saved, but {e}', style={'color': 'red'}))
+            continue
+        labels.append(html.P(f'{name} message saved', style={'color': 'green'}))
+    return labels
+
 #################### PAGE LAYOUT ####################
-layout = html.Div(children=[
-        html.Br(),
-        html.Div(children=[
-            dcc.Graph(figure=create_indices_charts()),
-        ], style={'textAlign': 'center', 'display': 'flex', 'justifyContent': 'center', 'alignItems': 'center', 'flexDirection': 'column', 'width': '100%'}),
-        html.Hr(style={'color': 'white'}),
-        dcc.Loading(id='loading_chart', children=[
-            html.Div([
+def layout():
+    """
+    Builds the page shell. The market indices chart is downloaded by update_indices_chart
+    once the shell is on screen, so loading the page never waits on Yahoo.
+    """
+    return html.Div(children=[
+            html.Br(),
+            html.Div(children=[
+                dcc.Loading(dcc.Graph(id='indices_chart', figure={}), type='circle'),
+            ], style={'textAlign': 'center', 'display': 'flex', 'justifyContent': 'center', 'alignItems': 'center', 'flexDirection': 'column', 'width': '100%'}),
+            html.Hr(style={'color': 'white'}),
+            dcc.Loading(id='loading_chart', children=[
                 html.Div([
-                    html.H4('Select Ticker:', style={'width': '100%'}),
-                    dcc.Dropdown(id='ticker_dropdown', 
-                                options=[{'label': TICKER_DICT[ticker], 'value': ticker} if ticker in TICKER_DICT else {'label': ticker, 'value': ticker} for ticker in TICKERS],
-                                value=TICKERS[0], clearable=False, persistence=True, persisted_props=['value'], persistence_type='local'
-                                ),
-                    html.Br(),
-                    html.H4('Select TimeFrame:', style={'width': '100%'}),
-                    dcc.Dropdown(id='timeframe_dropdown', 
-                                options=[{'label': 'Daily', 'value': 'Daily'}, {'label': 'Hourly', 'value': 'Hourly'}],
-                                value='Daily', clearable=False, persistence=True, persisted_props=['value'], 
-                                persistence_type='local'
-                                ),
-                    html.Br(),            
-                    
-                    # Wrapped BUY and SELL sections in a Div with an id 'bot_info'
-                    html.Div(id='bot_info', children=[
-                        html.Br(),
-                        html.H4('Start Bot Message:', style={'width': '100%', 'color': 'green'}),
-                        dcc.Textarea(id='buy_textarea', value='', placeholder='Enter Message to Start Bot', style={'width': '100%', 'height': '150px', 'resize': 'none', 'textAlign': 'left', 'display': 'flex', 'justifyContent': 'center', 'alignItems': 'center', 'flexDirection': 'column'}),
-                        html.Br(),
-                        html.H4('Stop Bot Message:', style={'width': '100%', 'color': 'red'}),
-                        dcc.Textarea(id='sell_textarea', value='', placeholder='Enter Message to Stop Bot', style={'width': '100%', 'height': '150px', 'resize': 'none', 'textAlign': 'left', 'display': 'flex', 'justifyContent': 'center', 'alignItems': 'center', 'flexDirection': 'column'}),
-                        html.Br(),
-                        html.Button(id='autotrade_button', className='btn btn-outline-dark', children='Autotrade', n_clicks=0, style={'width': '100%', 'height': '50px', 'textAlign': 'center', 'display': 'flex', 'justifyContent': 'center', 'alignItems': 'center', 'flexDirection': 'column'}),
+                    html.Div([
+                        html.H4('Select Ticker:', style={'width': '100%'}),
+                        dcc.Dropdown(id='ticker_dropdown', 
+                                    options=[{'label': TICKER_DICT[ticker], 'value': ticker} if ticker in TICKER_DICT else {'label': ticker, 'value': ticker} for ticker in TICKERS],
+                                    value=TICKERS[0], clearable=False, persistence=True, persisted_props=['value'], persistence_type='local'
+                                    ),
                         html.Br(),
-                        html.Div(id='autotrade_label', children=[
-
-                        ], style={'display': 'block'}),  # Initially set to not display
-                        html.Br(),
-                    ], style={'display': 'none'})  # Initially set to not display
-
-
-                ], style={'textAlign': 'center', 'display': 'flex', 'justifyContent': 'center', 'alignItems': 'center', 'flexDirection': 'row', 'width': '100%', 'padding': '10px 40px 10px 40px', 'display': 'inline-block'}),
+                        html.H4('Select TimeFrame:', style={'width': '100%'}),
+                        dcc.Dropdown(id='timeframe_dropdown', 
+                                    options=[{'label': 'Daily', 'value': 'Daily'}, {'label': 'Hourly', 'value': 'Hourly'}],
+                                    value='Daily', clearable=False, persistence=True, persisted_props=['value'], 
+                                    persistence_type='local'
+                                    ),
+                        html.Br(),            
+                    
+                        # Wrapped BUY and SELL sections in a Div with an id 'bot_info'
+                        html.Div(id='bot_info', children=[
+                            html.Br(),
+                            html.H4('Start Bot Message:', style={'width': '100%', 'color': 'green'}),
+                            dcc.Textarea(id='buy_textarea', value='', placeholder='Enter Message to Start Bot', style={'width': '100%', 'height': '150px', 'resize': 'none', 'textAlign': 'left', 'display': 'flex', 'justifyContent': 'center', 'alignItems': 'center', 'flexDirection': 'column'}),
+                            html.Br(),
+                            html.H4('Stop Bot Message:', style={'width': '100%', 'color': 'red'}),
+                            dcc.Textarea(id='sell_textarea', value='', placeholder='Enter Message to Stop Bot', style={'width': '100%', 'height': '150px', 'resize': 'none', 'textAlign': 'left', 'display': 'flex', 'justifyContent': 'center', 'alignItems': 'center', 'flexDirection': 'column'}),
+                            html.Br(),
+                            html.Button(id='autotrade_button', className='btn btn-outline-dark', children='Autotrade', n_clicks=0, style={'width': '100%', 'height': '50px', 'textAlign': 'center', 'display': 'flex', 'justifyContent': 'center', 'alignItems': 'center', 'flexDirection': 'column'}),
+                            html.Br(),
+                            html.Div(id='autotrade_label', children=autotrade_label(autotrade_state.settings()['autotrade_on']), style={'display': 'block'}),
+                            # the bot messages the daemon sends, saved whenever a message box loses focus
+                            html.Div(id='bot_messages_label', children=bot_messages_label(autotrade_state.settings()), style={'display': 'block'}),
+                            # the last signal the autotrade daemon sent to the bot
+                            html.Div(id='autotrade_signal_label', children=[], style={'display': 'block'}),
+                            html.Br(),
+                        ], style={'display': 'none'})  # Initially set to not display
+
+
+                    ], style={'textAlign': 'center', 'display': 'flex', 'justifyContent': 'center', 'alignItems': 'center', 'flexDirection': 'row', 'width': '100%', 'padding': '10px 40px 10px 40px', 'display': 'inline-block'}),
                 
-                html.Div(children=[
-                                dcc.Graph( id='ticker_chart', figure={}),
-                                html.Div(id='div_table', children=[
-                                ]),
-                        ], style={'textAlign': 'center', 'display': 'flex', 'justifyContent': 'center', 'alignItems': 'center', 'flexDirection': 'column', 'width': '100%', 'marginBottom': '10px', 'padding' : '10px'}),
+                    html.Div(children=[
+                                    dcc.Graph( id='ticker_chart', figure={}),
+                                    html.Div(id='div_table', children=[
+                                    ]),
+                            ], style={'textAlign': 'center', 'display': 'flex', 'justifyContent': 'center', 'alignItems': 'center', 'flexDirection': 'column', 'width': '100%', 'marginBottom': '10px', 'padding' : '10px'}),
                 
-            ], style={'width': '100%', 'textAlign': 'center', 'display': 'flex', 'justifyContent': 'left', 'alignItems': 'left', 'flexDirection': 'row'}),
+                ], style={'width': '100%', 'textAlign': 'center', 'display': 'flex', 'justifyContent': 'left', 'alignItems': 'left', 'flexDirection': 'row'}),
             
-        ], type='circle', fullscreen=False), # Loading component ends here
-        dcc.Interval(
-            id='interval-component',
-            interval=15*60*1000, # in milliseconds = will update every 15 minutes
-            n_intervals=0
-        ), 
-        dcc.Store(id='autotrade_store', storage_type='local')
+            ], type='circle', fullscreen=False), # Loading component ends here
+            dcc.Interval(
+                id='interval-component',
+                interval=15*60*1000, # in milliseconds = will update every 15 minutes
+                n_intervals=0
+            ), 
+            dcc.Interval(
+                id='forecast_watch_interval',
+                interval=30*1000, # in milliseconds = checks for new precomputed data every 30 seconds
+                n_intervals=0
+            ),
+            dcc.Store(id='forecast_version_store'),
+            # the ticker, timeframe and zoomed x range on screen, so a refresh redraws the same range
+            dcc.Store(id='chart_view_store'),
+            dcc.Store(id='autotrade_store', storage_type='local'),
+            # the last autotrade signal sent to the bot
+            dcc.Store(id='autotrade_signal_store')
         
-])
+    ])
 
 #################### CALLBACKS ####################
+# Callback to load the market indices chart after the page shell has rendered
+@callback(
+    Output('indices_chart', 'figure'),
+    Input('interval-component', 'n_intervals')
+)
+def update_indices_chart(n):
+    figure = indices_chart_cache.get('indices', create_indices_charts)
+    # leave the chart empty if Yahoo is down and nothing was downloaded yet
+    return figure if figure is not None else {}
+
 @callback(
     Output('ticker_chart', 'figure'), 
     Output('div_table', 'children'),
     Output('div_table', 'style'),
+    Output('chart_view_store', 'data'),
     Input('timeframe_dropdown', 'value'),
     Input('ticker_dropdown', 'value'),
-    Input('buy_textarea', 'value'),
-    Input('sell_textarea', 'value'),
-    State('autotrade_store', 'data'),  # Access store_data as State
     Input('interval-component', 'n_intervals'),
+    Input('forecast_version_store', 'data'),
+    Input('ticker_chart', 'relayoutData'),
+    State('chart_view_store', 'data'),
     # do not run the callback if the ticker is not changed
     prevent_initial_call=False
     )
-def update_chart(timeframe, ticker, buy_message, sell_message, store_data, n):
+def update_chart(timeframe, ticker, n, forecast_version, relayout_data, chart_view):
     show_hourly_chart = True if timeframe == 'Hourly' else False
-    new_fig = process_chart_pipeline(ticker, show_hourly_chart=show_hourly_chart)
-    # Use store_data to check autotrade status and ticker selection is Bitcoin
-    if ticker == 'BTC-USDC' and store_data and store_data.get('autotrade_on'):
-        # get the latest row where Close is not null
-        latest_data = MERGED_DATA[ticker].iloc[-91]
-        # Check conditions and print for now
-        if latest_data['Close'] < latest_data['lower_band']:
-            print(f"BTC-USDC Close price is below the lower band: {latest_data['Close']} < {latest_data['lower_band']}")
-            # Implement buy logic here
-            bot_controller.start_bot(buy_message)
-        elif latest_data['Close'] > latest_data['upper_band']:
-            print(f"BTC-USDC Close price is above the upper band: {latest_data['Close']} > {latest_data['upper_band']}")
-            # Implement sell logic here
-            bot_controller.stop_bot(sell_message)
+    triggered = {trigger['prop_id'] for trigger in callback_context.triggered or []}
+    new_chart = bool(triggered & {'ticker_dropdown.value', 'timeframe_dropdown.value'})
+    view = {'ticker': ticker, 'timeframe': timeframe, 'x_range': None}
+    # a zoom or pan only redraws the chart for the new x range
+    if 'ticker_chart.relayoutData' in triggered and not new_chart:
+        x_range = relayout_x_range(relayout_data)
+        if x_range is None and not relayout_data.get('xaxis.autorange'):
+            # e.g. the autosize event when the graph is first drawn
+            return no_update, no_update, no_update, no_update
+        view['x_range'] = x_range
+        return process_chart_pipeline(ticker, show_hourly_chart=show_hourly_chart, x_range=x_range), no_update, no_update, view
+    # a refresh of the same chart keeps the zoomed range at full resolution, a new ticker or
+    # timeframe starts zoomed out like uirevision does
+    if not new_chart and chart_view and chart_view['x_range'] and (chart_view['ticker'], chart_view['timeframe']) == (ticker, timeframe):
+        view['x_range'] = tuple(chart_view['x_range'])
+    new_fig = process_chart_pipeline(ticker, show_hourly_chart=show_hourly_chart, x_range=view['x_range'])
     # show if ticker is not i crypto or mt4
     if ticker not in CRYPTO_TICKERS and ticker not in MT4_SYMBOLS:
         table = create_table(ticker)
-        return new_fig, table, {'display': 'block'}
+        return new_fig, table, {'display': 'block'}, view
     else:
-        return new_fig, '', {'display': 'none'}
+        return new_fig, '', {'display': 'none'}, view
+
+# Callback to show the last signal of the autotrade daemon, which evaluates the rule on every closed candle without the page
+@callback(
+    Output('autotrade_signal_store', 'data'),
+    Output('autotrade_signal_label', 'children'),
+    Input('interval-component', 'n_intervals'),
+    Input('autotrade_store', 'data'),
+    State('autotrade_signal_store', 'data'),
+    prevent_initial_call=False
+)
+def check_autotrade_signal(n, store_data, seen_signal):
+    last_signal = autotrade_state.signal()['last_signal']
+    if last_signal is None or last_signal == seen_signal:
+        return no_update, no_update
+    label = html.P(f"Last signal: {last_signal['signal']} {last_signal['symbol']} at {last_signal['close']:.2f} "
+                   f"(band {last_signal['band']:.2f}) on the {last_signal['candle']} {last_signal['timeframe']} candle"
+                   f"{AUTOTRADE_STATUS_TEXT.get(last_signal.get('status'), '')}"
+                   f"{': ' + last_signal['reason'] if last_signal.get('reason') else ''}")
+    return last_signal, label
     
+# Callback to redraw the chart only when the scheduler published new data for it
+@callback(
+    Output('forecast_version_store', 'data'),
+    Input('forecast_watch_interval', 'n_intervals'),
+    State('ticker_dropdown', 'value'),
+    State('timeframe_dropdown', 'value'),
+    State('forecast_version_store', 'data'),
+    prevent_initial_call=True
+)
+def check_forecast_updates(n, ticker, timeframe, seen_version):
+    chart_timeframe = chart_pipeline.timeframe_for(ticker, timeframe == 'Hourly')
+    version = forecast_scheduler.version(ticker, chart_timeframe)
+    version = {'symbol': ticker, 'timeframe': chart_timeframe, 'version': version}
+    # first check for this chart, just remember where the scheduler is
+    if not seen_version or seen_version.get('symbol') != ticker or seen_version.get('timeframe') != chart_timeframe:
+        return version
+    if seen_version == version:
+        return no_update
+    return version
+
 # Callback to toggle visibility of the BUY and SELL sections
 @callback(
     Output('bot_info', 'style'),
@@ -407,59 +523,48 @@ def toggle_bot_info_visibility(selected_ticker):
     # Check if the selected ticker is Bitcoin
     print('\nselected_ticker', selected_ticker)
     if selected_ticker == 'BTC-USDC':  # Replace with your Bitcoin ticker ID
-        # check if the pickle file exists
-        if os.path.exists('data/trade_messages.pickle'):
-            # load the pickle file
-            with open('data/trade_messages.pickle', 'rb') as file:
-                trade_messages = pickle.load(file)
-            # return the trade messages
-            buy_message = trade_messages['buy_message']
-            print('buy_message', buy_message)
-            sell_message = trade_messages['sell_message']
-            print('sell_message', sell_message)
+        # load the trade messages shared with the autotrade daemon
+        settings = autotrade_state.settings()
+        buy_message = settings['buy_message']
+        print('buy_message', buy_message)
+        sell_message = settings['sell_message']
+        print('sell_message', sell_message)
         # If Bitcoin is selected, make the sections visible
         return {'display': 'block'}, buy_message, sell_message
     else:
         # If another ticker is selected, hide the sections
         return {'display': 'none'}, '', ''
 
+# Callback to save the bot messages, so an edit reaches the daemon while autotrade is on
+@callback(
+    Output('bot_messages_label', 'children'),
+    # saved when a message box loses focus, not on every keystroke
+    Input('buy_textarea', 'n_blur'),
+    Input('sell_textarea', 'n_blur'),
+    State('buy_textarea', 'value'),
+    State('sell_textarea', 'value'),
+    prevent_initial_call=True
+)
+def save_bot_messages(buy_blur, sell_blur, buy_message, sell_message):
+    # don't save the buy and sell messages if they are empty
+    fields = {}
+    if buy_message:
+        fields['buy_message'] = buy_message
+    if sell_message:
+        fields['sell_message'] = sell_message
+    settings = autotrade_state.update_settings(**fields) if fields else autotrade_state.settings()
+    return bot_messages_label(settings)
+
 # Callback to toggle the Autotrade label
 @callback(
     Output('autotrade_label', 'children'),
     Output('autotrade_store', 'data'),  # Update the store with the current state
     Input('autotrade_button', 'n_clicks'),
-    Input('buy_textarea', 'value'),
-    Input('sell_textarea', 'value'),
-    State('autotrade_store', 'data'),  # Use the store's data to determine the current state
+    State('timeframe_dropdown', 'value'),
     prevent_initial_call=True
 )
-def toggle_autotrade(n_clicks, buy_message, sell_message, store_data):
-    # Initialize store_data if it's None
-    if store_data is None:
-        store_data = {'autotrade_on': False, 'buy_message': '', 'sell_message': ''}
-
-    # Check if the number of clicks is even or odd
-    if n_clicks % 2 == 0:
-        # Even number of clicks, autotrade is off
-        store_data['autotrade_on'] = False
-        label = [html.P('Autotrade is Off', style={'color': 'red'})]
-    else:
-        # Odd number of clicks, autotrade is on
-        store_data['autotrade_on'] = True
-        label = [html.P('Autotrade is On', style={'color': 'green'})]
-        
-        # Update the buy and sell messages
-        if buy_message and sell_message:
-            store_data['buy_message'] = buy_message
-            store_data['sell_message'] = sell_message
-        
-        # don't save the buy and sell messages if they are empty
-        if buy_message == '' or sell_message == '':
-            return label, store_data
-        # create a dictionary to store the buy and sell messages
-        trade_messages = {'buy_message': buy_message, 'sell_message': sell_message}
-        # SAVE THE BUY AND SELL MESSAGES TO A PICKLE FILE
-        with open('data/trade_messages.pickle', 'wb') as file:
-            pickle.dump(trade_messages, file)
-    return label, store_data
-
+def toggle_autotrade(n_clicks, timeframe):
+    # flip the shared setting, so every open page and the daemon agree on it
+    settings = autotrade_state.toggle_setting('autotrade_on', symbol='BTC-USDC', show_hourly_chart=timeframe == 'Hourly')
+    store_data = {key: settings[key] for key in ('autotrade_on', 'buy_message', 'sell_message')}
+    return autotrade_label(settings['autotrade_on']), store_data
@@ -0,0 +1,75 @@
+"""
+A local stand-in for the 3Commas signal endpoint, to try the autotrade daemon without trading.
+
+Every POST is answered with --status (200 by default), printed and appended to --log as
+one JSON line, so a run can be checked afterwards for the signals that were sent. The
+first --fail-first posts are answered with 503 instead, to try the controller's retries.
+
+Usage (from the DIVIDEND DASHBOARD folder):
+    python tools/fake_3commas_server.py --port 8765
+    python autotrade_daemon.py --once --api-url http://127.0.0.1:8765/trade_signal/trading_view
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class FakeSignalHandler(BaseHTTPRequestHandler):
+    # set by make_server
+    status = 200
+    log_path = None
+    fail_first = 0
+    received = 0
+    lock = threading.Lock()
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        try:
+            payload = json.loads(body or b'null')
+        except ValueError:
+            payload = body.decode('utf-8', 'replace')
+        with self.lock:
+            type(self).received += 1
+            status = 503 if type(self).received <= self.fail_first else self.status
+        record = {'time': time.time(), 'path': self.path, 'payload': payload, 'status': status}
+        print(f"Signal received: {json.dumps(record)}")
+        if self.log_path:
+            with self.lock, open(self.log_path, 'a') as file:
+                file.write(json.dumps(record) + '\n')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.end_headers()
+        self.wfile.write(json.dumps({'status': status}).encode())
+
+    def log_message(self, format, *args):
+        # every request is already printed by do_POST
+        pass
+
+def make_server(host='127.0.0.1', port=8765, status=200, log_path=None, fail_first=0):
+    """
+    Returns a server answering the first `fail_first` posts with 503 and the others with
+    `status`, not yet serving.
+    """
+    handler = type('Handler', (FakeSignalHandler,), {'status': status, 'log_path': log_path, 'fail_first': fail_first, 'received': 0})
+    return ThreadingHTTPServer((host, port), handler)
+
+def main():
+    parser = argparse.ArgumentParser(description='Answer 3Commas signal posts locally.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--status', type=int, default=200, help='the HTTP status every post is answered with')
+    parser.add_argument('--log', default=None, help='a file every received signal is appended to as a JSON line')
+    parser.add_argument('--fail-first', type=int, default=0, help='answer this many posts with 503 first')
+    args = parser.parse_args()
+
+    server = make_server(args.host, args.port, args.status, args.log, args.fail_first)
+    print(f"Fake 3Commas listening on http://{args.host}:{args.port}/trade_signal/trading_view")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,23 @@
+"""
+The production entry point of the dashboard for a multi-worker WSGI server.
+
+`python app.py` runs Dash's single-process development server with the debug reloader.
+For several users at once run the Flask server behind gunicorn instead, configured by
+gunicorn.conf.py (from the DIVIDEND DASHBOARD folder):
+    gunicorn
+    DASH_WORKERS=4 DASH_THREADS=8 gunicorn
+
+gunicorn imports this module once before forking its workers, so the pages, the ticker
+lists and the parsed workbook are loaded a single time and shared by every worker
+copy-on-write. The forecast scheduler and the MT4 file watcher are started after the
+fork, in one worker only, by the post_fork hook in gunicorn.conf.py. The workers share
+their metrics in DASH_METRICS_DIR, so /metrics reports the totals of the whole server.
+"""
+from app import app
+from files.WorkbookLoader import WorkbookLoader
+
+# parse the workbook before forking, so workers read the sheets from shared memory
+WorkbookLoader('data/Dividend_Dashboard.xlsx').sheets()
+
+# the Flask app the WSGI server calls
+server = app.server